@@ -0,0 +1,52 @@
+"""
+Benchmark de memória: bytes por reserva carregada.
+
+Uso (na raiz do projeto):
+    py -m benchmarks.bench_memoria [quantidade_de_reservas]
+"""
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from roomex.dados import salvar_dados, carregar_dados
+from roomex.models import Reserva
+from roomex.repositorio import Repositorio
+from roomex.seed import gerar_quartos, gerar_reservas
+
+def medir(funcao) -> tuple:
+    """Executa 'funcao' e devolve (resultado, bytes que continuam alocados depois dela)."""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    resultado = funcao()
+    gc.collect()
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    usados = sum(estat.size_diff for estat in depois.compare_to(antes, "filename"))
+    return resultado, usados
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    quartos = gerar_quartos(200)
+    reservas = gerar_reservas(quartos, quantidade)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo_quartos = os.path.join(pasta, "quartos.json")
+        arquivo_reservas = os.path.join(pasta, "reservas.jsonl")
+        salvar_dados(quartos, arquivo_quartos)
+        salvar_dados(reservas, arquivo_reservas)
+        del reservas
+
+        carregadas, usados = medir(lambda: carregar_dados(arquivo_reservas, Reserva, quartos))
+        print(f"carregar_dados: {len(carregadas)} reservas, {usados / 1024 / 1024:.1f} MiB "
+              f"({usados / len(carregadas):.0f} bytes por reserva)")
+        del carregadas
+
+        repo, usados = medir(lambda: Repositorio.carregar(arquivo_quartos, arquivo_reservas))
+        print(f"Repositorio (com índices): {len(repo.reservas)} reservas, {usados / 1024 / 1024:.1f} MiB "
+              f"({usados / len(repo.reservas):.0f} bytes por reserva)")
+
+if __name__ == "__main__":
+    main()
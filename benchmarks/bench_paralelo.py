@@ -0,0 +1,58 @@
+"""
+Benchmark do relatório em paralelo: tempo e aceleração por número de processos.
+
+Uso (na raiz do projeto):
+    py -m benchmarks.bench_paralelo [quantidade_de_reservas] [max_processos]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from roomex.dados import salvar_dados
+from roomex.paralelo import relatorio_paralelo
+from roomex.reports import calcular_metricas_financeiras, relatorio_cancelamentos
+from roomex.seed import gerar_quartos, gerar_reservas
+
+def cronometrar(funcao) -> tuple:
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    max_processos = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    quartos = gerar_quartos(500)
+    reservas = gerar_reservas(quartos, quantidade)
+    data_inicio = min(r.data_entrada for r in reservas)
+    data_fim = max(r.data_saida for r in reservas)
+    print(f"{quantidade} reservas, período {data_inicio} a {data_fim}, {os.cpu_count()} CPUs")
+
+    def serial():
+        # Reservas novas do disco não teriam preço memorizado: cota do zero, como os processos
+        for r in reservas:
+            r._cache_diarias = None
+        return (calcular_metricas_financeiras(reservas, data_inicio, data_fim, len(quartos)),
+                relatorio_cancelamentos(reservas, data_inicio, data_fim))
+
+    esperado, tempo_serial = cronometrar(serial)
+    print(f"\n{'modo':<22}{'processos':>10}{'tempo (s)':>12}{'aceleração':>12}")
+    print(f"{'serial':<22}{1:>10}{tempo_serial:>12.3f}{1.0:>12.2f}")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "reservas.jsonl")
+        salvar_dados(reservas, arquivo, indice=True)
+
+        processos = 1
+        while processos <= max_processos:
+            for modo, fonte, por in (("lista (por quarto)", reservas, "quarto"),
+                                     ("lista (por data)", reservas, "data"),
+                                     ("arquivo .jsonl", arquivo, "quarto")):
+                resultado, tempo = cronometrar(lambda: relatorio_paralelo(
+                    fonte, data_inicio, data_fim, len(quartos), processos, por=por, quartos=quartos))
+                assert resultado == esperado, "resultado paralelo diferente do serial"
+                print(f"{modo:<22}{processos:>10}{tempo:>12.3f}{tempo_serial / tempo:>12.2f}")
+            processos *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Suíte de benchmarks: preço, gravação/carga, buscas e relatórios sobre um hotel sintético.
+
+Para cada caso mede o melhor tempo de algumas repetições, a vazão (itens por segundo)
+e o pico de memória (numa execução separada, com tracemalloc ligado). Os resultados podem
+ser gravados como baseline e comparados com execuções futuras para achar regressões.
+
+Uso (na raiz do projeto):
+    py -m benchmarks.bench_suite [--quartos N] [--reservas M] [--repeticoes R] [--filtro texto]
+                                 [--salvar baseline.json] [--comparar baseline.json] [--tolerancia 0.2]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+from roomex.cache_snapshot import CacheSnapshot
+from roomex.colunar import ReservaStore
+from roomex.dados import salvar_dados, carregar_dados
+from roomex.disponibilidade import buscar_quartos_disponiveis
+from roomex.models import Reserva
+from roomex.precos import cotar_lote_centavos, limpar_cache
+from roomex.reports import calcular_metricas_financeiras, gerar_relatorio, AcumuladorFinanceiro, AcumuladorCancelamentos
+from roomex.repositorio import Repositorio
+from roomex.seed import gerar_hotel
+from roomex.series import AcumuladorSerie
+
+class Caso:
+    """Um benchmark: 'funcao' é cronometrada; 'preparar' (opcional) roda antes de cada repetição, fora do tempo."""
+    def __init__(self, nome: str, itens: int, funcao, preparar=None):
+        self.nome = nome
+        self.itens = itens
+        self.funcao = funcao
+        self.preparar = preparar
+
+def _silencioso(funcao):
+    # salvar_dados e as ações imprimem mensagens: ficam fora da saída do benchmark
+    def executar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return funcao()
+    return executar
+
+def _esquecer_precos(reservas):
+    # Reservas recém-carregadas não têm subtotal memorizado nem tabelas de fatores montadas
+    limpar_cache()
+    for reserva in reservas:
+        reserva._cache_diarias = None
+
+def _apagar_cache(caminho: str):
+    # Partida a frio: sem o cache binário, o snapshot JSON é interpretado de novo
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(caminho)
+
+def montar_casos(quartos, reservas, pasta: str):
+    arquivo_quartos = os.path.join(pasta, "quartos.json")
+    arquivo_json = os.path.join(pasta, "reservas.json")
+    arquivo_jsonl = os.path.join(pasta, "reservas.jsonl")
+    arquivo_banco = os.path.join(pasta, "hotel.db")
+    _silencioso(lambda: salvar_dados(quartos, arquivo_quartos))()
+    _silencioso(lambda: salvar_dados(reservas, arquivo_json))()
+    _silencioso(lambda: salvar_dados(reservas, arquivo_jsonl))()
+    _silencioso(lambda: salvar_dados(quartos, arquivo_banco))()
+    _silencioso(lambda: salvar_dados(reservas, arquivo_banco))()
+
+    repo = Repositorio(quartos, reservas)
+    registros = [r.to_dict() for r in reservas]
+    quartos_por_numero = {q.numero: q for q in quartos}
+    inicio = min(r.data_entrada for r in reservas)
+    fim = max(r.data_saida for r in reservas)
+    total_quartos = len(quartos)
+
+    # Consultas de busca: sempre as mesmas, para que as execuções sejam comparáveis
+    aleatorio = random.Random(7)
+    dias = (fim - inicio).days
+    janelas = []
+    for _ in range(200):
+        entrada = inicio + timedelta(days=aleatorio.randrange(dias))
+        janelas.append((entrada, entrada + timedelta(days=aleatorio.randint(1, 7))))
+    documentos = [r.hospede.documento for r in aleatorio.sample(reservas, min(1000, len(reservas)))]
+    try:
+        loja = ReservaStore.de_reservas(reservas)
+    except ImportError:  # sem NumPy o caso colunar fica de fora
+        loja = None
+
+    casos = [
+        Caso("preco.calcular_valor_total", len(reservas),
+             lambda: [r.calcular_valor_total() for r in reservas], lambda: _esquecer_precos(reservas)),
+        Caso("preco.calcular_valor_total (memorizado)", len(reservas),
+             lambda: [r.calcular_valor_total() for r in reservas]),
+        Caso("preco.cotar_lote_centavos", len(reservas),
+             lambda: cotar_lote_centavos(reservas), lambda: _esquecer_precos(reservas)),
+
+        Caso("persistencia.salvar_dados json", len(reservas), _silencioso(lambda: salvar_dados(reservas, arquivo_json))),
+        Caso("persistencia.salvar_dados jsonl", len(reservas), _silencioso(lambda: salvar_dados(reservas, arquivo_jsonl))),
+        Caso("persistencia.salvar_dados sqlite", len(reservas), _silencioso(lambda: salvar_dados(reservas, arquivo_banco))),
+        Caso("persistencia.carregar_dados json", len(reservas), lambda: carregar_dados(arquivo_json, Reserva, quartos)),
+        Caso("persistencia.carregar_dados jsonl", len(reservas), lambda: carregar_dados(arquivo_jsonl, Reserva, quartos)),
+        Caso("persistencia.carregar_dados sqlite", len(reservas), lambda: carregar_dados(arquivo_banco, Reserva, quartos)),
+        Caso("persistencia.Reserva.from_dict (validado)", len(reservas),
+             lambda: [Reserva.from_dict(d, quartos_por_numero, {}) for d in registros]),
+        Caso("persistencia.Reserva.from_dict (confiável)", len(reservas),
+             lambda: [Reserva.from_dict(d, quartos_por_numero, {}, confiavel=True) for d in registros]),
+        Caso("persistencia.Repositorio.carregar", len(reservas),
+             lambda: Repositorio.carregar(arquivo_quartos, arquivo_json)),
+        Caso("persistencia.Repositorio.carregar (sem cache)", len(reservas),
+             lambda: Repositorio.carregar(arquivo_quartos, arquivo_json),
+             lambda: _apagar_cache(CacheSnapshot(arquivo_json).caminho)),
+        Caso("persistencia.Repositorio.carregar + histórico", len(reservas),
+             lambda: Repositorio.carregar(arquivo_quartos, arquivo_json).reservas),
+
+        Caso("busca.quartos_disponiveis", len(janelas),
+             lambda: [buscar_quartos_disponiveis(None, repo.indice, e, s, 2) for e, s in janelas]),
+        Caso("busca.reservas_por_documento", len(documentos),
+             lambda: [repo.reservas_por_documento(d) for d in documentos]),
+        Caso("busca.reservas_no_periodo", len(janelas),
+             lambda: [repo.reservas_no_periodo(e, s) for e, s in janelas]),
+
+        Caso("relatorio.calcular_metricas_financeiras", len(reservas),
+             lambda: calcular_metricas_financeiras(reservas, inicio, fim, total_quartos),
+             lambda: _esquecer_precos(reservas)),
+        Caso("relatorio.gerar_relatorio (financeiro+cancel.+série)", len(reservas),
+             lambda: gerar_relatorio(reservas, inicio, fim, total_quartos,
+                                     [AcumuladorFinanceiro(), AcumuladorCancelamentos(),
+                                      AcumuladorSerie(quartos, periodo="mes")]),
+             lambda: _esquecer_precos(reservas)),
+        Caso("relatorio.agregados diários", len(janelas),
+             lambda: [repo.metricas_do_periodo(e, s) for e, s in janelas]),
+    ]
+    if loja is not None:
+        casos.append(Caso("relatorio.ReservaStore", len(reservas),
+                          lambda: loja.metricas_financeiras(inicio, fim, total_quartos)))
+    return casos
+
+def medir(caso: Caso, repeticoes: int) -> dict:
+    """Melhor tempo entre as repetições, vazão correspondente e pico de memória (bytes)."""
+    tempos = []
+    for _ in range(repeticoes):
+        if caso.preparar:
+            caso.preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        caso.funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    # O tracemalloc deixa o código bem mais lento: a memória é medida numa execução à parte
+    if caso.preparar:
+        caso.preparar()
+    gc.collect()
+    tracemalloc.start()
+    caso.funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    melhor = min(tempos)
+    return {"tempo": melhor, "vazao": caso.itens / melhor if melhor > 0 else 0.0, "pico_memoria": pico}
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list:
+    """Nomes dos casos que ficaram mais lentos que a baseline além da tolerância (ex: 0.2 = 20%)."""
+    regressoes = []
+    anteriores = baseline.get("resultados", {})
+    print(f"\nComparação com a baseline ({baseline.get('ambiente', {}).get('data', '?')}):")
+    print(f"{'caso':<52}{'antes (s)':>12}{'agora (s)':>12}{'razão':>9}")
+    for nome, atual in resultados.items():
+        anterior = anteriores.get(nome)
+        if anterior is None:
+            print(f"{nome:<52}{'-':>12}{atual['tempo']:>12.4f}{'novo':>9}")
+            continue
+        razao = atual["tempo"] / anterior["tempo"] if anterior["tempo"] > 0 else 1.0
+        marca = "  ⚠️ REGRESSÃO" if razao > 1 + tolerancia else ""
+        if marca:
+            regressoes.append(nome)
+        print(f"{nome:<52}{anterior['tempo']:>12.4f}{atual['tempo']:>12.4f}{razao:>9.2f}{marca}")
+    return regressoes
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do Roomex")
+    parser.add_argument("--quartos", type=int, default=200)
+    parser.add_argument("--reservas", type=int, default=50_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--filtro", default="", help="roda só os casos cujo nome contém este texto")
+    parser.add_argument("--salvar", help="grava os resultados como baseline neste arquivo JSON")
+    parser.add_argument("--comparar", help="compara com a baseline gravada neste arquivo JSON")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="fração de lentidão aceita antes de acusar regressão (padrão: 0.2)")
+    opcoes = parser.parse_args(argumentos)
+
+    quartos, reservas = gerar_hotel(opcoes.quartos, opcoes.reservas, opcoes.semente)
+    print(f"{len(quartos)} quartos, {len(reservas)} reservas, {opcoes.repeticoes} repetições, "
+          f"Python {platform.python_version()}")
+    print(f"\n{'caso':<52}{'tempo (s)':>12}{'itens/s':>14}{'pico (MiB)':>12}")
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for caso in montar_casos(quartos, reservas, pasta):
+            if opcoes.filtro not in caso.nome:
+                continue
+            resultado = resultados[caso.nome] = medir(caso, opcoes.repeticoes)
+            print(f"{caso.nome:<52}{resultado['tempo']:>12.4f}{resultado['vazao']:>14,.0f}"
+                  f"{resultado['pico_memoria'] / 1024 / 1024:>12.1f}")
+
+    regressoes = []
+    if opcoes.comparar:
+        with open(opcoes.comparar, "r", encoding="utf-8") as arquivo:
+            regressoes = comparar(resultados, json.load(arquivo), opcoes.tolerancia)
+
+    if opcoes.salvar:
+        ambiente = {"data": time.strftime("%Y-%m-%d %H:%M"), "python": platform.python_version(),
+                    "plataforma": platform.platform(), "quartos": opcoes.quartos,
+                    "reservas": opcoes.reservas, "semente": opcoes.semente}
+        with open(opcoes.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump({"ambiente": ambiente, "resultados": resultados}, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nBaseline gravada em {opcoes.salvar}")
+
+    if regressoes:
+        print(f"\n{len(regressoes)} caso(s) mais lento(s) que a baseline.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
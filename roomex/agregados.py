@@ -0,0 +1,308 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from roomex.models import Reserva
+from roomex.dados import assinatura_configuracoes, versao_configuracoes
+from roomex.precos import calcular_diarias_centavos
+from roomex.dinheiro import dividir_centavos
+from roomex.reports import _metricas_de_totais
+from roomex.series import _metricas_da_serie
+
+# Métricas guardadas em cada balde (dia x tipo de quarto), nesta ordem.
+# As três últimas são internas: cancelamentos/no-shows pelo dia de saída e o valor total
+# das estadias vendidas pelo dia de entrada (ver somar_periodo e receita_periodo).
+METRICAS = ("noites", "receita", "canceladas", "no_show", "recebido",
+            "canceladas_saida", "no_show_saida", "receita_entrada")
+(NOITES, RECEITA, CANCELADAS, NO_SHOW, RECEBIDO,
+ CANCELADAS_SAIDA, NO_SHOW_SAIDA, RECEITA_ENTRADA) = range(len(METRICAS))
+METRICAS_PUBLICAS = METRICAS[:RECEBIDO + 1]
+
+# Status que vendem noites (os mesmos que geram receita nos relatórios)
+STATUS_VENDIDOS = ("CONFIRMADA", "ATIVA", "FINALIZADA")
+
+class _Fenwick:
+    """Árvore de Fenwick: soma num ponto e soma de prefixo, ambas em O(log n)."""
+    __slots__ = ("arvore",)
+
+    def __init__(self, tamanho: int):
+        self.arvore = [0] * (tamanho + 1)
+
+    def somar(self, posicao: int, valor: int):
+        posicao += 1
+        arvore = self.arvore
+        while posicao < len(arvore):
+            arvore[posicao] += valor
+            posicao += posicao & -posicao
+
+    def prefixo(self, posicao: int) -> int:
+        """Soma das posições [0, posicao)."""
+        total = 0
+        arvore = self.arvore
+        posicao = min(posicao, len(arvore) - 1)
+        while posicao > 0:
+            total += arvore[posicao]
+            posicao -= posicao & -posicao
+        return total
+
+
+class AgregadosDiarios:
+    """
+    KPIs materializados por dia e por tipo de quarto: noites vendidas, receita (centavos),
+    cancelamentos e no-shows e valores recebidos (no dia do pagamento).
+
+    Os baldes são atualizados a cada evento das reservas acompanhadas (check-in, check-out,
+    cancelamento, pagamento, adicional, mudança de datas): a contribuição antiga da reserva
+    é desfeita e a nova é somada. As consultas de período somam baldes por meio de árvores
+    de Fenwick, em O(log dias), sem olhar as reservas.
+
+    A receita de cada estadia é distribuída pelas noites como em roomex.series
+    (centavos inteiros, o resto nas primeiras noites); a receita do financeiro segue
+    calcular_metricas_financeiras (receita_periodo). Cancelamentos e no-shows contam
+    as reservas que se sobrepõem ao período, como relatorio_cancelamentos.
+    """
+    def __init__(self):
+        # dia (ordinal) -> tipo de quarto -> valores na ordem de METRICAS
+        self.dias: Dict[int, Dict[str, List[int]]] = {}
+        # Estadias vendidas por dia de entrada: (noites, total em centavos) -> quantidade.
+        # Só as que cruzam o início ou o fim do período precisam de rateio em receita_periodo.
+        self.estadias: Dict[int, Dict[Tuple[int, int], int]] = {}
+        self._maior_estadia = 0
+        self.versao = versao_configuracoes()
+        self._observador = self._ao_mudar_reserva
+        # Índice das consultas (montado sob demanda): (tipo, métrica) -> árvore
+        self._arvores: Optional[Dict[Tuple[str, int], _Fenwick]] = None
+        self._origem = 0
+        self._tamanho = 0
+
+    # --- Acompanhamento das reservas ---
+
+    def acompanhar(self, reserva: Reserva, contabilizar: bool = True):
+        """
+        Passa a observar a reserva. Com contabilizar=False, a reserva já está refletida
+        nos baldes (ex: agregados carregados do disco) e só as próximas mudanças contam.
+        """
+        if contabilizar:
+            self._somar_estado(reserva, reserva.status, reserva.data_entrada, reserva.data_saida,
+                               reserva.calcular_valor_total_centavos(self.versao), 1)
+            for pagamento in reserva.pagamentos:
+                self._somar(pagamento.data.toordinal(), reserva.quarto.tipo, RECEBIDO, pagamento.valor_centavos)
+        reserva.registrar_observador(self._observador)
+
+    def _ao_mudar_reserva(self, reserva: Reserva, evento: str, **detalhes):
+        if evento == "validar":
+            return
+        if evento == "pagamento":
+            pagamento = detalhes["pagamento"]
+            self._somar(pagamento.data.toordinal(), reserva.quarto.tipo, RECEBIDO, pagamento.valor_centavos)
+            return
+
+        total = reserva.calcular_valor_total_centavos(self.versao)
+        # Reconstrói o estado anterior a partir dos detalhes do evento e troca as contribuições
+        status, entrada, saida, total_anterior = reserva.status, reserva.data_entrada, reserva.data_saida, total
+        if evento == "status":
+            status = detalhes["anterior"]
+        elif evento == "datas":
+            entrada, saida = detalhes["entrada_anterior"], detalhes["saida_anterior"]
+            total_anterior = (calcular_diarias_centavos(reserva.quarto.tarifa_centavos, entrada, saida)
+                              + reserva.subtotal_adicionais_centavos())
+        elif evento == "adicional":
+            total_anterior = total - detalhes["adicional"].valor_centavos
+        else:
+            return
+        self._somar_estado(reserva, status, entrada, saida, total_anterior, -1)
+        self._somar_estado(reserva, reserva.status, reserva.data_entrada, reserva.data_saida, total, 1)
+
+    def _somar_estado(self, reserva: Reserva, status: str, entrada: date, saida: date, total: int, sinal: int):
+        tipo = reserva.quarto.tipo
+        dia = entrada.toordinal()
+        if status == "CANCELADA":
+            self._somar(dia, tipo, CANCELADAS, sinal)
+            self._somar(saida.toordinal(), tipo, CANCELADAS_SAIDA, sinal)
+        elif status == "NO_SHOW":
+            self._somar(dia, tipo, NO_SHOW, sinal)
+            self._somar(saida.toordinal(), tipo, NO_SHOW_SAIDA, sinal)
+        elif status in STATUS_VENDIDOS:
+            noites = saida.toordinal() - dia
+            base, resto = divmod(total, noites)
+            for i in range(noites):
+                self._somar(dia + i, tipo, NOITES, sinal)
+                self._somar(dia + i, tipo, RECEITA, sinal * (base + (1 if i < resto else 0)))
+            self._somar(dia, tipo, RECEITA_ENTRADA, sinal * total)
+            self._somar_estadia(dia, noites, total, sinal)
+
+    def _somar_estadia(self, dia: int, noites: int, total: int, sinal: int):
+        estadias = self.estadias.get(dia)
+        if estadias is None:
+            estadias = self.estadias[dia] = {}
+        chave = (noites, total)
+        quantidade = estadias.get(chave, 0) + sinal
+        if quantidade:
+            estadias[chave] = quantidade
+        else:
+            del estadias[chave]
+            if not estadias:
+                del self.estadias[dia]
+        if noites > self._maior_estadia:
+            self._maior_estadia = noites
+
+    def _somar(self, dia: int, tipo: str, metrica: int, valor: int):
+        if not valor:
+            return
+        balde = self.dias.get(dia)
+        if balde is None:
+            balde = self.dias[dia] = {}
+        valores = balde.get(tipo)
+        if valores is None:
+            valores = balde[tipo] = [0] * len(METRICAS)
+        valores[metrica] += valor
+
+        if self._arvores is not None:
+            if self._origem <= dia < self._origem + self._tamanho:
+                arvore = self._arvores.get((tipo, metrica))
+                if arvore is None:
+                    arvore = self._arvores[(tipo, metrica)] = _Fenwick(self._tamanho)
+                arvore.somar(dia - self._origem, valor)
+            else:
+                # Dia fora da faixa do índice: remonta na próxima consulta
+                self._arvores = None
+
+    # --- Consultas ---
+
+    def _indice(self) -> Dict[Tuple[str, int], _Fenwick]:
+        if self._arvores is None:
+            primeiro = min(self.dias, default=0)
+            ultimo = max(self.dias, default=0)
+            # Folga de um ano para os dois lados: reservas novas raramente forçam remontar
+            self._origem = primeiro - 366
+            self._tamanho = ultimo - self._origem + 367
+            arvores: Dict[Tuple[str, int], _Fenwick] = {}
+            for dia, balde in self.dias.items():
+                for tipo, valores in balde.items():
+                    for metrica, valor in enumerate(valores):
+                        if valor:
+                            arvore = arvores.get((tipo, metrica))
+                            if arvore is None:
+                                arvore = arvores[(tipo, metrica)] = _Fenwick(self._tamanho)
+                            arvore.somar(dia - self._origem, valor)
+            self._arvores = arvores
+        return self._arvores
+
+    def somar_periodo(self, data_inicio: date, data_fim: date, tipos: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Soma os baldes de [data_inicio, data_fim) de cada métrica (opcionalmente só dos 'tipos' informados).
+        Cancelamentos e no-shows seguem relatorio_cancelamentos: contam as reservas com entrada
+        até data_fim (inclusive) e saída depois de data_inicio, isto é, entradas até o fim
+        menos as saídas até o início. Num período vazio (data_fim <= data_inicio) nenhuma
+        reserva tem noites nele e só contam as com entrada em [data_inicio, data_fim].
+        """
+        arvores = self._indice()
+        tipos = set(tipos) if tipos is not None else None
+        inicio = max(data_inicio.toordinal() - self._origem, 0)
+        fim = max(data_fim.toordinal() - self._origem, 0)
+        if fim > inicio:
+            faixas = {
+                NOITES: (inicio, fim), RECEITA: (inicio, fim), RECEBIDO: (inicio, fim),
+                CANCELADAS: (0, fim + 1), NO_SHOW: (0, fim + 1),
+                CANCELADAS_SAIDA: (0, inicio + 1), NO_SHOW_SAIDA: (0, inicio + 1),
+            }
+        else:
+            # Sem saídas a descontar: a faixa de entradas fica vazia quando data_fim < data_inicio
+            faixas = {CANCELADAS: (inicio, max(fim + 1, inicio)), NO_SHOW: (inicio, max(fim + 1, inicio))}
+        brutos = [0] * len(METRICAS)
+        for (tipo, metrica), arvore in arvores.items():
+            faixa = faixas.get(metrica)
+            if faixa is None or (tipos is not None and tipo not in tipos):
+                continue
+            brutos[metrica] += arvore.prefixo(faixa[1]) - arvore.prefixo(faixa[0])
+        brutos[CANCELADAS] -= brutos[CANCELADAS_SAIDA]
+        brutos[NO_SHOW] -= brutos[NO_SHOW_SAIDA]
+        return {nome: brutos[metrica] for metrica, nome in enumerate(METRICAS_PUBLICAS)}
+
+    def receita_periodo(self, data_inicio: date, data_fim: date) -> int:
+        """
+        Receita de [data_inicio, data_fim) em centavos, com o rateio de calcular_metricas_financeiras:
+        cada estadia entra com dividir_centavos(total, noites no período, noites da estadia).
+        As estadias inteiras no período somam o total (árvore pelo dia de entrada); só as que
+        cruzam o início ou o fim são rateadas, olhando as entradas até a maior estadia para trás.
+        """
+        inicio, fim = data_inicio.toordinal(), data_fim.toordinal()
+        if fim <= inicio:
+            return 0
+        arvores = self._indice()
+        de = max(inicio - self._origem, 0)
+        ate = max(fim - self._origem, 0)
+        receita = 0
+        for (_, metrica), arvore in arvores.items():
+            if metrica == RECEITA_ENTRADA:
+                receita += arvore.prefixo(ate) - arvore.prefixo(de)
+
+        # Entradas no período que saem depois do fim: trocam o total pela fração
+        for dia in range(max(inicio, fim - self._maior_estadia), fim):
+            for (noites, total), quantidade in self.estadias.get(dia, {}).items():
+                if dia + noites > fim:
+                    receita += quantidade * (dividir_centavos(total, fim - dia, noites) - total)
+        # Entradas antes do período que ainda têm noites nele
+        for dia in range(inicio - self._maior_estadia, inicio):
+            for (noites, total), quantidade in self.estadias.get(dia, {}).items():
+                saida = dia + noites
+                if saida > inicio:
+                    receita += quantidade * dividir_centavos(total, min(saida, fim) - inicio, noites)
+        return receita
+
+    def metricas_financeiras(self, data_inicio: date, data_fim: date, total_quartos: int) -> Dict[str, float]:
+        """Ocupação, ADR, RevPAR e receita do período (mesmo formato de calcular_metricas_financeiras)."""
+        dias_no_periodo = (data_fim - data_inicio).days
+        if total_quartos <= 0 or dias_no_periodo <= 0:
+            return {"ocupacao": 0.0, "adr": 0.0, "revpar": 0.0, "receita_total": 0.0}
+        noites = self.somar_periodo(data_inicio, data_fim)["noites"]
+        return _metricas_de_totais(noites, self.receita_periodo(data_inicio, data_fim), total_quartos, dias_no_periodo)
+
+    def cancelamentos(self, data_inicio: date, data_fim: date) -> Dict[str, int]:
+        """Cancelamentos e no-shows que se sobrepõem ao período (formato de relatorio_cancelamentos)."""
+        totais = self.somar_periodo(data_inicio, data_fim)
+        return {"CANCELADA": totais["canceladas"], "NO_SHOW": totais["no_show"],
+                "TOTAL": totais["canceladas"] + totais["no_show"]}
+
+    def serie_mensal(self, data_inicio: date, data_fim: date, total_quartos: int) -> Dict[str, list]:
+        """Série mês a mês do período (mesmas colunas de roomex.series.serie_mensal)."""
+        meses, ocupados, receitas, disponiveis = [], [], [], []
+        inicio = data_inicio
+        while inicio < data_fim:
+            proximo = date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+            fim = min(proximo, data_fim)
+            totais = self.somar_periodo(inicio, fim)
+            meses.append(inicio.replace(day=1))
+            ocupados.append(totais["noites"])
+            receitas.append(totais["receita"])
+            disponiveis.append(total_quartos * (fim - inicio).days)
+            inicio = fim
+        return _metricas_da_serie(meses, ocupados, receitas, disponiveis)
+
+    # --- Persistência ---
+
+    def to_dict(self) -> dict:
+        return {
+            "configuracoes": assinatura_configuracoes(),
+            "metricas": list(METRICAS),
+            "dias": {date.fromordinal(dia).isoformat(): balde for dia, balde in sorted(self.dias.items())},
+            "estadias": {date.fromordinal(dia).isoformat(): [[noites, total, quantidade]
+                                                            for (noites, total), quantidade in estadias.items()]
+                         for dia, estadias in sorted(self.estadias.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, dados: dict) -> Optional['AgregadosDiarios']:
+        """
+        Recria os agregados gravados. Retorna None se eles não servem mais
+        (settings.json mudou desde a gravação, ou formato diferente).
+        """
+        if (dados.get("configuracoes") != assinatura_configuracoes() or dados.get("metricas") != list(METRICAS)
+                or "estadias" not in dados):
+            return None
+        agregados = cls()
+        agregados.dias = {date.fromisoformat(dia).toordinal(): balde for dia, balde in dados["dias"].items()}
+        agregados.estadias = {date.fromisoformat(dia).toordinal(): {(noites, total): quantidade
+                                                                    for noites, total, quantidade in estadias}
+                              for dia, estadias in dados["estadias"].items()}
+        agregados._maior_estadia = max((noites for estadias in agregados.estadias.values() for noites, _ in estadias),
+                                       default=0)
+        return agregados
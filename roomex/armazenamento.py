@@ -0,0 +1,513 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from roomex.models import Quarto, Reserva
+from roomex.dados import carregar_configuracoes, carregar_dados, gravacao_atomica, ler_registros, salvar_registros
+from roomex.diario import Diario
+from roomex.disponibilidade import STATUS_OCUPANTES
+from roomex.cache_snapshot import CacheSnapshot, desempacotar
+
+# Quantidade de eventos no diário que dispara a gravação de um novo snapshot
+LIMITE_COMPACTACAO = 500
+
+# Arquivos padrão do sistema (menu e modo lote), na pasta de execução
+ARQUIVO_QUARTOS = "quartos.json"
+ARQUIVO_RESERVAS = "reservas.jsonl"  # um registro por linha; o antigo reservas.json é convertido
+ARQUIVO_DIARIO = "reservas.diario.jsonl"
+
+# Reservas (com sua posição) e a função que carrega as que ficaram para depois
+CargaAdiada = Tuple[int, List[Tuple[int, Reserva]], Optional[Callable[[], List[Tuple[int, Reserva]]]]]
+
+class Armazenamento(ABC):
+    """
+    Interface dos backends de persistência usados pelo Repositorio.
+
+    O repositório carrega quartos e reservas uma vez e depois informa cada mudança
+    como um evento (dicionário com a chave "evento"): "reserva", "status", "datas",
+    "pagamento" ou "adicional". Cada backend decide como gravar esses eventos.
+    """
+    @abstractmethod
+    def carregar_quartos(self) -> List[Quarto]:
+        ...
+
+    @abstractmethod
+    def carregar_reservas(self, quartos_por_numero: Dict[int, Quarto]) -> List[Reserva]:
+        ...
+
+    def carregar_reservas_adiado(self, quartos_por_numero: Dict[int, Quarto],
+                                 status_imediatos: Sequence[str]) -> CargaAdiada:
+        """
+        Carga em duas etapas: retorna (total de reservas, [(posição, reserva)] das que têm
+        status em 'status_imediatos', função que carrega as demais). A função é None quando
+        a primeira lista já traz tudo. Por padrão, tudo é carregado de uma vez.
+        """
+        reservas = self.carregar_reservas(quartos_por_numero)
+        return len(reservas), list(enumerate(reservas)), None
+
+    def eventos_pendentes(self) -> Iterable[dict]:
+        """Eventos gravados depois do último snapshot (a reaplicar na carga)."""
+        return ()
+
+    @abstractmethod
+    def registrar(self, evento: dict):
+        ...
+
+    def registrar_varios(self, eventos: List[dict]):
+        """Grava vários eventos de uma vez (ex: modo lote). Por padrão, um a um."""
+        for evento in eventos:
+            self.registrar(evento)
+
+    def persistir(self, reservas: List[Reserva]) -> bool:
+        """
+        Chamado depois de cada ação do menu. Retorna True se o estado gravado ficou
+        consolidado (ex: compactou): o repositório grava os agregados junto.
+        """
+        return False
+
+    @abstractmethod
+    def compactar(self, reservas: List[Optional[Reserva]]):
+        """
+        Consolida o que foi gravado (ex: snapshot completo no backend JSON).
+        Posições None são reservas que a carga adiada ainda não trouxe (iguais às do snapshot).
+        """
+
+    def carregar_agregados(self) -> Optional[dict]:
+        """KPIs materializados gravados junto com o estado compactado, se ainda valerem para ele."""
+        return None
+
+    def salvar_agregados(self, dados: dict):
+        """Grava os KPIs materializados correspondentes ao estado compactado."""
+
+    def fechar(self):
+        pass
+
+
+class ArmazenamentoJSON(Armazenamento):
+    """
+    Arquivos JSON (snapshot) com diário de eventos opcional.
+    Sem diário, cada persistência reescreve o arquivo de reservas inteiro.
+    """
+    def __init__(self, arquivo_quartos: str, arquivo_reservas: str, arquivo_diario: Optional[str] = None,
+                 limite_compactacao: int = LIMITE_COMPACTACAO):
+        self.arquivo_quartos = arquivo_quartos
+        self.arquivo_reservas = arquivo_reservas
+        self.diario = Diario(arquivo_diario) if arquivo_diario is not None else None
+        self.limite_compactacao = limite_compactacao
+        # Cópia binária do snapshot: a partida a quente não interpreta o JSON
+        self._cache = CacheSnapshot(arquivo_reservas)
+        self._status_imediatos: Sequence[str] = STATUS_OCUPANTES
+        # Histórico da carga adiada, ainda empacotado (None depois de carregado)
+        self._historico_adiado: Optional[bytes] = None
+
+    def carregar_quartos(self) -> List[Quarto]:
+        return carregar_dados(self.arquivo_quartos, Quarto)
+
+    def carregar_reservas(self, quartos_por_numero: Dict[int, Quarto]) -> List[Reserva]:
+        total, imediatas, carregar_historico = self.carregar_reservas_adiado(quartos_por_numero, self._status_imediatos)
+        reservas: List[Reserva] = [None] * total
+        for posicao, reserva in imediatas + (carregar_historico() if carregar_historico else []):
+            reservas[posicao] = reserva
+        return reservas
+
+    def carregar_reservas_adiado(self, quartos_por_numero: Dict[int, Quarto],
+                                 status_imediatos: Sequence[str]) -> CargaAdiada:
+        self._status_imediatos = status_imediatos
+        lido = self._cache.ler(status_imediatos)
+        if lido is None:
+            # Partida a frio: interpreta o arquivo uma vez e já deixa o cache pronto
+            lido = self._cache.gravar(ler_registros(self.arquivo_reservas), status_imediatos)
+        total, imediatos, historico = lido
+
+        hospedes: Dict = {}
+        imediatas = [(posicao, Reserva.from_dict(dados, quartos_por_numero, hospedes, confiavel=True))
+                     for posicao, dados in imediatos]
+        if len(imediatas) == total:
+            return total, imediatas, None
+        self._historico_adiado = historico
+
+        def carregar_historico() -> List[Tuple[int, Reserva]]:
+            registros = desempacotar(self._historico_adiado)
+            self._historico_adiado = None
+            return [(posicao, Reserva.from_dict(dados, quartos_por_numero, hospedes, confiavel=True))
+                    for posicao, dados in registros]
+        return total, imediatas, carregar_historico
+
+    def eventos_pendentes(self) -> Iterable[dict]:
+        if self.diario is None:
+            return ()
+        return self.diario.ler()
+
+    def registrar(self, evento: dict):
+        if self.diario is not None:
+            self.diario.registrar(evento)
+
+    def registrar_varios(self, eventos: List[dict]):
+        if self.diario is not None:
+            self.diario.registrar_varios(eventos)
+
+    def persistir(self, reservas: List[Reserva]) -> bool:
+        # Com diário, os eventos já estão em disco: só compacta quando ele passa do limite
+        if self.diario is None or self.diario.quantidade >= self.limite_compactacao:
+            self.compactar(reservas)
+            return True
+        return False
+
+    def compactar(self, reservas: List[Optional[Reserva]]):
+        if self._historico_adiado is not None and any(reserva is None for reserva in reservas):
+            # O histórico não carregado volta ao snapshot como estava, sem virar objeto
+            historico = dict(desempacotar(self._historico_adiado))
+            registros = [historico[posicao] if reserva is None else reserva.to_dict()
+                         for posicao, reserva in enumerate(reservas)]
+        else:
+            registros = [reserva.to_dict() for reserva in reservas]
+        # Sem mensagem aqui: a compactação pode rodar na thread do gravador, no meio de um input
+        salvar_registros(registros, self.arquivo_reservas)
+        self._cache.gravar(registros, self._status_imediatos)
+        if self.diario is not None:
+            self.diario.limpar()
+
+    @property
+    def arquivo_agregados(self) -> str:
+        return self.arquivo_reservas + ".agregados.json"
+
+    def _assinatura_snapshot(self) -> Optional[List[int]]:
+        try:
+            estado = os.stat(self.arquivo_reservas)
+        except OSError:
+            return None
+        return [estado.st_size, estado.st_mtime_ns]
+
+    def carregar_agregados(self) -> Optional[dict]:
+        # Os agregados valem para o snapshot com que foram gravados; o diário é reaplicado por cima
+        try:
+            with open(self.arquivo_agregados, "r", encoding="utf-8") as arquivo:
+                gravado = json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+        if gravado.get("snapshot") != self._assinatura_snapshot():
+            return None
+        return gravado["agregados"]
+
+    def salvar_agregados(self, dados: dict):
+        with gravacao_atomica(self.arquivo_agregados) as arquivo:
+            json.dump({"snapshot": self._assinatura_snapshot(), "agregados": dados}, arquivo)
+
+    def fechar(self):
+        if self.diario is not None:
+            self.diario.fechar()
+
+
+_ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS quartos (
+    numero INTEGER PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    capacidade INTEGER NOT NULL,
+    tarifa_base REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hospedes (
+    documento TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL,
+    telefone TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reservas (
+    id INTEGER PRIMARY KEY,
+    hospede_documento TEXT NOT NULL REFERENCES hospedes(documento),
+    quarto_numero INTEGER NOT NULL REFERENCES quartos(numero),
+    num_hospedes INTEGER NOT NULL,
+    origem TEXT NOT NULL,
+    data_entrada TEXT NOT NULL,
+    data_saida TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pagamentos (
+    reserva_id INTEGER NOT NULL REFERENCES reservas(id),
+    item INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    forma TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (reserva_id, item)
+);
+CREATE TABLE IF NOT EXISTS adicionais (
+    reserva_id INTEGER NOT NULL REFERENCES reservas(id),
+    item INTEGER NOT NULL,
+    descricao TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (reserva_id, item)
+);
+CREATE INDEX IF NOT EXISTS idx_reservas_quarto_datas ON reservas (quarto_numero, data_entrada, data_saida);
+CREATE INDEX IF NOT EXISTS idx_reservas_status ON reservas (status);
+CREATE INDEX IF NOT EXISTS idx_reservas_datas ON reservas (data_entrada, data_saida);
+CREATE TABLE IF NOT EXISTS metadados (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Banco SQLite (módulo sqlite3 da biblioteca padrão).
+
+    Cada evento vira uma transação curta (UPDATE/INSERT de uma linha), em modo WAL.
+    O 'id' da reserva é a sua posição na lista do repositório. Consultas por período
+    são filtradas no próprio SQL, sem materializar todas as reservas.
+    """
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute("PRAGMA foreign_keys=ON")
+        self.conexao.executescript(_ESQUEMA_SQLITE)
+
+    # --- Leitura ---
+
+    def carregar_quartos(self) -> List[Quarto]:
+        linhas = self.conexao.execute(
+            "SELECT numero, tipo, capacidade, tarifa_base, status FROM quartos ORDER BY numero"
+        ).fetchall()
+        return [Quarto.from_dict(dict(linha), confiavel=True) for linha in linhas]
+
+    def carregar_reservas(self, quartos_por_numero: Dict[int, Quarto]) -> List[Reserva]:
+        return self._consultar_reservas("", (), quartos_por_numero)
+
+    def carregar_reservas_adiado(self, quartos_por_numero: Dict[int, Quarto],
+                                 status_imediatos: Sequence[str]) -> CargaAdiada:
+        status = list(status_imediatos)
+        marcadores = ",".join("?" * len(status))
+        total = self.conexao.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM reservas").fetchone()[0]
+        hospedes: Dict = {}
+        imediatas = self._consultar_com_posicao(f"WHERE r.status IN ({marcadores})", status,
+                                                quartos_por_numero, hospedes)
+        if len(imediatas) == total:
+            return total, imediatas, None
+        return total, imediatas, lambda: self._consultar_com_posicao(
+            f"WHERE r.status NOT IN ({marcadores})", status, quartos_por_numero, hospedes)
+
+    def posicoes_no_periodo(self, data_inicio: date, data_fim: date,
+                            status: Optional[Iterable[str]] = None) -> List[int]:
+        """
+        Posições (ids) das reservas que têm noites em [data_inicio, data_fim) ou que entram
+        dentro do período (o mesmo recorte usado pelos relatórios), opcionalmente filtradas
+        por status. Quem chama resolve as posições nos seus próprios objetos.
+        """
+        condicao = "WHERE data_entrada <= ? AND data_saida > ?"
+        parametros = [data_fim.isoformat(), data_inicio.isoformat()]
+        if status:
+            status = list(status)
+            condicao += f" AND status IN ({','.join('?' * len(status))})"
+            parametros.extend(status)
+        linhas = self.conexao.execute(f"SELECT id FROM reservas {condicao} ORDER BY id", parametros).fetchall()
+        return [linha[0] for linha in linhas]
+
+    def _consultar_reservas(self, condicao: str, parametros, quartos_por_numero: Dict[int, Quarto]) -> List[Reserva]:
+        return [reserva for _, reserva in self._consultar_com_posicao(condicao, parametros, quartos_por_numero)]
+
+    def _consultar_com_posicao(self, condicao: str, parametros, quartos_por_numero: Dict[int, Quarto],
+                               hospedes: Optional[Dict] = None) -> List[Tuple[int, Reserva]]:
+        linhas = self.conexao.execute(
+            "SELECT r.*, h.nome, h.email, h.telefone FROM reservas r "
+            "JOIN hospedes h ON h.documento = r.hospede_documento "
+            f"{condicao} ORDER BY r.id", parametros
+        ).fetchall()
+        if not linhas:
+            return []
+
+        # Sem filtro, os itens de todas as reservas são lidos direto da tabela
+        ids = [linha["id"] for linha in linhas] if condicao else None
+        pagamentos = self._itens_por_reserva("pagamentos", "data, forma, valor", ids)
+        adicionais = self._itens_por_reserva("adicionais", "descricao, valor", ids)
+
+        reservas = []
+        hospedes = {} if hospedes is None else hospedes
+        for linha in linhas:
+            dados = {
+                "hospede": {"nome": linha["nome"], "documento": linha["hospede_documento"],
+                            "email": linha["email"], "telefone": linha["telefone"]},
+                "quarto_numero": linha["quarto_numero"],
+                "num_hospedes": linha["num_hospedes"],
+                "origem": linha["origem"],
+                "data_entrada": linha["data_entrada"],
+                "data_saida": linha["data_saida"],
+                "status": linha["status"],
+                "pagamentos": pagamentos.get(linha["id"], []),
+                "adicionais": adicionais.get(linha["id"], []),
+            }
+            reservas.append((linha["id"], Reserva.from_dict(dados, quartos_por_numero, hospedes, confiavel=True)))
+        return reservas
+
+    def _itens_por_reserva(self, tabela: str, colunas: str, ids: Optional[List[int]]) -> Dict[int, List[dict]]:
+        # Uma consulta por tabela (e não uma por reserva)
+        if ids is None:
+            linhas = self.conexao.execute(
+                f"SELECT reserva_id, {colunas} FROM {tabela} ORDER BY reserva_id, item"
+            ).fetchall()
+        else:
+            # A tabela temporária evita o limite de parâmetros do SQLite em "IN (...)"
+            with self.conexao:
+                self.conexao.execute("CREATE TEMP TABLE IF NOT EXISTS _ids (id INTEGER PRIMARY KEY)")
+                self.conexao.execute("DELETE FROM _ids")
+                self.conexao.executemany("INSERT INTO _ids (id) VALUES (?)", ((i,) for i in ids))
+            linhas = self.conexao.execute(
+                f"SELECT reserva_id, {colunas} FROM {tabela} WHERE reserva_id IN (SELECT id FROM _ids) "
+                f"ORDER BY reserva_id, item"
+            ).fetchall()
+
+        itens: Dict[int, List[dict]] = {}
+        for linha in linhas:
+            dados = dict(linha)
+            itens.setdefault(dados.pop("reserva_id"), []).append(dados)
+        return itens
+
+    # --- Escrita ---
+
+    def salvar_quartos(self, quartos: Iterable[Quarto]):
+        with self.conexao:
+            self.conexao.executemany(
+                "INSERT INTO quartos (numero, tipo, capacidade, tarifa_base, status) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (numero) DO UPDATE SET tipo = excluded.tipo, capacidade = excluded.capacidade, "
+                "tarifa_base = excluded.tarifa_base, status = excluded.status",
+                ((q.numero, q.tipo, q.capacidade, q.tarifa_base, q.status) for q in quartos)
+            )
+
+    def registrar(self, evento: dict):
+        with self.conexao:
+            self._aplicar(evento)
+            self._contar_alteracao()
+
+    def registrar_varios(self, eventos: List[dict]):
+        # Uma transação para o grupo inteiro
+        with self.conexao:
+            for evento in eventos:
+                self._aplicar(evento)
+            self._contar_alteracao()
+
+    def _contar_alteracao(self):
+        # Contador de alterações: diz se os agregados gravados ainda correspondem ao banco
+        self.conexao.execute(
+            "INSERT INTO metadados (chave, valor) VALUES ('alteracoes', '1') "
+            "ON CONFLICT (chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1"
+        )
+
+    def _ler_metadado(self, chave: str) -> Optional[str]:
+        linha = self.conexao.execute("SELECT valor FROM metadados WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha is not None else None
+
+    def carregar_agregados(self) -> Optional[dict]:
+        gravado = self._ler_metadado("agregados")
+        if gravado is None:
+            return None
+        gravado = json.loads(gravado)
+        if gravado["alteracoes"] != self._ler_metadado("alteracoes"):
+            return None
+        return gravado["agregados"]
+
+    def salvar_agregados(self, dados: dict):
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT INTO metadados (chave, valor) VALUES ('agregados', ?) "
+                "ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor",
+                (json.dumps({"alteracoes": self._ler_metadado("alteracoes"), "agregados": dados}),)
+            )
+
+    def _aplicar(self, evento: dict):
+        tipo = evento["evento"]
+        posicao = evento["posicao"]
+        if tipo == "reserva":
+            self._inserir_reserva(posicao, evento["dados"])
+        elif tipo == "status":
+            self.conexao.execute("UPDATE reservas SET status = ? WHERE id = ?", (evento["status"], posicao))
+        elif tipo == "datas":
+            self.conexao.execute("UPDATE reservas SET data_entrada = ?, data_saida = ? WHERE id = ?",
+                                 (evento["data_entrada"], evento["data_saida"], posicao))
+        elif tipo == "pagamento":
+            self._inserir_pagamento(posicao, evento["item"], evento["dados"])
+        elif tipo == "adicional":
+            self._inserir_adicional(posicao, evento["item"], evento["dados"])
+
+    def _inserir_reserva(self, posicao: int, dados: dict):
+        hospede = dados["hospede"]
+        self.conexao.execute(
+            "INSERT INTO hospedes (documento, nome, email, telefone) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (documento) DO UPDATE SET nome = excluded.nome, email = excluded.email, "
+            "telefone = excluded.telefone",
+            (hospede["documento"], hospede["nome"], hospede["email"], hospede["telefone"])
+        )
+        self.conexao.execute(
+            "INSERT INTO reservas (id, hospede_documento, quarto_numero, num_hospedes, origem, "
+            "data_entrada, data_saida, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET hospede_documento = excluded.hospede_documento, "
+            "quarto_numero = excluded.quarto_numero, num_hospedes = excluded.num_hospedes, "
+            "origem = excluded.origem, data_entrada = excluded.data_entrada, "
+            "data_saida = excluded.data_saida, status = excluded.status",
+            (posicao, hospede["documento"], dados["quarto_numero"], dados["num_hospedes"], dados["origem"],
+             dados["data_entrada"], dados["data_saida"], dados["status"])
+        )
+        for item, pagamento in enumerate(dados["pagamentos"]):
+            self._inserir_pagamento(posicao, item, pagamento)
+        for item, adicional in enumerate(dados["adicionais"]):
+            self._inserir_adicional(posicao, item, adicional)
+
+    def _inserir_pagamento(self, posicao: int, item: int, dados: dict):
+        self.conexao.execute(
+            "INSERT OR IGNORE INTO pagamentos (reserva_id, item, data, forma, valor) VALUES (?, ?, ?, ?, ?)",
+            (posicao, item, dados["data"], dados["forma"], dados["valor"])
+        )
+
+    def _inserir_adicional(self, posicao: int, item: int, dados: dict):
+        self.conexao.execute(
+            "INSERT OR IGNORE INTO adicionais (reserva_id, item, descricao, valor) VALUES (?, ?, ?, ?)",
+            (posicao, item, dados["descricao"], dados["valor"])
+        )
+
+    def persistir(self, reservas: List[Reserva]) -> bool:
+        # Cada evento já está no banco: o estado gravado está sempre consolidado, e os
+        # agregados gravados agora valem até a próxima alteração (contador em metadados)
+        return True
+
+    def compactar(self, reservas: List[Reserva]):
+        # Cada ação já foi gravada na sua transação: só consolida o WAL no arquivo principal
+        self.conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def importar(self, reservas: List[Reserva]):
+        """Regrava todas as reservas em uma única transação (migração a partir do JSON)."""
+        with self.conexao:
+            self.conexao.execute("DELETE FROM pagamentos")
+            self.conexao.execute("DELETE FROM adicionais")
+            self.conexao.execute("DELETE FROM reservas")
+            for posicao, reserva in enumerate(reservas):
+                self._inserir_reserva(posicao, reserva.to_dict())
+            self._contar_alteracao()
+
+    def esta_vazio(self) -> bool:
+        return self.conexao.execute("SELECT COUNT(*) FROM quartos").fetchone()[0] == 0
+
+    def fechar(self):
+        self.conexao.close()
+
+
+def abrir_armazenamento(arquivo_quartos: str = ARQUIVO_QUARTOS, arquivo_reservas: str = ARQUIVO_RESERVAS,
+                        arquivo_diario: Optional[str] = ARQUIVO_DIARIO) -> Armazenamento:
+    """
+    Usa o banco SQLite se 'banco_dados' estiver definido no settings.json;
+    caso contrário, os arquivos JSON com diário.
+    """
+    banco = carregar_configuracoes().get("banco_dados")
+    if not banco:
+        return ArmazenamentoJSON(arquivo_quartos, arquivo_reservas, arquivo_diario)
+
+    armazenamento = ArmazenamentoSQLite(banco)
+    if armazenamento.esta_vazio() and os.path.exists(arquivo_quartos):
+        # Primeira execução com banco: migra os arquivos JSON existentes
+        from roomex.repositorio import Repositorio  # o repositório importa este módulo
+        print(f"Migrando dados JSON para {banco}...")
+        legado = Repositorio.abrir(ArmazenamentoJSON(arquivo_quartos, arquivo_reservas, arquivo_diario))
+        armazenamento.salvar_quartos(legado.quartos)
+        armazenamento.importar(legado.reservas)
+        legado.fechar()
+    return armazenamento
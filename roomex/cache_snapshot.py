@@ -0,0 +1,78 @@
+import os
+import pickle
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Cache binário (pickle) do arquivo de reservas, para a partida a quente não interpretar JSON.
+# Os registros ficam separados em dois grupos: os "imediatos" (reservas vivas, montadas na
+# abertura) e o histórico, guardado como um segundo pickle dentro do primeiro, de modo que
+# abrir o cache não decodifica o histórico: ele só é lido quando alguém precisa dele.
+# O cache vale enquanto o arquivo de origem tiver o mesmo tamanho e data de modificação.
+# É um arquivo local gerado pelo próprio sistema (pickle não deve ler arquivos de terceiros).
+
+FORMATO_CACHE = 1
+
+# (posição no arquivo de reservas, registro)
+Registros = List[Tuple[int, dict]]
+
+class CacheSnapshot:
+    def __init__(self, arquivo_fonte: str):
+        self.arquivo_fonte = arquivo_fonte
+        self.caminho = arquivo_fonte + ".cache"
+
+    def _assinatura_fonte(self) -> Optional[List[int]]:
+        try:
+            estado = os.stat(self.arquivo_fonte)
+        except OSError:
+            return None
+        return [estado.st_size, estado.st_mtime_ns]
+
+    def ler(self, status_imediatos: Sequence[str]) -> Optional[Tuple[int, Registros, bytes]]:
+        """
+        Retorna (total de registros, registros imediatos, histórico empacotado),
+        ou None se o cache não existe ou não corresponde mais ao arquivo de origem.
+        """
+        assinatura = self._assinatura_fonte()
+        if assinatura is None:
+            return None
+        try:
+            with open(self.caminho, "rb") as arquivo:
+                gravado = pickle.load(arquivo)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if (not isinstance(gravado, dict) or gravado.get("formato") != FORMATO_CACHE
+                or gravado.get("fonte") != assinatura or gravado.get("status") != list(status_imediatos)):
+            return None
+        return gravado["total"], gravado["imediatos"], gravado["historico"]
+
+    def gravar(self, registros: Iterable[dict], status_imediatos: Sequence[str]) -> Tuple[int, Registros, bytes]:
+        """
+        Separa os registros (na ordem do arquivo de origem) e grava o cache correspondente
+        ao estado atual desse arquivo. Retorna o mesmo que ler().
+        """
+        status_imediatos = list(status_imediatos)
+        imediatos: Registros = []
+        historico: Registros = []
+        total = 0
+        for posicao, registro in enumerate(registros):
+            (imediatos if registro["status"] in status_imediatos else historico).append((posicao, registro))
+            total += 1
+        empacotado = empacotar(historico)
+
+        assinatura = self._assinatura_fonte()
+        if assinatura is not None:
+            temporario = self.caminho + ".tmp"
+            try:
+                with open(temporario, "wb") as arquivo:
+                    pickle.dump({"formato": FORMATO_CACHE, "fonte": assinatura, "status": status_imediatos,
+                                 "total": total, "imediatos": imediatos, "historico": empacotado},
+                                arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporario, self.caminho)
+            except OSError:
+                pass  # sem cache a próxima partida só fica mais lenta
+        return total, imediatos, empacotado
+
+def empacotar(registros: Registros) -> bytes:
+    return pickle.dumps(registros, protocol=pickle.HIGHEST_PROTOCOL)
+
+def desempacotar(empacotado: bytes) -> Registros:
+    return pickle.loads(empacotado)
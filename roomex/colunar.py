@@ -0,0 +1,202 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+from roomex.models import Quarto, Reserva
+from roomex.precos import cotar_lote_centavos, valor_total_centavos
+from roomex.dinheiro import dividir_centavos, para_centavos, para_reais
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele o ReservaStore não está disponível
+    np = None
+
+# Status que não geram receita nem ocupação (mesma regra de reports.calcular_metricas_financeiras)
+STATUS_SEM_RECEITA = ("CANCELADA", "NO_SHOW", "PENDENTE")
+
+
+class ReservaStore:
+    """
+    Reservas em formato colunar: um array NumPy por campo, todos na mesma ordem
+    (ordenados pela data de entrada).
+
+    Colunas: quarto, entrada, saida (ordinais de data), status, origem (códigos inteiros),
+    num_hospedes, total (valor total cotado) e pago (soma dos pagamentos), valores em centavos.
+    Os relatórios sobre o store são operações vetorizadas, sem laço Python por reserva.
+
+    Filtros por período (janela) e por status (com_status) devolvem views: os arrays são
+    fatias dos originais e o filtro de status é só uma máscara booleana aplicada nos relatórios.
+    """
+    COLUNAS = ("quarto", "entrada", "saida", "status", "origem", "num_hospedes", "total", "pago")
+
+    def __init__(self, colunas: Dict[str, "np.ndarray"], status: List[str], origens: List[str],
+                 max_noites: int, mascara: Optional["np.ndarray"] = None):
+        if np is None:
+            raise ImportError("O ReservaStore precisa do NumPy (pip install numpy).")
+        for nome in self.COLUNAS:
+            setattr(self, nome, colunas[nome])
+        # Tabelas de códigos: status[codigo] -> texto (idem para origens)
+        self.nomes_status = status
+        self.nomes_origem = origens
+        # Maior estadia do store: limita quanto antes do período uma reserva pode começar
+        self.max_noites = max_noites
+        # Seleção das linhas visíveis nesta view (None = todas)
+        self._mascara = mascara
+
+    def __len__(self) -> int:
+        if self._mascara is None:
+            return len(self.entrada)
+        return int(np.count_nonzero(self._mascara))
+
+    def selecionadas(self) -> "np.ndarray":
+        """Máscara booleana das linhas visíveis nesta view."""
+        if self._mascara is None:
+            return np.ones(len(self.entrada), dtype=bool)
+        return self._mascara
+
+    # --- Construção ---
+
+    @classmethod
+    def de_reservas(cls, reservas: Iterable[Reserva]) -> 'ReservaStore':
+        """Monta o store a partir de objetos Reserva (os totais saem de cotar_lote_centavos)."""
+        reservas = list(reservas)
+        totais = cotar_lote_centavos(reservas)
+        linhas = (
+            (r.quarto.numero, r.data_entrada.toordinal(), r.data_saida.toordinal(), r.status, r.origem,
+             r.num_hospedes, total, r.total_pago_centavos())
+            for r, total in zip(reservas, totais)
+        )
+        return cls._de_linhas(linhas)
+
+    @classmethod
+    def de_registros(cls, registros: Iterable[dict], quartos_por_numero: Dict[int, Quarto]) -> 'ReservaStore':
+        """
+        Monta o store direto dos dicionários gravados (ex: dados.iterar_registros ou o backend),
+        sem criar nenhum objeto Reserva.
+        """
+        def linhas():
+            for dados in registros:
+                quarto = quartos_por_numero.get(dados["quarto_numero"])
+                if quarto is None:
+                    raise ValueError(f"Quarto {dados['quarto_numero']} não encontrado.")
+                entrada = date.fromisoformat(dados["data_entrada"])
+                saida = date.fromisoformat(dados["data_saida"])
+                total_adicionais = sum(para_centavos(a["valor"]) for a in dados["adicionais"])
+                yield (quarto.numero, entrada.toordinal(), saida.toordinal(), dados["status"], dados["origem"],
+                       dados["num_hospedes"],
+                       valor_total_centavos(quarto.tarifa_centavos, entrada, saida, total_adicionais),
+                       sum(para_centavos(p["valor"]) for p in dados["pagamentos"]))
+        return cls._de_linhas(linhas())
+
+    @classmethod
+    def _de_linhas(cls, linhas) -> 'ReservaStore':
+        if np is None:
+            raise ImportError("O ReservaStore precisa do NumPy (pip install numpy).")
+        codigos_status: Dict[str, int] = {}
+        codigos_origem: Dict[str, int] = {}
+        valores = {nome: [] for nome in cls.COLUNAS}
+        for quarto, entrada, saida, status, origem, num_hospedes, total, pago in linhas:
+            valores["quarto"].append(quarto)
+            valores["entrada"].append(entrada)
+            valores["saida"].append(saida)
+            valores["status"].append(codigos_status.setdefault(status, len(codigos_status)))
+            valores["origem"].append(codigos_origem.setdefault(origem, len(codigos_origem)))
+            valores["num_hospedes"].append(num_hospedes)
+            valores["total"].append(total)
+            valores["pago"].append(pago)
+
+        tipos = {"quarto": np.int32, "entrada": np.int32, "saida": np.int32, "status": np.int8,
+                 "origem": np.int16, "num_hospedes": np.int16, "total": np.int64, "pago": np.int64}
+        colunas = {nome: np.asarray(valores[nome], dtype=tipos[nome]) for nome in cls.COLUNAS}
+
+        # Ordena tudo pela entrada: janelas de datas viram fatias contíguas (sem cópia)
+        ordem = np.argsort(colunas["entrada"], kind="stable")
+        colunas = {nome: coluna[ordem] for nome, coluna in colunas.items()}
+        noites = colunas["saida"] - colunas["entrada"]
+        max_noites = int(noites.max()) if len(noites) else 0
+        return cls(colunas, list(codigos_status), list(codigos_origem), max_noites)
+
+    # --- Filtros ---
+
+    def _fatia(self, inicio: int, fim: int) -> 'ReservaStore':
+        # Fatias de arrays NumPy são views: nenhum dado é copiado
+        colunas = {nome: getattr(self, nome)[inicio:fim] for nome in self.COLUNAS}
+        mascara = self._mascara[inicio:fim] if self._mascara is not None else None
+        return ReservaStore(colunas, self.nomes_status, self.nomes_origem, self.max_noites, mascara)
+
+    def janela(self, data_inicio: date, data_fim: date) -> 'ReservaStore':
+        """
+        View (sem cópia) com as reservas que podem tocar [data_inicio, data_fim]:
+        entrada até data_fim e a partir de data_inicio - max_noites.
+        É um superconjunto; os relatórios aplicam o recorte exato por cima.
+        """
+        inicio = np.searchsorted(self.entrada, data_inicio.toordinal() - self.max_noites, side="left")
+        fim = np.searchsorted(self.entrada, data_fim.toordinal(), side="right")
+        return self._fatia(int(inicio), int(fim))
+
+    def codigo_status(self, status: str) -> int:
+        """Código do status no store (-1 se não houver nenhuma reserva com ele)."""
+        return self.nomes_status.index(status) if status in self.nomes_status else -1
+
+    def mascara_status(self, *status: str) -> "np.ndarray":
+        codigos = [self.codigo_status(s) for s in status]
+        return np.isin(self.status, codigos)
+
+    def com_status(self, *status: str) -> 'ReservaStore':
+        """View com as reservas de um dos status informados (as colunas não são copiadas)."""
+        mascara = self.mascara_status(*status)
+        if self._mascara is not None:
+            mascara &= self._mascara
+        colunas = {nome: getattr(self, nome) for nome in self.COLUNAS}
+        return ReservaStore(colunas, self.nomes_status, self.nomes_origem, self.max_noites, mascara)
+
+    def copiar(self) -> 'ReservaStore':
+        """Materializa a view num store compacto (só as linhas selecionadas)."""
+        mascara = self.selecionadas()
+        colunas = {nome: getattr(self, nome)[mascara].copy() for nome in self.COLUNAS}
+        return ReservaStore(colunas, self.nomes_status, self.nomes_origem, self.max_noites)
+
+    # --- Relatórios vetorizados ---
+
+    def dias_interseccao(self, data_inicio: date, data_fim: date) -> "np.ndarray":
+        """Noites de cada reserva dentro de [data_inicio, data_fim) (0 se não houver)."""
+        inicio = np.maximum(self.entrada, data_inicio.toordinal())
+        fim = np.minimum(self.saida, data_fim.toordinal())
+        return np.maximum(fim - inicio, 0)
+
+    def metricas_financeiras(self, data_inicio: date, data_fim: date, total_quartos: int) -> Dict[str, float]:
+        """Mesmo resultado de reports.calcular_metricas_financeiras, em operações sobre arrays."""
+        dias_no_periodo = (data_fim - data_inicio).days
+        if total_quartos <= 0 or dias_no_periodo <= 0:
+            return {"ocupacao": 0.0, "adr": 0.0, "revpar": 0.0, "receita_total": 0.0}
+
+        janela = self.janela(data_inicio, data_fim)
+        interseccao = janela.dias_interseccao(data_inicio, data_fim)
+        validas = janela.selecionadas() & ~janela.mascara_status(*STATUS_SEM_RECEITA) & (interseccao > 0)
+
+        noites = (janela.saida - janela.entrada)[validas]
+        dias = interseccao[validas]
+        dias_ocupados_total = int(dias.sum())
+        # Mesma divisão inteira de dinheiro.dividir_centavos, aplicada a todas as reservas de uma vez
+        receita_periodo = int(np.sum((2 * janela.total[validas] * dias + noites) // (2 * noites)))
+
+        total_dias_disponiveis_hotel = total_quartos * dias_no_periodo
+        taxa_ocupacao = (dias_ocupados_total / total_dias_disponiveis_hotel) * 100
+        adr = dividir_centavos(receita_periodo, 1, dias_ocupados_total) if dias_ocupados_total > 0 else 0
+        revpar = dividir_centavos(receita_periodo, 1, total_dias_disponiveis_hotel)
+        return {
+            "ocupacao": round(taxa_ocupacao, 2),
+            "adr": para_reais(adr),
+            "revpar": para_reais(revpar),
+            "receita_total": para_reais(receita_periodo)
+        }
+
+    def cancelamentos(self, data_inicio: date, data_fim: date) -> Dict[str, int]:
+        """Mesmo resultado de reports.relatorio_cancelamentos."""
+        janela = self.janela(data_inicio, data_fim)
+        no_periodo = janela.selecionadas() & ((janela.dias_interseccao(data_inicio, data_fim) > 0)
+                                              | ((janela.entrada >= data_inicio.toordinal()) & (janela.entrada <= data_fim.toordinal())))
+        stats = {
+            "CANCELADA": int(np.count_nonzero(no_periodo & janela.mascara_status("CANCELADA"))),
+            "NO_SHOW": int(np.count_nonzero(no_periodo & janela.mascara_status("NO_SHOW"))),
+        }
+        stats["TOTAL"] = stats["CANCELADA"] + stats["NO_SHOW"]
+        return stats
@@ -1,59 +1,432 @@
+import contextlib
 import json
 import os
-from typing import List, Type, Any
+import re
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+from roomex.instrumentacao import contar, medir
 
-def salvar_dados(lista_objetos: List[Any], nome_arquivo: str):
+EXTENSOES_SQLITE = (".db", ".sqlite", ".sqlite3")
+EXTENSOES_JSONL = (".jsonl",)
+
+def _eh_sqlite(nome_arquivo: str) -> bool:
+    return str(nome_arquivo).lower().endswith(EXTENSOES_SQLITE)
+
+def _eh_jsonl(nome_arquivo: str) -> bool:
+    return str(nome_arquivo).lower().endswith(EXTENSOES_JSONL)
+
+@contextlib.contextmanager
+def gravacao_atomica(nome_arquivo: str, modo: str = "w", **opcoes):
+    """
+    Abre um arquivo temporário ao lado de 'nome_arquivo' para escrita; ao sair sem erro,
+    força os dados em disco (fsync) e troca o arquivo de uma vez (os.replace).
+    Uma queda no meio da gravação deixa o arquivo anterior intacto. No POSIX a pasta
+    também passa por fsync, para a troca de nome não se perder numa queda logo depois.
+    """
+    if "b" not in modo:
+        opcoes.setdefault("encoding", "utf-8")
+    temporario = f"{nome_arquivo}.tmp"
+    try:
+        with open(temporario, modo, **opcoes) as arquivo:
+            yield arquivo
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, nome_arquivo)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporario)
+        raise
+    if os.name == "posix":
+        _sincronizar_pasta(os.path.dirname(os.path.abspath(nome_arquivo)))
+
+def _sincronizar_pasta(pasta: str):
+    # Alguns sistemas de arquivos não aceitam fsync em pastas: a troca já foi feita, segue sem ele
+    with contextlib.suppress(OSError):
+        descritor = os.open(pasta, os.O_RDONLY)
+        try:
+            os.fsync(descritor)
+        finally:
+            os.close(descritor)
+
+@medir("dados.salvar_dados")
+def salvar_dados(lista_objetos: List[Any], nome_arquivo: str, indice: bool = False):
     """
     Salva uma lista de objetos em um arquivo JSON.
+    Se o arquivo for um banco SQLite (.db/.sqlite), grava nas tabelas correspondentes.
+    Se for .jsonl, grava um registro compacto por linha (com índice de posições opcional).
     """
-    # 1. Converte cada objeto da lista em dicionário
-    lista_dicts = [obj.to_dict() for obj in lista_objetos]
-    
-    # 2. Abre o arquivo e grava
-    with open(nome_arquivo, "w", encoding="utf-8") as arquivo:
-        json.dump(lista_dicts, arquivo, indent=4, ensure_ascii=False)
-    
+    if _eh_sqlite(nome_arquivo):
+        _salvar_sqlite(lista_objetos, nome_arquivo)
+        return
+
+    # Converte cada objeto da lista em dicionário e grava
+    salvar_registros((obj.to_dict() for obj in lista_objetos), nome_arquivo, indice)
     print(f"Dados salvos com sucesso em {nome_arquivo}")
 
-def carregar_dados(nome_arquivo: str, classe_tipo: Type, lista_quartos: List = None) -> List[Any]:
+def salvar_registros(registros: Iterable[dict], nome_arquivo: str, indice: bool = False):
+    """
+    Grava dicionários já prontos (como os de to_dict) em .json ou .jsonl, sem mensagem.
+    A gravação é atômica: quem lê (ou uma queda) vê o arquivo antigo ou o novo, nunca um pela metade.
+    """
+    if _eh_jsonl(nome_arquivo):
+        _gravar_jsonl(registros, nome_arquivo, "wb", indice)
+        return
+    with gravacao_atomica(nome_arquivo) as arquivo:
+        json.dump(list(registros), arquivo, indent=4, ensure_ascii=False)
+
+@medir("dados.carregar_dados")
+def carregar_dados(nome_arquivo: str, classe_tipo: Type, lista_quartos: Union[List, Dict] = None) -> List[Any]:
     """
     Carrega dados de um JSON e converte de volta para objetos.
     
     Args:
         nome_arquivo: Caminho do arquivo JSON.
         classe_tipo: A Classe que deve ser recriada (ex: Quarto, Hospede).
-        lista_quartos: (Apenas para Reservas) Lista de quartos existentes para vincular.
+        lista_quartos: (Apenas para Reservas) Quartos existentes para vincular,
+            em lista ou em dicionário número -> Quarto.
     """
+    if _eh_jsonl(nome_arquivo):
+        _converter_se_necessario(nome_arquivo)
+
     if not os.path.exists(nome_arquivo):
         return []
 
+    if _eh_sqlite(nome_arquivo):
+        return _carregar_sqlite(nome_arquivo, classe_tipo, lista_quartos)
+
+    return list(iterar_dados(nome_arquivo, classe_tipo, lista_quartos))
+
+def ler_registros(nome_arquivo: str) -> List[dict]:
+    """Dicionários gravados num .json/.jsonl (lista vazia se o arquivo não existe), sem montar objetos."""
+    if _eh_jsonl(nome_arquivo):
+        _converter_se_necessario(nome_arquivo)
+    if not os.path.exists(nome_arquivo):
+        return []
+    return list(iterar_registros(nome_arquivo))
+
+def iterar_dados(nome_arquivo: str, classe_tipo: Type, lista_quartos: Union[List, Dict] = None) -> Iterator[Any]:
+    """
+    Versão em fluxo de carregar_dados: devolve os objetos um a um, lendo o arquivo aos poucos.
+    Aceita o array JSON tradicional ou um arquivo JSON Lines (.jsonl, um registro por linha),
+    então a memória usada não depende do tamanho do arquivo.
+    """
+    if not os.path.exists(nome_arquivo):
+        return
+
+    # Índice por número montado uma única vez (e não uma busca linear por reserva)
+    eh_reserva = classe_tipo.__name__ == "Reserva"
+    if eh_reserva and not isinstance(lista_quartos, dict):
+        lista_quartos = {q.numero: q for q in (lista_quartos or [])}
+    # Hóspedes recorrentes (mesmo documento) compartilham uma única instância
+    hospedes = {}
+
+    # Os arquivos foram gravados pelo próprio sistema: montagem direta, sem revalidar (confiavel=True)
+    for dados in iterar_registros(nome_arquivo):
+        # Se for Reserva, precisa passar os quartos
+        if eh_reserva:
+            yield classe_tipo.from_dict(dados, lista_quartos, hospedes, confiavel=True)
+        else:
+            yield classe_tipo.from_dict(dados, confiavel=True)
+
+def iterar_registros(nome_arquivo: str, tamanho_bloco: int = 1 << 16) -> Iterator[dict]:
+    """
+    Percorre os dicionários gravados no arquivo sem carregá-lo inteiro.
+    """
     with open(nome_arquivo, "r", encoding="utf-8") as arquivo:
-        lista_dicts = json.load(arquivo)
-    
-    objetos = []
-    for dados in lista_dicts:
-        # Se for Reserva, precisa passar a lista de quartos
-        if classe_tipo.__name__ == "Reserva":
-            obj = classe_tipo.from_dict(dados, lista_quartos)
+        if _eh_jsonl(nome_arquivo):
+            for linha in arquivo:
+                if linha.strip():
+                    yield json.loads(linha)
         else:
-            obj = classe_tipo.from_dict(dados)
-        objetos.append(obj)
-        
-    return objetos
+            yield from _iterar_array_json(arquivo, tamanho_bloco)
 
-def carregar_configuracoes() -> dict:
+_ESPACOS = re.compile(r"\s*")
+_SEPARADORES = re.compile(r"[\s,]*")
+
+def _iterar_array_json(arquivo, tamanho_bloco: int) -> Iterator[dict]:
     """
-    Lê o arquivo settings.json da raiz do projeto.
+    Lê um array JSON de objetos em blocos, decodificando um elemento por vez.
     """
-    caminho_config = "settings.json"
-    
+    decodificador = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    fim_arquivo = False
+    dentro_do_array = False
+
+    while True:
+        # 1. Pula espaços e vírgulas entre os elementos
+        pos = (_SEPARADORES if dentro_do_array else _ESPACOS).match(buffer, pos).end()
+
+        if pos < len(buffer):
+            if not dentro_do_array:
+                if buffer[pos] != "[":
+                    raise ValueError(f"O arquivo {arquivo.name} não contém uma lista JSON.")
+                dentro_do_array = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+
+            # 2. Tenta decodificar o próximo elemento; se ele ainda não chegou inteiro, lê mais
+            try:
+                objeto, fim = decodificador.raw_decode(buffer, pos)
+                if fim < len(buffer) or fim_arquivo:
+                    yield objeto
+                    pos = fim
+                    continue
+            except json.JSONDecodeError:
+                if fim_arquivo:
+                    raise
+
+        if fim_arquivo:
+            if not dentro_do_array:
+                return  # arquivo vazio
+            raise ValueError(f"Lista JSON incompleta em {arquivo.name}.")
+
+        # 3. Descarta o que já foi consumido e acrescenta o próximo bloco
+        bloco = arquivo.read(tamanho_bloco)
+        if not bloco:
+            fim_arquivo = True
+        buffer = buffer[pos:] + bloco
+        pos = 0
+
+# --- JSON Lines (.jsonl) ---
+# Um registro por linha, sem indentação. O índice opcional ("<arquivo>.idx") guarda,
+# em inteiros de 8 bytes, a posição (byte) de início de cada linha mais o tamanho
+# final do arquivo, o que permite ler o registro N direto e dividir o arquivo em blocos.
+
+def caminho_indice(nome_arquivo: str) -> str:
+    return nome_arquivo + ".idx"
+
+def _gravar_jsonl(registros: Iterable[dict], nome_arquivo: str, modo: str, indice: bool):
+    posicoes = array("Q")
+    # Regravação completa vai por um temporário; o acréscimo ("ab") escreve no próprio arquivo
+    with (gravacao_atomica(nome_arquivo, modo) if modo == "wb" else open(nome_arquivo, modo)) as arquivo:
+        posicao = arquivo.seek(0, os.SEEK_END)
+        for registro in registros:
+            linha = (json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            posicoes.append(posicao)
+            arquivo.write(linha)
+            posicao += len(linha)
+    posicoes.append(posicao)
+
+    arquivo_indice = caminho_indice(nome_arquivo)
+    if modo == "ab" and os.path.exists(arquivo_indice):
+        indice_atual = _ler_indice(nome_arquivo, tamanho_esperado=posicoes[0])
+        if indice_atual is not None:
+            # Junta o índice antigo (sem a marca de fim) com as novas posições
+            posicoes = indice_atual[:-1] + posicoes
+            indice = True
+    if indice:
+        with gravacao_atomica(arquivo_indice, "wb") as arquivo:
+            posicoes.tofile(arquivo)
+    elif os.path.exists(arquivo_indice):
+        os.remove(arquivo_indice)  # um índice desatualizado é pior que nenhum
+
+def _ler_indice(nome_arquivo: str, tamanho_esperado: Optional[int] = None) -> Optional[array]:
+    """
+    Lê o índice de posições; devolve None se ele não existir ou não bater com o arquivo.
+    """
+    arquivo_indice = caminho_indice(nome_arquivo)
+    if not os.path.exists(arquivo_indice):
+        return None
+    posicoes = array("Q")
+    with open(arquivo_indice, "rb") as arquivo:
+        posicoes.frombytes(arquivo.read())
+    if tamanho_esperado is None:
+        tamanho_esperado = os.path.getsize(nome_arquivo)
+    if not posicoes or posicoes[-1] != tamanho_esperado:
+        return None
+    return posicoes
+
+def indexar_jsonl(nome_arquivo: str) -> array:
+    """(Re)cria o índice de posições de um arquivo .jsonl existente."""
+    posicoes = array("Q")
+    with open(nome_arquivo, "rb") as arquivo:
+        posicao = 0
+        for linha in arquivo:
+            if linha.strip():
+                posicoes.append(posicao)
+            posicao += len(linha)
+    posicoes.append(posicao)
+    with open(caminho_indice(nome_arquivo), "wb") as arquivo:
+        posicoes.tofile(arquivo)
+    return posicoes
+
+def anexar_dados(lista_objetos: Iterable[Any], nome_arquivo: str):
+    """Acrescenta objetos ao fim de um arquivo .jsonl sem reescrever o que já existe."""
+    if not _eh_jsonl(nome_arquivo):
+        raise ValueError("Só é possível anexar registros a arquivos .jsonl.")
+    _gravar_jsonl((obj.to_dict() for obj in lista_objetos), nome_arquivo, "ab", indice=False)
+
+def contar_registros(nome_arquivo: str) -> int:
+    posicoes = _ler_indice(nome_arquivo) or indexar_jsonl(nome_arquivo)
+    return len(posicoes) - 1
+
+def ler_registro(nome_arquivo: str, numero: int) -> dict:
+    """
+    Lê o registro de número 'numero' (a partir de 0) de um .jsonl com acesso direto pelo índice.
+    """
+    posicoes = _ler_indice(nome_arquivo) or indexar_jsonl(nome_arquivo)
+    if not 0 <= numero < len(posicoes) - 1:
+        raise IndexError(f"Registro {numero} não existe em {nome_arquivo}.")
+    with open(nome_arquivo, "rb") as arquivo:
+        arquivo.seek(posicoes[numero])
+        return json.loads(arquivo.readline())
+
+def dividir_em_blocos(nome_arquivo: str, partes: int) -> List[Tuple[int, int]]:
+    """
+    Divide um .jsonl em até 'partes' intervalos de bytes [inicio, fim) que começam e
+    terminam em limites de linha, para leitura em paralelo com iterar_intervalo.
+    """
+    posicoes = _ler_indice(nome_arquivo) or indexar_jsonl(nome_arquivo)
+    total = len(posicoes) - 1
+    if total == 0:
+        return []
+    partes = max(1, min(partes, total))
+    limites = [posicoes[(total * i) // partes] for i in range(partes)] + [posicoes[-1]]
+    return [(limites[i], limites[i + 1]) for i in range(partes)]
+
+def iterar_intervalo(nome_arquivo: str, inicio: int, fim: int) -> Iterator[dict]:
+    """Decodifica os registros de um intervalo de bytes de um .jsonl."""
+    with open(nome_arquivo, "rb") as arquivo:
+        arquivo.seek(inicio)
+        while arquivo.tell() < fim:
+            linha = arquivo.readline()
+            if not linha:
+                break
+            if linha.strip():
+                yield json.loads(linha)
+
+def converter_para_jsonl(arquivo_json: str, arquivo_jsonl: str, indice: bool = True):
+    """Converte um array JSON (formato antigo) em JSON Lines, em fluxo."""
+    _gravar_jsonl(iterar_registros(arquivo_json), arquivo_jsonl, "wb", indice)
+
+def _converter_se_necessario(arquivo_jsonl: str):
+    # Se só existe a versão .json antiga do arquivo, ela é convertida automaticamente
+    arquivo_json = arquivo_jsonl[:-len(".jsonl")] + ".json"
+    if not os.path.exists(arquivo_jsonl) and os.path.exists(arquivo_json):
+        print(f"Convertendo {arquivo_json} para {arquivo_jsonl}...")
+        converter_para_jsonl(arquivo_json, arquivo_jsonl)
+
+def _salvar_sqlite(lista_objetos: List[Any], nome_arquivo: str):
+    # Import local: o backend SQLite depende de models, que depende deste módulo
+    from roomex.armazenamento import ArmazenamentoSQLite
+
+    if not lista_objetos:
+        return
+    banco = ArmazenamentoSQLite(nome_arquivo)
+    try:
+        tipo = type(lista_objetos[0]).__name__
+        if tipo == "Quarto":
+            banco.salvar_quartos(lista_objetos)
+        elif tipo == "Reserva":
+            banco.importar(lista_objetos)
+        else:
+            raise ValueError(f"O banco SQLite não armazena objetos do tipo {tipo}.")
+    finally:
+        banco.fechar()
+    print(f"Dados salvos com sucesso em {nome_arquivo}")
+
+def _carregar_sqlite(nome_arquivo: str, classe_tipo: Type, lista_quartos) -> List[Any]:
+    from roomex.armazenamento import ArmazenamentoSQLite
+
+    banco = ArmazenamentoSQLite(nome_arquivo)
+    try:
+        if classe_tipo.__name__ == "Quarto":
+            return banco.carregar_quartos()
+        if classe_tipo.__name__ == "Reserva":
+            if not isinstance(lista_quartos, dict):
+                lista_quartos = {q.numero: q for q in (lista_quartos or [])}
+            return banco.carregar_reservas(lista_quartos)
+        raise ValueError(f"O banco SQLite não armazena objetos do tipo {classe_tipo.__name__}.")
+    finally:
+        banco.fechar()
+
+CAMINHO_CONFIG = "settings.json"
+CONFIG_PADRAO = {"multiplicador_fim_de_semana": 1.0, "temporadas": []}
+
+# Cache do processo: evita abrir e interpretar o settings.json a cada diária calculada.
+# A chave "mtime" indica a versão do arquivo que está em memória.
+_cache_config = {"mtime": None, "config": None, "temporadas": [], "versao": 0}
+
+def _converter_dia_mes(texto: str) -> int:
+    """Converte 'DD-MM' em um inteiro MMDD (ex: '25-12' vira 1225) para comparação rápida."""
+    dia, mes = map(int, texto.split('-'))
+    return mes * 100 + dia
+
+def _compilar_temporadas(config: dict) -> list:
+    """
+    Pré-processa a lista de temporadas em tuplas (inicio, fim, multiplicador),
+    com inicio/fim já convertidos para MMDD.
+    """
+    compiladas = []
+    for temporada in config.get("temporadas", []):
+        compiladas.append((
+            _converter_dia_mes(temporada["inicio"]),
+            _converter_dia_mes(temporada["fim"]),
+            temporada["multiplicador"]
+        ))
+    return compiladas
+
+def _ler_arquivo_config() -> dict:
     # Se o arquivo não existir, retorna uma configuração padrão de segurança
-    if not os.path.exists(caminho_config):
-        return {"multiplicador_fim_de_semana": 1.0, "temporadas": []}
+    if not os.path.exists(CAMINHO_CONFIG):
+        return dict(CONFIG_PADRAO)
 
     try:
-        with open(caminho_config, "r", encoding="utf-8") as arquivo:
+        with open(CAMINHO_CONFIG, "r", encoding="utf-8") as arquivo:
             return json.load(arquivo)
     except Exception as e:
         print(f"Erro ao ler configurações: {e}")
-        return {"multiplicador_fim_de_semana": 1.0, "temporadas": []}
\ No newline at end of file
+        return dict(CONFIG_PADRAO)
+
+def _mtime_config():
+    try:
+        return os.stat(CAMINHO_CONFIG).st_mtime_ns
+    except OSError:
+        return None
+
+def recarregar_configuracoes() -> dict:
+    """
+    Força a releitura do settings.json e recompila as temporadas.
+    """
+    contar("dados.configuracoes_relidas")
+    # A data vem antes da leitura: se o arquivo mudar entre as duas, a próxima consulta
+    # vê uma data diferente e relê, em vez de guardar o conteúdo antigo sob a data nova
+    mtime = _mtime_config()
+    config = _ler_arquivo_config()
+    _cache_config["mtime"] = mtime
+    _cache_config["config"] = config
+    _cache_config["temporadas"] = _compilar_temporadas(config)
+    _cache_config["versao"] += 1
+    return config
+
+@medir("dados.carregar_configuracoes")
+def carregar_configuracoes() -> dict:
+    """
+    Retorna as configurações do settings.json da raiz do projeto.
+    O arquivo só é relido quando sua data de modificação muda.
+    """
+    if _cache_config["config"] is None or _mtime_config() != _cache_config["mtime"]:
+        return recarregar_configuracoes()
+    return _cache_config["config"]
+
+def obter_temporadas() -> list:
+    """
+    Retorna as temporadas já compiladas como tuplas (inicio_mmdd, fim_mmdd, multiplicador).
+    """
+    carregar_configuracoes()
+    return _cache_config["temporadas"]
+
+def assinatura_configuracoes() -> Optional[int]:
+    """
+    Identifica o conteúdo atual do settings.json entre execuções (data de modificação),
+    para validar dados derivados dele que foram gravados em disco.
+    """
+    return _mtime_config()
+
+def versao_configuracoes() -> int:
+    """Número que muda sempre que o settings.json é recarregado."""
+    carregar_configuracoes()
+    return _cache_config["versao"]
@@ -0,0 +1,74 @@
+import json
+import os
+from typing import Iterator, List
+
+class Diario:
+    """
+    Diário (journal) de eventos, só de acréscimo, em JSON Lines.
+
+    Cada ação do sistema grava uma linha curta no fim do arquivo (com fsync),
+    então o custo por ação não depende do tamanho do histórico. De tempos em
+    tempos o repositório grava um snapshot completo e o diário é esvaziado.
+    """
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = None
+        self.quantidade = self._contar_linhas()
+
+    def _contar_linhas(self) -> int:
+        if not os.path.exists(self.caminho):
+            return 0
+        with open(self.caminho, "rb") as arquivo:
+            return sum(1 for linha in arquivo if linha.strip())
+
+    def registrar(self, evento: dict):
+        """Acrescenta um evento ao diário e força a gravação em disco."""
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._arquivo.write(json.dumps(evento, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self.quantidade += 1
+
+    def registrar_varios(self, eventos: List[dict]):
+        """Acrescenta vários eventos com uma única gravação e um único fsync."""
+        if not eventos:
+            return
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._arquivo.write("".join(json.dumps(evento, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                    for evento in eventos))
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self.quantidade += len(eventos)
+
+    def ler(self) -> Iterator[dict]:
+        """
+        Percorre os eventos gravados, em ordem.
+        Uma última linha incompleta (queda no meio da gravação) é ignorada.
+        """
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, "r", encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    print(f"⚠️  Evento incompleto ignorado em {self.caminho}.")
+                    return
+
+    def limpar(self):
+        """Esvazia o diário (depois que um snapshot foi gravado)."""
+        self.fechar()
+        with open(self.caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        self.quantidade = 0
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
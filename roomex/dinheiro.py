@@ -0,0 +1,20 @@
+from typing import Union
+
+# Valores monetários circulam internamente em centavos (int): somas e comparações
+# ficam exatas e sem round() espalhado. Reais (float) só aparecem nas bordas:
+# entrada do usuário, JSON e exibição.
+
+def para_centavos(valor: Union[int, float]) -> int:
+    """Converte um valor em reais (ex: 12.9) para centavos (1290)."""
+    return round(valor * 100)
+
+def para_reais(centavos: int) -> float:
+    """Converte centavos para reais (float com no máximo duas casas)."""
+    return centavos / 100
+
+def dividir_centavos(centavos: int, parte: int, total: int) -> int:
+    """
+    Fração parte/total de um valor em centavos, arredondada ao centavo mais próximo
+    (meio centavo arredonda para cima). Só aritmética inteira: resultado exato.
+    """
+    return (2 * centavos * parte + total) // (2 * total)
@@ -0,0 +1,340 @@
+import random
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from roomex.models import Quarto, Reserva
+from roomex.precos import soma_fatores
+from roomex.dinheiro import para_reais
+
+# Status que ocupam o quarto no período da reserva
+STATUS_OCUPANTES = ("PENDENTE", "CONFIRMADA", "ATIVA")
+
+class _No:
+    """Nó da árvore de uma agenda: um intervalo [entrada, saida) e a maior saída da subárvore."""
+    __slots__ = ("chave", "entrada", "saida", "reserva", "prioridade", "esquerda", "direita", "maximo")
+
+    def __init__(self, chave: Tuple[int, int], saida: int, reserva: Reserva):
+        self.chave = chave
+        self.entrada = chave[0]
+        self.saida = saida
+        self.reserva = reserva
+        self.prioridade = random.random()
+        self.esquerda: Optional["_No"] = None
+        self.direita: Optional["_No"] = None
+        self.maximo = saida
+
+    def atualizar(self):
+        maximo = self.saida
+        if self.esquerda is not None and self.esquerda.maximo > maximo:
+            maximo = self.esquerda.maximo
+        if self.direita is not None and self.direita.maximo > maximo:
+            maximo = self.direita.maximo
+        self.maximo = maximo
+
+
+def _dividir(no: Optional[_No], chave: Tuple[int, int]) -> Tuple[Optional[_No], Optional[_No]]:
+    """Separa a árvore em (chaves < 'chave', chaves >= 'chave')."""
+    if no is None:
+        return None, None
+    if no.chave < chave:
+        no.direita, maiores = _dividir(no.direita, chave)
+        no.atualizar()
+        return no, maiores
+    menores, no.esquerda = _dividir(no.esquerda, chave)
+    no.atualizar()
+    return menores, no
+
+def _juntar(menores: Optional[_No], maiores: Optional[_No]) -> Optional[_No]:
+    """Junta duas árvores em que todas as chaves de 'menores' vêm antes das de 'maiores'."""
+    if menores is None:
+        return maiores
+    if maiores is None:
+        return menores
+    if menores.prioridade > maiores.prioridade:
+        menores.direita = _juntar(menores.direita, maiores)
+        menores.atualizar()
+        return menores
+    maiores.esquerda = _juntar(menores, maiores.esquerda)
+    maiores.atualizar()
+    return maiores
+
+
+class _AgendaQuarto:
+    """
+    Intervalos [entrada, saida) de um quarto numa treap ordenada por (entrada, ordem de chegada),
+    com a maior saída de cada subárvore. Inserir, remover e saber se um período está ocupado
+    custam O(log n) esperado. A maior saída mantém a busca certa mesmo se houver sobreposição
+    no quarto (dados antigos carregados sem verificação, por exemplo).
+    """
+    def __init__(self):
+        self._raiz: Optional[_No] = None
+        # id(reserva) -> chave do seu nó
+        self._chaves: Dict[int, Tuple[int, int]] = {}
+        self._chegadas = 0
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    def inserir(self, entrada: int, saida: int, reserva: Reserva):
+        self._chegadas += 1
+        chave = (entrada, self._chegadas)
+        self._chaves[id(reserva)] = chave
+        menores, maiores = _dividir(self._raiz, chave)
+        self._raiz = _juntar(_juntar(menores, _No(chave, saida, reserva)), maiores)
+
+    def remover(self, entrada: int, reserva: Reserva) -> bool:
+        chave = self._chaves.get(id(reserva))
+        if chave is None or chave[0] != entrada:
+            return False
+        del self._chaves[id(reserva)]
+        menores, resto = _dividir(self._raiz, chave)
+        _, maiores = _dividir(resto, (chave[0], chave[1] + 1))
+        self._raiz = _juntar(menores, maiores)
+        return True
+
+    def reservas(self) -> List[Reserva]:
+        """Reservas em ordem de entrada (e de chegada, no empate)."""
+        resultado: List[Reserva] = []
+        pilha: List[_No] = []
+        no = self._raiz
+        while pilha or no is not None:
+            while no is not None:
+                pilha.append(no)
+                no = no.esquerda
+            no = pilha.pop()
+            resultado.append(no.reserva)
+            no = no.direita
+        return resultado
+
+    def ocupado(self, entrada: int, saida: int) -> bool:
+        """Algum intervalo ocupa noite de [entrada, saida)? (um caminho da raiz)"""
+        no = self._raiz
+        while no is not None:
+            if no.entrada >= saida:
+                no = no.esquerda
+            elif no.saida > entrada:
+                return True
+            else:
+                # O nó e toda a subárvore esquerda começam antes de 'saida'
+                esquerda = no.esquerda
+                if esquerda is not None and esquerda.maximo > entrada:
+                    return True
+                no = no.direita
+        return False
+
+    def conflito(self, entrada: int, saida: int, ignorar: Optional[Reserva] = None) -> Optional[Reserva]:
+        """
+        Retorna a reserva que ocupa alguma noite de [entrada, saida), ou None; havendo
+        várias, a de entrada mais tardia. Subárvores cuja maior saída não passa de
+        'entrada' são puladas sem visita.
+        """
+        return self._conflito(self._raiz, entrada, saida, ignorar)
+
+    def _conflito(self, no: Optional[_No], entrada: int, saida: int,
+                  ignorar: Optional[Reserva]) -> Optional[Reserva]:
+        while no is not None and no.maximo > entrada:
+            if no.entrada >= saida:
+                no = no.esquerda
+                continue
+            achada = self._conflito(no.direita, entrada, saida, ignorar)
+            if achada is not None:
+                return achada
+            if no.saida > entrada and no.reserva is not ignorar:
+                return no.reserva
+            no = no.esquerda
+        return None
+
+
+class IndiceDisponibilidade:
+    """
+    Índice de ocupação por número de quarto.
+    Mantém apenas as reservas vivas (PENDENTE/CONFIRMADA/ATIVA) e responde com uma busca
+    binária por quarto se um período está livre. Fica sincronizado com as reservas observando
+    suas mudanças de status e de datas, e recusa (ValueError) mudanças que criariam overbooking.
+    Os quartos registrados (registrar_quarto) ficam num catálogo por tipo e capacidade,
+    usado por quartos_livres para nem olhar a agenda dos quartos que não servem.
+    """
+    def __init__(self, reservas: Iterable[Reserva] = ()):
+        self._agendas: Dict[int, _AgendaQuarto] = {}
+        # tipo (maiúsculo) -> (capacidades negadas em ordem crescente, [(quarto, agenda)] na mesma ordem)
+        self._catalogo: Dict[str, Tuple[List[int], List[Tuple[Quarto, _AgendaQuarto]]]] = {}
+        self._tipo_no_catalogo: Dict[int, str] = {}
+        # Com False, mudanças de datas/status não são verificadas (reaplicação do diário)
+        self.verificar_mudancas = True
+        # Um único "bound method" compartilhado por todas as reservas observadas
+        self._observador = self._ao_mudar_reserva
+        for reserva in reservas:
+            self.adicionar(reserva, verificar=False)
+
+    def _agenda(self, numero_quarto: int) -> _AgendaQuarto:
+        agenda = self._agendas.get(numero_quarto)
+        if agenda is None:
+            agenda = _AgendaQuarto()
+            self._agendas[numero_quarto] = agenda
+        return agenda
+
+    def registrar_quarto(self, quarto: Quarto):
+        """
+        Inclui o quarto no catálogo de quartos_livres. Tipo e capacidade valem como estavam
+        no registro: se mudarem, registre o quarto de novo.
+        """
+        self.remover_quarto(quarto.numero)
+        tipo = quarto.tipo.upper()
+        self._tipo_no_catalogo[quarto.numero] = tipo
+        capacidades, quartos = self._catalogo.setdefault(tipo, ([], []))
+        # Capacidade decrescente e, no empate, número crescente
+        pos = bisect_right(capacidades, -quarto.capacidade)
+        while pos > 0 and capacidades[pos - 1] == -quarto.capacidade and quartos[pos - 1][0].numero > quarto.numero:
+            pos -= 1
+        capacidades.insert(pos, -quarto.capacidade)
+        quartos.insert(pos, (quarto, self._agenda(quarto.numero)))
+
+    def remover_quarto(self, numero_quarto: int):
+        """Tira o quarto do catálogo (as reservas dele continuam no índice)."""
+        tipo = self._tipo_no_catalogo.pop(numero_quarto, None)
+        if tipo is None:
+            return
+        capacidades, quartos = self._catalogo[tipo]
+        for pos, (quarto, _) in enumerate(quartos):
+            if quarto.numero == numero_quarto:
+                del capacidades[pos]
+                del quartos[pos]
+                return
+
+    def adicionar(self, reserva: Reserva, verificar: bool = True):
+        """
+        Passa a acompanhar a reserva. Com verificar=True, recusa (ValueError) reservas
+        vivas que conflitam com outra já existente no mesmo quarto (overbooking).
+        """
+        if reserva.status in STATUS_OCUPANTES:
+            if verificar:
+                self.verificar_disponibilidade(reserva.quarto.numero, reserva.data_entrada, reserva.data_saida)
+            self._inserir(reserva, reserva.data_entrada, reserva.data_saida)
+        reserva.registrar_observador(self._observador)
+
+    def remover(self, reserva: Reserva):
+        """Deixa de acompanhar a reserva."""
+        reserva.remover_observador(self._observador)
+        self._retirar(reserva, reserva.data_entrada)
+
+    def _inserir(self, reserva: Reserva, entrada: date, saida: date):
+        self._agenda(reserva.quarto.numero).inserir(entrada.toordinal(), saida.toordinal(), reserva)
+
+    def _retirar(self, reserva: Reserva, entrada: date):
+        agenda = self._agendas.get(reserva.quarto.numero)
+        if agenda is not None:
+            agenda.remover(entrada.toordinal(), reserva)
+
+    def _ao_mudar_reserva(self, reserva: Reserva, evento: str, **detalhes):
+        if evento == "validar":
+            # Mudança ainda não aplicada: recusa a que traria a reserva de volta, ou a
+            # levaria para outras datas, por cima de outra reserva viva do quarto
+            if self.verificar_mudancas and detalhes["status"] in STATUS_OCUPANTES:
+                self.verificar_disponibilidade(reserva.quarto.numero, detalhes["data_entrada"],
+                                               detalhes["data_saida"], ignorar=reserva)
+        elif evento == "status":
+            estava_viva = detalhes["anterior"] in STATUS_OCUPANTES
+            esta_viva = reserva.status in STATUS_OCUPANTES
+            if estava_viva and not esta_viva:
+                self._retirar(reserva, reserva.data_entrada)
+            elif esta_viva and not estava_viva:
+                self._inserir(reserva, reserva.data_entrada, reserva.data_saida)
+        elif evento == "datas" and reserva.status in STATUS_OCUPANTES:
+            self._retirar(reserva, detalhes["entrada_anterior"])
+            self._inserir(reserva, reserva.data_entrada, reserva.data_saida)
+
+    def reservas_do_quarto(self, numero_quarto: int) -> List[Reserva]:
+        """Reservas vivas do quarto, em ordem de data de entrada."""
+        agenda = self._agendas.get(numero_quarto)
+        return agenda.reservas() if agenda is not None else []
+
+    def conflito(self, numero_quarto: int, data_entrada: date, data_saida: date,
+                 ignorar: Optional[Reserva] = None) -> Optional[Reserva]:
+        """Retorna a reserva viva que ocupa o quarto no período, ou None."""
+        agenda = self._agendas.get(numero_quarto)
+        if agenda is None:
+            return None
+        return agenda.conflito(data_entrada.toordinal(), data_saida.toordinal(), ignorar)
+
+    def esta_livre(self, numero_quarto: int, data_entrada: date, data_saida: date,
+                   ignorar: Optional[Reserva] = None) -> bool:
+        """Verifica se o quarto está livre em [data_entrada, data_saida)."""
+        return self.conflito(numero_quarto, data_entrada, data_saida, ignorar) is None
+
+    def quartos_livres(self, data_entrada: date, data_saida: date, num_hospedes: int = 1,
+                       tipo: Optional[str] = None) -> List[Quarto]:
+        """
+        Quartos registrados livres em [data_entrada, data_saida) que comportam 'num_hospedes'
+        (e são do 'tipo', se informado), em ordem de tipo, capacidade decrescente e número.
+        Tipo e capacidade cortam o catálogo por busca binária: só os quartos que servem
+        têm a agenda consultada.
+        """
+        entrada = data_entrada.toordinal()
+        saida = data_saida.toordinal()
+        if tipo:
+            grupo = self._catalogo.get(tipo.upper())
+            grupos = [grupo] if grupo is not None else []
+        else:
+            grupos = self._catalogo.values()
+
+        livres = []
+        for capacidades, quartos in grupos:
+            for quarto, agenda in quartos[:bisect_right(capacidades, -num_hospedes)]:
+                # Mesma conta de _AgendaQuarto.ocupado, sem chamada de método (laço quente)
+                no = agenda._raiz
+                while no is not None:
+                    if no.entrada >= saida:
+                        no = no.esquerda
+                    elif no.saida > entrada or (no.esquerda is not None and no.esquerda.maximo > entrada):
+                        break
+                    else:
+                        no = no.direita
+                else:
+                    livres.append(quarto)
+        return livres
+
+    def verificar_disponibilidade(self, numero_quarto: int, data_entrada: date, data_saida: date,
+                                  ignorar: Optional[Reserva] = None):
+        """Levanta ValueError se o período já estiver ocupado no quarto."""
+        existente = self.conflito(numero_quarto, data_entrada, data_saida, ignorar)
+        if existente is not None:
+            raise ValueError(
+                f"O quarto {numero_quarto} já está reservado de "
+                f"{existente.data_entrada.strftime('%d/%m/%Y')} a {existente.data_saida.strftime('%d/%m/%Y')}."
+            )
+
+
+def buscar_quartos_disponiveis(quartos: Optional[Iterable[Quarto]], indice: IndiceDisponibilidade,
+                               data_entrada: date, data_saida: date, num_hospedes: int = 1,
+                               tipo: Optional[str] = None) -> List[Tuple[Quarto, float]]:
+    """
+    Lista os quartos livres em [data_entrada, data_saida) que comportam 'num_hospedes'
+    (e, opcionalmente, do 'tipo' informado), junto com o valor cotado da estadia.
+
+    Com quartos=None a busca usa o catálogo do índice (IndiceDisponibilidade.quartos_livres),
+    que descarta por tipo e capacidade sem percorrer todos os quartos; com uma lista, só ela
+    é considerada. O fator de preço do período é calculado uma única vez e cada tarifa
+    distinta é cotada uma vez só.
+    """
+    if data_saida <= data_entrada:
+        raise ValueError("A data de saída deve ser posterior à data de entrada.")
+
+    if quartos is None:
+        livres = indice.quartos_livres(data_entrada, data_saida, num_hospedes, tipo)
+    else:
+        tipo_procurado = tipo.upper() if tipo else None
+        livres = [quarto for quarto in quartos
+                  if quarto.capacidade >= num_hospedes
+                  and (not tipo_procurado or quarto.tipo.upper() == tipo_procurado)
+                  and indice.esta_livre(quarto.numero, data_entrada, data_saida)]
+
+    fator_periodo = soma_fatores(data_entrada, data_saida)
+    valores: Dict[int, float] = {}
+    resultado = []
+    for quarto in livres:
+        tarifa = quarto.tarifa_centavos
+        valor = valores.get(tarifa)
+        if valor is None:
+            valor = valores[tarifa] = para_reais(round(tarifa * fator_periodo))
+        resultado.append((quarto, valor))
+    return resultado
@@ -0,0 +1,117 @@
+import atexit
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+# Gravação em segundo plano: a ação do menu só avisa que há algo a gravar (marcar) e
+# volta ao operador; uma thread faz a gravação depois de um curto intervalo sem novos
+# avisos, juntando vários avisos seguidos em uma única gravação. O intervalo é limitado
+# (atraso_maximo): avisos contínuos não adiam a gravação para sempre.
+# Quem altera o estado que é gravado segura a 'trava' durante a mudança (nunca enquanto
+# espera o operador), para a gravação nunca ver uma mudança pela metade. O que estiver
+# pendente é gravado ao parar (e na saída do processo).
+# Falhas da thread não são impressas no meio de um prompt: ficam guardadas até quem
+# chama retirá-las (retirar_erros); as que sobrarem ao parar vão para o stderr.
+
+ATRASO_PADRAO = 0.5
+ATRASO_MAXIMO_PADRAO = 2.0
+
+class GravadorEmSegundoPlano:
+    def __init__(self, gravar: Callable[[], None], atraso: float = ATRASO_PADRAO,
+                 atraso_maximo: float = ATRASO_MAXIMO_PADRAO):
+        if atraso < 0:
+            raise ValueError("O atraso da gravação não pode ser negativo.")
+        self._gravar = gravar
+        self.atraso = atraso
+        self.atraso_maximo = max(atraso, atraso_maximo)
+        self.trava = threading.RLock()
+        self.gravacoes = 0
+        self.ultimo_erro: Optional[BaseException] = None
+        self._erros: List[BaseException] = []
+        self._condicao = threading.Condition()
+        # Instante (time.monotonic) do primeiro e do último aviso ainda não gravados
+        self._primeiro_aviso: Optional[float] = None
+        self._ultimo_aviso: Optional[float] = None
+        self._parando = False
+        self._thread = threading.Thread(target=self._executar, name="roomex-gravacao", daemon=True)
+        self._thread.start()
+        atexit.register(self.parar)
+
+    @property
+    def pendente(self) -> bool:
+        with self._condicao:
+            return self._primeiro_aviso is not None
+
+    def marcar(self):
+        """Avisa que o estado mudou; a gravação acontece depois do intervalo de espera."""
+        with self._condicao:
+            if self._parando:
+                raise ValueError("O gravador já foi parado.")
+            agora = time.monotonic()
+            if self._primeiro_aviso is None:
+                self._primeiro_aviso = agora
+            self._ultimo_aviso = agora
+            self._condicao.notify()
+
+    def retirar_erros(self) -> List[BaseException]:
+        """Falhas da gravação em segundo plano desde a última chamada (a lista é esvaziada)."""
+        with self._condicao:
+            erros, self._erros = self._erros, []
+        return erros
+
+    def descarregar(self):
+        """Grava agora, na thread de quem chama, o que estiver pendente (erros são propagados)."""
+        self._gravar_pendente(propagar=True)
+
+    def parar(self):
+        """Encerra a thread e grava o que estiver pendente. Pode ser chamado mais de uma vez."""
+        with self._condicao:
+            self._parando = True
+            self._condicao.notify()
+        self._thread.join()
+        atexit.unregister(self.parar)
+        self._gravar_pendente(propagar=False)
+        for erro in self.retirar_erros():
+            print(f"❌ Falha na gravação em segundo plano: {erro}", file=sys.stderr)
+
+    def _prazo(self) -> float:
+        return min(self._ultimo_aviso + self.atraso, self._primeiro_aviso + self.atraso_maximo)
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                while not self._parando:
+                    if self._primeiro_aviso is None:
+                        self._condicao.wait()
+                        continue
+                    espera = self._prazo() - time.monotonic()
+                    if espera <= 0:
+                        break
+                    self._condicao.wait(espera)
+                if self._parando:
+                    return
+            self._gravar_pendente(propagar=False)
+
+    def _gravar_pendente(self, propagar: bool):
+        with self.trava:
+            with self._condicao:
+                if self._primeiro_aviso is None:
+                    return
+                self._primeiro_aviso = self._ultimo_aviso = None
+            try:
+                self._gravar()
+            except Exception as erro:
+                self.ultimo_erro = erro
+                with self._condicao:
+                    # Continua pendente: a próxima gravação tenta de novo
+                    agora = time.monotonic()
+                    self._primeiro_aviso = self._primeiro_aviso or agora
+                    self._ultimo_aviso = agora
+                if propagar:
+                    raise
+                with self._condicao:
+                    self._erros.append(erro)
+                return
+            self.gravacoes += 1
+            self.ultimo_erro = None
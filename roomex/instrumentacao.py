@@ -0,0 +1,179 @@
+import atexit
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, List, Optional
+
+# Instrumentação dos caminhos quentes: contadores e cronômetros por operação.
+# Desligada, cada função medida custa só um teste de booleano a mais por chamada.
+# Liga pela variável de ambiente ROOMEX_INSTRUMENTACAO ("1", "tabela" ou "json") ou pela
+# chave "instrumentacao" do settings.json; o resumo é impresso (ou gravado) ao sair.
+# Este módulo não importa nada do roomex: models, dados e reports dependem dele.
+
+VARIAVEL_AMBIENTE = "ROOMEX_INSTRUMENTACAO"
+VARIAVEL_ARQUIVO = "ROOMEX_INSTRUMENTACAO_ARQUIVO"
+VARIAVEL_PERFIL = "ROOMEX_PERFILAR"
+FORMATOS = ("tabela", "json")
+
+_ativo = False
+_opcoes = {"formato": "tabela", "arquivo": None, "perfilar": None, "despejo_registrado": False}
+# operação -> [chamadas, segundos no total, segundos na chamada mais lenta]
+_medicoes: Dict[str, List[float]] = {}
+_contadores: Dict[str, int] = {}
+
+def ativo() -> bool:
+    return _ativo
+
+def ativar(formato: str = "tabela", arquivo: Optional[str] = None, despejar_ao_sair: bool = True):
+    """
+    Liga as medições. Com 'despejar_ao_sair', o resumo sai no fim do processo
+    (no stderr, ou no 'arquivo' informado).
+    """
+    global _ativo
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}. Use 'tabela' ou 'json'.")
+    _ativo = True
+    _opcoes["formato"] = formato
+    _opcoes["arquivo"] = arquivo
+    if despejar_ao_sair and not _opcoes["despejo_registrado"]:
+        atexit.register(_despejar_ao_sair)
+        _opcoes["despejo_registrado"] = True
+
+def desativar():
+    global _ativo
+    _ativo = False
+
+def zerar():
+    _medicoes.clear()
+    _contadores.clear()
+
+def _interpretar(valor) -> Optional[str]:
+    # "1"/"true"/True -> tabela; "json" -> json; "0"/""/False/None -> desligado
+    if isinstance(valor, bool) or valor is None:
+        return "tabela" if valor else None
+    texto = str(valor).strip().lower()
+    if texto in ("", "0", "false", "nao", "não"):
+        return None
+    return texto if texto in FORMATOS else "tabela"
+
+def configurar(config: Optional[dict] = None):
+    """
+    Aplica a configuração: a variável de ambiente tem prioridade sobre o settings.json
+    ("instrumentacao", "instrumentacao_arquivo" e "perfilar_acao").
+    """
+    config = config or {}
+    if VARIAVEL_AMBIENTE in os.environ:
+        formato = _interpretar(os.environ[VARIAVEL_AMBIENTE])
+    else:
+        formato = _interpretar(config.get("instrumentacao"))
+    if formato:
+        ativar(formato, os.environ.get(VARIAVEL_ARQUIVO) or config.get("instrumentacao_arquivo"))
+    perfilar = os.environ.get(VARIAVEL_PERFIL) or config.get("perfilar_acao")
+    _opcoes["perfilar"] = str(perfilar) if perfilar else None
+
+# --- Coleta ---
+
+def medir(nome: str):
+    """Decorador: conta as chamadas da função e acumula o tempo gasto nelas."""
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            inicio = perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                _registrar(nome, perf_counter() - inicio)
+        return medida
+    return decorar
+
+@contextmanager
+def cronometro(nome: str):
+    """Como medir, para um trecho de código (ex: uma ação do menu)."""
+    if not _ativo:
+        yield
+        return
+    inicio = perf_counter()
+    try:
+        yield
+    finally:
+        _registrar(nome, perf_counter() - inicio)
+
+def contar(nome: str, quantidade: int = 1):
+    if _ativo:
+        _contadores[nome] = _contadores.get(nome, 0) + quantidade
+
+def _registrar(nome: str, segundos: float):
+    medicao = _medicoes.get(nome)
+    if medicao is None:
+        _medicoes[nome] = [1, segundos, segundos]
+        return
+    medicao[0] += 1
+    medicao[1] += segundos
+    if segundos > medicao[2]:
+        medicao[2] = segundos
+
+# --- Perfil (cProfile) ---
+
+def perfilar_acao(acao: str) -> bool:
+    """Indica se a ação do menu foi escolhida para rodar sob o cProfile."""
+    return _opcoes["perfilar"] is not None and _opcoes["perfilar"] == acao
+
+@contextmanager
+def perfilar(rotulo: str, linhas: int = 25, saida=None):
+    """
+    Roda o trecho sob o cProfile e imprime as 'linhas' funções de maior tempo acumulado.
+    """
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(linhas)
+        print(f"\n--- Perfil: {rotulo} ---\n{texto.getvalue()}", file=saida or sys.stderr)
+
+# --- Resumo ---
+
+def resumo() -> dict:
+    """Medições e contadores coletados até agora, das operações mais caras para as mais baratas."""
+    operacoes = {}
+    for nome, (chamadas, total, maximo) in sorted(_medicoes.items(), key=lambda item: -item[1][1]):
+        operacoes[nome] = {"chamadas": int(chamadas), "total_s": total,
+                           "media_ms": total / chamadas * 1000, "max_ms": maximo * 1000}
+    return {"operacoes": operacoes, "contadores": dict(sorted(_contadores.items()))}
+
+def formatar_tabela(dados: Optional[dict] = None) -> str:
+    dados = dados or resumo()
+    linhas = ["--- ⏱️ Instrumentação Roomex ---",
+              f"{'operação':<40}{'chamadas':>10}{'total (s)':>12}{'média (ms)':>12}{'máx (ms)':>12}"]
+    for nome, medicao in dados["operacoes"].items():
+        linhas.append(f"{nome:<40}{medicao['chamadas']:>10}{medicao['total_s']:>12.4f}"
+                      f"{medicao['media_ms']:>12.4f}{medicao['max_ms']:>12.4f}")
+    for nome, valor in dados["contadores"].items():
+        linhas.append(f"{nome:<40}{valor:>10}")
+    return "\n".join(linhas)
+
+def despejar(formato: Optional[str] = None, arquivo: Optional[str] = None):
+    """Escreve o resumo em tabela ou JSON, no 'arquivo' informado ou no stderr."""
+    formato = formato or _opcoes["formato"]
+    texto = json.dumps(resumo(), indent=2, ensure_ascii=False) if formato == "json" else formatar_tabela()
+    if arquivo:
+        with open(arquivo, "w", encoding="utf-8") as destino:
+            destino.write(texto + "\n")
+    else:
+        print(texto, file=sys.stderr)
+
+def _despejar_ao_sair():
+    if _ativo and (_medicoes or _contadores):
+        despejar(arquivo=_opcoes["arquivo"])
+
+configurar()
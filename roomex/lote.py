@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import math
+import sys
+from datetime import date, datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from roomex.models import Hospede, Reserva
+from roomex.dados import carregar_configuracoes
+from roomex.repositorio import Repositorio
+from roomex.armazenamento import abrir_armazenamento
+
+# Modo lote: aplica um arquivo de operações (CSV ou JSON Lines) sem o menu interativo.
+# Cada linha é uma operação; uma linha com erro é relatada e as demais seguem.
+# Os eventos de cada lote vão ao backend de uma vez (Repositorio.agrupar_eventos) e o
+# estado é persistido ao fim de cada lote, em vez de a cada operação.
+#
+# Colunas (CSV com cabeçalho, ou chaves de cada objeto JSONL):
+#   operacao      criar | checkin | pagamento | adicional | cancelar | checkout
+#   quarto        número do quarto (todas as operações)
+#   data_entrada  criar; nas demais, opcional para escolher entre reservas do mesmo quarto
+#   data_saida, num_hospedes, nome, documento, email, telefone, origem   (criar)
+#   valor, forma, data      pagamento (forma padrão "Dinheiro", data padrão hoje)
+#   descricao, valor        adicional
+#   quitar, forma           checkout: com quitar=S, paga o saldo antes de encerrar
+# Datas em AAAA-MM-DD ou DD/MM/AAAA.
+
+# Reservas que as operações podem encontrar quando data_entrada não é informada
+STATUS_ALVO = ("PENDENTE", "CONFIRMADA", "ATIVA")
+
+class ErroLinha:
+    """Uma linha do arquivo que não pôde ser aplicada."""
+    __slots__ = ("linha", "operacao", "mensagem")
+
+    def __init__(self, linha: int, operacao: str, mensagem: str):
+        self.linha = linha
+        self.operacao = operacao
+        self.mensagem = mensagem
+
+    def __str__(self) -> str:
+        return f"Linha {self.linha} ({self.operacao or '?'}): {self.mensagem}"
+
+
+class ResultadoLote:
+    def __init__(self):
+        self.aplicadas = 0
+        self.erros: List[ErroLinha] = []
+        self.por_operacao: Dict[str, int] = {}
+
+    @property
+    def total(self) -> int:
+        return self.aplicadas + len(self.erros)
+
+    def resumo(self) -> str:
+        partes = ", ".join(f"{nome}: {quantidade}" for nome, quantidade in sorted(self.por_operacao.items()))
+        return f"{self.aplicadas} de {self.total} operações aplicadas ({partes or 'nenhuma'}), {len(self.erros)} com erro."
+
+
+# --- Leitura do arquivo ---
+
+def ler_operacoes(nome_arquivo: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Percorre as operações do arquivo como (número da linha, dicionário).
+    Campos vazios do CSV são omitidos. Uma linha JSONL inválida (ou que não seja um objeto)
+    vira um dicionário com "_erro".
+    """
+    with open(nome_arquivo, "r", encoding="utf-8-sig", newline="") as arquivo:
+        if nome_arquivo.lower().endswith(".jsonl"):
+            for numero, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    operacao = json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield numero, {"_erro": f"JSON inválido: {e.msg}"}
+                    continue
+                if not isinstance(operacao, dict):
+                    operacao = {"_erro": f"Esperado um objeto JSON, veio {type(operacao).__name__}."}
+                yield numero, operacao
+        else:
+            # Linha 1 é o cabeçalho
+            for numero, registro in enumerate(csv.DictReader(arquivo), start=2):
+                yield numero, {chave.strip(): valor.strip() for chave, valor in registro.items()
+                               if chave and valor is not None and valor.strip()}
+
+def _texto(operacao: dict, campo: str, padrao: Optional[str] = None) -> str:
+    valor = operacao.get(campo, padrao)
+    if valor is None or valor == "":
+        raise ValueError(f"Campo obrigatório ausente: {campo}.")
+    return str(valor)
+
+def _inteiro(operacao: dict, campo: str, padrao: Optional[int] = None) -> int:
+    texto = _texto(operacao, campo, padrao)
+    try:
+        return int(texto)
+    except ValueError:
+        raise ValueError(f"Número inválido em {campo}: {texto!r}.")
+
+def _valor(operacao: dict, campo: str = "valor") -> float:
+    texto = _texto(operacao, campo).replace(",", ".")
+    try:
+        valor = float(texto)
+    except ValueError:
+        raise ValueError(f"Valor inválido em {campo}: {operacao.get(campo)!r}.")
+    if not math.isfinite(valor):
+        raise ValueError(f"Valor inválido em {campo}: {operacao.get(campo)!r}.")
+    if valor <= 0:
+        raise ValueError(f"O campo {campo} deve ser positivo.")
+    return valor
+
+def _data(operacao: dict, campo: str, padrao: Optional[date] = None) -> date:
+    texto = operacao.get(campo)
+    if texto is None or texto == "":
+        if padrao is not None:
+            return padrao
+        raise ValueError(f"Campo obrigatório ausente: {campo}.")
+    for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(str(texto), formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida em {campo}: {texto!r} (use AAAA-MM-DD ou DD/MM/AAAA).")
+
+def _sim(operacao: dict, campo: str) -> bool:
+    return str(operacao.get(campo, "")).strip().lower() in ("s", "sim", "1", "true", "y", "yes")
+
+
+# --- Operações ---
+
+def _reserva_alvo(repo: Repositorio, operacao: dict) -> Reserva:
+    numero = _inteiro(operacao, "quarto")
+    if repo.buscar_quarto(numero) is None:
+        raise ValueError(f"Quarto {numero} não encontrado.")
+    if operacao.get("data_entrada"):
+        entrada = _data(operacao, "data_entrada")
+        for reserva in repo.indice.reservas_do_quarto(numero):
+            if reserva.data_entrada == entrada:
+                return reserva
+        raise ValueError(f"Nenhuma reserva em aberto no quarto {numero} com entrada em {entrada:%d/%m/%Y}.")
+    reserva = repo.buscar_reserva_por_quarto(numero, STATUS_ALVO)
+    if reserva is None:
+        raise ValueError(f"Nenhuma reserva em aberto no quarto {numero}.")
+    return reserva
+
+def _criar(repo: Repositorio, operacao: dict):
+    numero = _inteiro(operacao, "quarto")
+    quarto = repo.buscar_quarto(numero)
+    if quarto is None:
+        raise ValueError(f"Quarto {numero} não encontrado.")
+    hospede = Hospede(_texto(operacao, "nome"), _texto(operacao, "documento"),
+                      operacao.get("email", ""), operacao.get("telefone", ""))
+    reserva = Reserva(hospede, quarto, _inteiro(operacao, "num_hospedes", 1), operacao.get("origem", "Lote"),
+                      _data(operacao, "data_entrada"), _data(operacao, "data_saida"))
+    # Recusa overbooking antes de qualquer mudança no estado
+    repo.adicionar_reserva(reserva)
+
+def _checkin(repo: Repositorio, operacao: dict):
+    _reserva_alvo(repo, operacao).realizar_checkin()
+
+def _pagamento(repo: Repositorio, operacao: dict):
+    reserva = _reserva_alvo(repo, operacao)
+    reserva.adicionar_pagamento(_valor(operacao), operacao.get("forma", "Dinheiro"),
+                                _data(operacao, "data", date.today()))
+
+def _adicional(repo: Repositorio, operacao: dict):
+    reserva = _reserva_alvo(repo, operacao)
+    reserva.lancar_adicional(_texto(operacao, "descricao"), _valor(operacao))
+
+def _cancelar(repo: Repositorio, operacao: dict):
+    _reserva_alvo(repo, operacao).cancelar_reserva()
+
+def _checkout(repo: Repositorio, operacao: dict):
+    reserva = _reserva_alvo(repo, operacao)
+    # Valida antes de pagar: uma linha com erro não deixa pagamento lançado pela metade
+    if reserva.status != "ATIVA":
+        raise ValueError(f"Apenas reservas ATIVAS podem fazer check-out. Status: {reserva.status}")
+    if _sim(operacao, "quitar") and reserva.saldo_centavos > 0:
+        reserva.adicionar_pagamento(reserva.saldo, operacao.get("forma", "Dinheiro"), date.today())
+    reserva.realizar_checkout()
+
+OPERACOES: Dict[str, Callable[[Repositorio, dict], None]] = {
+    "criar": _criar,
+    "checkin": _checkin,
+    "pagamento": _pagamento,
+    "adicional": _adicional,
+    "cancelar": _cancelar,
+    "checkout": _checkout,
+}
+
+# Nomes aceitos além dos oficiais (feeds externos costumam vir em inglês)
+SINONIMOS = {
+    "create": "criar", "nova": "criar", "check-in": "checkin", "check_in": "checkin",
+    "pay": "pagamento", "payment": "pagamento", "extra": "adicional", "consumo": "adicional",
+    "cancel": "cancelar", "check-out": "checkout", "check_out": "checkout",
+}
+
+def aplicar_operacao(repo: Repositorio, operacao: dict) -> str:
+    """Aplica uma operação sobre o repositório e retorna seu nome oficial (ValueError se inválida)."""
+    if not isinstance(operacao, dict):
+        raise ValueError(f"Operação inválida: {operacao!r}.")
+    if "_erro" in operacao:
+        raise ValueError(operacao["_erro"])
+    nome = str(operacao.get("operacao", "")).strip().lower()
+    nome = SINONIMOS.get(nome, nome)
+    funcao = OPERACOES.get(nome)
+    if funcao is None:
+        raise ValueError(f"Operação desconhecida: {operacao.get('operacao')!r}.")
+    funcao(repo, operacao)
+    return nome
+
+
+# --- Execução ---
+
+def executar_lote(repo: Repositorio, operacoes: Iterable[Tuple[int, dict]], tamanho_lote: int = 0,
+                  ao_errar: Optional[Callable[[ErroLinha], None]] = None) -> ResultadoLote:
+    """
+    Aplica as operações ((linha, dicionário), como as de ler_operacoes) em ordem.
+    A cada 'tamanho_lote' linhas (0: só no fim) os eventos acumulados são gravados
+    de uma vez e o estado é persistido. Erros de uma linha não interrompem as demais.
+    As mensagens das ações (check-in, pagamento...) ficam fora da saída.
+    """
+    resultado = ResultadoLote()
+    persistir = repo.persistir if repo.armazenamento is not None else lambda: None
+    operacoes = iter(operacoes)
+    while True:
+        with repo.agrupar_eventos():
+            lidas = _aplicar_varias(repo, islice(operacoes, tamanho_lote or None), resultado, ao_errar)
+        persistir()
+        if not tamanho_lote or lidas < tamanho_lote:
+            return resultado
+
+def _aplicar_varias(repo: Repositorio, operacoes, resultado: ResultadoLote,
+                    ao_errar: Optional[Callable[[ErroLinha], None]]) -> int:
+    lidas = 0
+    for numero, operacao in operacoes:
+        lidas += 1
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                nome = aplicar_operacao(repo, operacao)
+        except Exception as e:
+            # Qualquer falha fica na linha: as demais seguem (ValueError traz a mensagem da regra)
+            mensagem = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+            nome_operacao = operacao.get("operacao", "") if isinstance(operacao, dict) else ""
+            erro = ErroLinha(numero, str(nome_operacao), mensagem)
+            resultado.erros.append(erro)
+            if ao_errar is not None:
+                ao_errar(erro)
+            continue
+        resultado.aplicadas += 1
+        resultado.por_operacao[nome] = resultado.por_operacao.get(nome, 0) + 1
+    return lidas
+
+def main(argumentos=None) -> int:
+    parser = argparse.ArgumentParser(prog="py -m roomex.lote",
+                                     description="Aplica um arquivo de operações (CSV ou JSONL) sem o menu interativo.")
+    parser.add_argument("arquivo", help="operações em .csv (com cabeçalho) ou .jsonl")
+    parser.add_argument("--lote", type=int, default=None,
+                        help="persiste a cada N operações (padrão: 'lote_persistencia' do settings.json, ou só no fim)")
+    opcoes = parser.parse_args(argumentos)
+    tamanho_lote = opcoes.lote if opcoes.lote is not None else int(carregar_configuracoes().get("lote_persistencia", 0))
+    if tamanho_lote < 0:
+        parser.error("o tamanho do lote (--lote ou 'lote_persistencia') não pode ser negativo")
+
+    repo = Repositorio.abrir(abrir_armazenamento())
+    try:
+        resultado = executar_lote(repo, ler_operacoes(opcoes.arquivo), tamanho_lote,
+                                  ao_errar=lambda erro: print(f"❌ {erro}", file=sys.stderr))
+        # Snapshot final, como na saída do menu
+        repo.compactar()
+    finally:
+        repo.fechar()
+    print(f"📦 {resultado.resumo()}")
+    return 1 if resultado.erros else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
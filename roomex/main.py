@@ -1,18 +1,23 @@
 import sys
 import os
+from contextlib import nullcontext
 from datetime import datetime, date
 from typing import List
 
 # Importando nossos módulos
 from roomex.models import Quarto, Hospede, Reserva
-from roomex.dados import carregar_dados, salvar_dados
-from roomex.reports import calcular_metricas_financeiras, relatorio_cancelamentos
+from roomex.dados import carregar_configuracoes
+from roomex.disponibilidade import buscar_quartos_disponiveis
+from roomex.repositorio import Repositorio
+from roomex.armazenamento import abrir_armazenamento
+from roomex.gravacao import GravadorEmSegundoPlano, ATRASO_PADRAO
+from roomex import instrumentacao
 
-# --- Variáveis Globais (Estado do Sistema) ---
-quartos: List[Quarto] = []
-reservas: List[Reserva] = []
-ARQUIVO_QUARTOS = "quartos.json"
-ARQUIVO_RESERVAS = "reservas.json"
+# --- Estado do Sistema ---
+# Quartos, reservas e índices de busca ficam no repositório
+repo = Repositorio()
+# Com "gravacao_em_segundo_plano" no settings.json, salvar_tudo só avisa o gravador
+gravador = None
 
 # --- Funções Auxiliares ---
 
@@ -20,12 +25,34 @@ def limpar_tela():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def salvar_tudo():
-    """Salva o estado atual nos arquivos JSON."""
-    salvar_dados(reservas, ARQUIVO_RESERVAS)
+    """
+    Garante o estado atual em disco.
+    Cada ação já foi gravada no diário; o arquivo de reservas só é reescrito
+    quando o diário fica grande (compactação). Com o gravador em segundo plano,
+    essa gravação sai da frente do operador e avisos seguidos viram uma só.
+    """
+    if gravador is not None:
+        gravador.marcar()
+    else:
+        repo.persistir()
     # Quartos geralmente não mudam, mas se mudarmos status, precisaria salvar
-    # salvar_dados(quartos, ARQUIVO_QUARTOS) 
+    # salvar_dados(quartos, "quartos.json") 
     print("💾 Dados salvos automaticamente.")
 
+def travar_estado():
+    """
+    Trava do gravador em segundo plano, segurada enquanto o estado muda ou é lido (nunca
+    durante um input): a gravação não vê uma mudança pela metade, e as leituras não veem
+    o histórico ou os agregados sendo montados pela gravação. Sem gravador, não trava nada.
+    """
+    return gravador.trava if gravador is not None else nullcontext()
+
+def avisar_falhas_de_gravacao():
+    """Mostra, antes do próximo prompt, as falhas da gravação em segundo plano."""
+    if gravador is not None:
+        for erro in gravador.retirar_erros():
+            print(f"❌ Falha na gravação em segundo plano: {erro}", file=sys.stderr)
+
 def ler_data(mensagem: str) -> date:
     """Solicita uma data ao usuário e trata erros."""
     while True:
@@ -36,31 +63,47 @@ def ler_data(mensagem: str) -> date:
             print("❌ Formato inválido! Use dia/mês/ano (ex: 25/12/2025).")
 
 def buscar_quarto(numero: int):
-    for q in quartos:
-        if q.numero == numero:
-            return q
-    return None
+    with travar_estado():
+        return repo.buscar_quarto(numero)
 
 def buscar_reserva_por_quarto(numero_quarto: int):
     """Busca uma reserva ATIVA ou PENDENTE para o quarto informado."""
-    for r in reservas:
-        if r.quarto.numero == numero_quarto and r.status in ["PENDENTE", "ATIVA"]:
-            return r
-    return None
+    with travar_estado():
+        return repo.buscar_reserva_por_quarto(numero_quarto, ("PENDENTE", "ATIVA"))
 
 # --- Ações do Menu ---
 
-def listar_quartos_disponiveis():
+def listar_quartos_disponiveis(data_entrada: date = None, data_saida: date = None,
+                               num_hospedes: int = 1, tipo: str = None) -> List[Quarto]:
     print("\n--- Quartos Disponíveis ---")
-    # Aqui poderíamos filtrar por data, mas vamos listar todos por simplicidade
-    for q in quartos:
-        print(f"Quarto {q.numero} ({q.tipo}) - Cap: {q.capacidade} - Diária: R$ {q.tarifa_base:.2f}")
+    if data_entrada is None or data_saida is None:
+        # Sem período informado, lista todos os quartos
+        for q in repo.quartos:
+            print(f"Quarto {q.numero} ({q.tipo}) - Cap: {q.capacidade} - Diária: R$ {q.tarifa_base:.2f}")
+        return repo.quartos
+
+    with travar_estado():
+        livres = buscar_quartos_disponiveis(None, repo.indice, data_entrada, data_saida, num_hospedes, tipo)
+    if not livres:
+        print("Nenhum quarto livre para o período informado.")
+    for q, valor in livres:
+        print(f"Quarto {q.numero} ({q.tipo}) - Cap: {q.capacidade} - Estadia: R$ {valor:.2f}")
+    return [q for q, _ in livres]
 
 def nova_reserva():
     print("\n--- 🆕 Nova Reserva ---")
-    listar_quartos_disponiveis()
     
     try:
+        # Dados da Reserva (primeiro o período, para mostrar só os quartos livres)
+        dt_ent = ler_data("Data de Entrada")
+        dt_sai = ler_data("Data de Saída")
+        qtd_pessoas = int(input("Quantidade de pessoas: "))
+        tipo = input("Tipo de quarto (Enter para qualquer): ").strip() or None
+
+        livres = listar_quartos_disponiveis(dt_ent, dt_sai, qtd_pessoas, tipo)
+        if not livres:
+            return
+
         num_quarto = int(input("Digite o número do quarto desejado: "))
         quarto = buscar_quarto(num_quarto)
         if not quarto:
@@ -75,20 +118,20 @@ def nova_reserva():
         tel = input("Telefone: ")
         hospede = Hospede(nome, doc, email, tel)
 
-        # Dados da Reserva
-        dt_ent = ler_data("Data de Entrada")
-        dt_sai = ler_data("Data de Saída")
-        qtd_pessoas = int(input("Quantidade de pessoas: "))
-
         # Criação
         nova = Reserva(hospede, quarto, qtd_pessoas, "Balcão", dt_ent, dt_sai)
+
+        # Overbooking: o índice responde sem percorrer todas as reservas
+        with travar_estado():
+            repo.indice.verificar_disponibilidade(quarto.numero, dt_ent, dt_sai)
         
         # Prévia do valor
         print(f"\nValor estimado: R$ {nova.calcular_valor_total():.2f}")
         confirmar = input("Confirmar reserva? (S/N): ").upper()
         
         if confirmar == 'S':
-            reservas.append(nova)
+            with travar_estado():
+                repo.adicionar_reserva(nova)
             salvar_tudo()
             print("✅ Reserva criada com sucesso!")
         else:
@@ -111,15 +154,19 @@ def realizar_acoes_reserva(tipo_acao):
         print(f"Reserva encontrada: {reserva.hospede.nome} (Status: {reserva.status})")
 
         if tipo_acao == "Check-in":
-            reserva.realizar_checkin()
+            with travar_estado():
+                reserva.realizar_checkin()
             salvar_tudo()
 
         elif tipo_acao == "Check-out":
-            print(f"Total a pagar: R$ {reserva.calcular_valor_total():.2f}")
-            pagar = input("Registrar pagamento total agora? (S/N): ").upper()
+            print(f"Total da conta: R$ {reserva.calcular_valor_total():.2f}")
+            print(f"Saldo a pagar:  R$ {reserva.saldo:.2f}")
+            pagar = input("Registrar pagamento do saldo agora? (S/N): ").upper()
             if pagar == 'S':
-                reserva.adicionar_pagamento(reserva.calcular_valor_total(), "Dinheiro", date.today())
-                reserva.realizar_checkout()
+                with travar_estado():
+                    if reserva.saldo_centavos > 0:
+                        reserva.adicionar_pagamento(reserva.saldo, "Dinheiro", date.today())
+                    reserva.realizar_checkout()
                 salvar_tudo()
 
         elif tipo_acao == "Lançamentos":
@@ -129,17 +176,20 @@ def realizar_acoes_reserva(tipo_acao):
             if op == '1':
                 val = float(input("Valor: R$ "))
                 forma = input("Forma (Pix/Cartão): ")
-                reserva.adicionar_pagamento(val, forma, date.today())
+                with travar_estado():
+                    reserva.adicionar_pagamento(val, forma, date.today())
             elif op == '2':
                 desc = input("Descrição do item: ")
                 val = float(input("Valor: R$ "))
-                reserva.lancar_adicional(desc, val)
+                with travar_estado():
+                    reserva.lancar_adicional(desc, val)
             salvar_tudo()
             
         elif tipo_acao == "Cancelar":
              confirmar = input("Tem certeza que deseja cancelar? (S/N): ").upper()
              if confirmar == 'S':
-                 reserva.cancelar_reserva()
+                 with travar_estado():
+                     reserva.cancelar_reserva()
                  salvar_tudo()
 
     except ValueError as e:
@@ -149,9 +199,16 @@ def menu_relatorios():
     print("\n--- 📊 Relatórios Consolidados (Final) ---")
     dt_ini = ler_data("Data Início")
     dt_fim = ler_data("Data Fim")
+    if dt_fim <= dt_ini:
+        print("❌ A data fim deve ser posterior à data início.")
+        return
     
+    # Financeiro, cancelamentos e série mensal somando os agregados diários (sem varrer o histórico)
+    with travar_estado():
+        relatorio = repo.metricas_do_periodo(dt_ini, dt_fim)
+
     # 1. Métricas Financeiras
-    metricas = calcular_metricas_financeiras(reservas, dt_ini, dt_fim, total_quartos=len(quartos))
+    metricas = relatorio["financeiro"]
     
     print("\n" + "-"*30)
     print("📈 DESEMPENHO FINANCEIRO")
@@ -162,30 +219,79 @@ def menu_relatorios():
     print(f"RevPAR:             R$ {metricas['revpar']:.2f}")
 
     # 2. Cancelamentos
-    canc = relatorio_cancelamentos(reservas, dt_ini, dt_fim)
+    canc = relatorio["cancelamentos"]
     print("\n" + "-"*30)
     print("🚫 CANCELAMENTOS E PERDAS")
     print("-"*30)
     print(f"Cancelados: {canc['CANCELADA']}")
     print(f"No-Show:    {canc['NO_SHOW']}")
     print(f"Total:      {canc['TOTAL']}")
+
+    # 3. Mês a mês
+    serie = relatorio["serie_mensal"]
+    print("\n" + "-"*30)
+    print("📅 MÊS A MÊS")
+    print("-"*30)
+    for i, mes in enumerate(serie["datas"]):
+        print(f"{mes.strftime('%m/%Y')}  Ocupação: {serie['ocupacao'][i]:>6.2f}%  "
+              f"Receita: R$ {serie['receita'][i]:>10.2f}  ADR: R$ {serie['adr'][i]:>7.2f}")
     
     input("\nPressione Enter para voltar...")
 
+def auditoria_noturna():
+    print("\n--- 🌙 Auditoria Noturna ---")
+    # Saldos mantidos pelo repositório a cada lançamento: nada é recalculado aqui
+    with travar_estado():
+        devedores = sorted(repo.devedores(), key=lambda r: r.quarto.numero)
+        for reserva in devedores:
+            print(f"Quarto {reserva.quarto.numero} - {reserva.hospede.nome}: R$ {reserva.saldo:.2f}")
+        if not devedores:
+            print("Nenhum hóspede com saldo em aberto.")
+        print(f"\nTotal em aberto (hóspedes na casa): R$ {repo.saldo_em_aberto():.2f}")
+
 # --- Inicialização ---
 
 def carregar_sistema():
-    global quartos, reservas
+    global repo, gravador
     print("Carregando sistema...")
-    quartos = carregar_dados(ARQUIVO_QUARTOS, Quarto)
-    if not quartos:
+    # O repositório carrega os quartos primeiro para que as reservas possam se vincular a eles
+    repo = Repositorio.abrir(abrir_armazenamento())
+    if not repo.quartos:
         print("⚠️  Nenhum quarto encontrado! Rode o 'seed.py' primeiro.")
-    
-    # Passamos a lista de quartos para que as reservas possam se vincular a eles
-    reservas = carregar_dados(ARQUIVO_RESERVAS, Reserva, quartos)
-    print(f"Sistema carregado. {len(quartos)} quartos, {len(reservas)} reservas.")
+    config = carregar_configuracoes()
+    if config.get("gravacao_em_segundo_plano"):
+        gravador = GravadorEmSegundoPlano(repo.persistir, float(config.get("gravacao_atraso", ATRASO_PADRAO)))
+    print(f"Sistema carregado. {len(repo.quartos)} quartos, {repo.quantidade_reservas} reservas.")
+
+# Ações do menu (opção -> função), também usadas nos nomes das medições
+ACOES = {
+    '1': ("nova_reserva", nova_reserva),
+    '2': ("check_in", lambda: realizar_acoes_reserva("Check-in")),
+    '3': ("check_out", lambda: realizar_acoes_reserva("Check-out")),
+    '4': ("lancamentos", lambda: realizar_acoes_reserva("Lançamentos")),
+    '5': ("cancelar", lambda: realizar_acoes_reserva("Cancelar")),
+    '6': ("relatorios", menu_relatorios),
+    '7': ("auditoria_noturna", auditoria_noturna),
+}
+
+def executar_acao(opcao: str):
+    """
+    Executa a ação do menu, cronometrada (e sob o cProfile, se for a ação escolhida em 'perfilar_acao').
+    Cada ação é uma transação: os eventos que ela gera vão juntos ao diário (ou ao SQLite) no fim.
+    """
+    nome, acao = ACOES[opcao]
+    # A ação segura a trava do gravador só nas mudanças (travar_estado) e na entrega dos eventos
+    trava = gravador.trava if gravador is not None else None
+    with instrumentacao.cronometro(f"menu.{nome}"), repo.agrupar_eventos(trava):
+        if instrumentacao.perfilar_acao(opcao) or instrumentacao.perfilar_acao(nome):
+            with instrumentacao.perfilar(f"menu.{nome}"):
+                acao()
+        else:
+            acao()
 
 def main():
+    # Instrumentação (ROOMEX_INSTRUMENTACAO ou "instrumentacao" no settings.json)
+    instrumentacao.configurar(carregar_configuracoes())
     carregar_sistema()
     
     while True:
@@ -198,23 +304,21 @@ def main():
         print("4. Registrar Consumo/Pagamento")
         print("5. Cancelar Reserva")
         print("6. Relatórios")
+        print("7. Auditoria Noturna")
         print("0. Sair")
+        avisar_falhas_de_gravacao()
         
         opcao = input("\nEscolha uma opção: ")
 
-        if opcao == '1':
-            nova_reserva()
-        elif opcao == '2':
-            realizar_acoes_reserva("Check-in")
-        elif opcao == '3':
-            realizar_acoes_reserva("Check-out")
-        elif opcao == '4':
-            realizar_acoes_reserva("Lançamentos")
-        elif opcao == '5':
-            realizar_acoes_reserva("Cancelar")
-        elif opcao == '6':
-            menu_relatorios()
+        if opcao in ACOES:
+            executar_acao(opcao)
         elif opcao == '0':
+            if gravador is not None:
+                gravador.parar()
+            # Snapshot final: a próxima inicialização não precisa reaplicar o diário
+            repo.compactar()
+            repo.fechar()
+            print("💾 Dados salvos.")
             print("Saindo... Até logo! 👋")
             break
         else:
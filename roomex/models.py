@@ -1,10 +1,16 @@
 from datetime import date
-from typing import List, Optional
-from datetime import date, timedelta
-from roomex.dados import carregar_configuracoes
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+from roomex.dados import carregar_configuracoes, versao_configuracoes
+from roomex.precos import calcular_diarias_centavos
+from roomex.dinheiro import para_centavos, para_reais
+from roomex.instrumentacao import medir
 
 class Pessoa:
     """Classe base que representa uma pessoa no sistema (Hóspede, Funcionário, etc.)."""
+    # __slots__ em todos os modelos: sem __dict__ por objeto, o que pesa em históricos grandes
+    __slots__ = ("nome", "documento", "email", "telefone")
+
     def __init__(self, nome: str, documento: str, email: str, telefone: str):
         self.nome = nome
         self.documento = documento
@@ -17,6 +23,8 @@ class Pessoa:
 
 class Hospede(Pessoa):
     """Representa um hóspede do hotel, que é um tipo de Pessoa."""
+    __slots__ = ("historico_reservas",)
+
     def __init__(self, nome: str, documento: str, email: str, telefone: str):
         super().__init__(nome, documento, email, telefone)
         self.historico_reservas: List['Reserva'] = []
@@ -30,7 +38,9 @@ class Hospede(Pessoa):
         }
 
     @classmethod
-    def from_dict(cls, dados):
+    def from_dict(cls, dados, confiavel: bool = False):
+        if confiavel:
+            return cls._from_record(dados)
         return cls(
             nome=dados["nome"],
             documento=dados["documento"],
@@ -38,8 +48,20 @@ class Hospede(Pessoa):
             telefone=dados["telefone"]
         )
 
+    @classmethod
+    def _from_record(cls, dados) -> 'Hospede':
+        hospede = cls.__new__(cls)
+        hospede.nome = dados["nome"]
+        hospede.documento = dados["documento"]
+        hospede.email = dados["email"]
+        hospede.telefone = dados["telefone"]
+        hospede.historico_reservas = []
+        return hospede
+
 class Quarto:
     """Representa um quarto físico do hotel com suas características e tarifa."""
+    __slots__ = ("numero", "tipo", "_capacidade", "tarifa_centavos", "status", "reservas")
+
     def __init__(self, numero: int, tipo: str, capacidade: int, tarifa_base: float):
         self.numero = numero
         self.tipo = tipo
@@ -60,13 +82,14 @@ class Quarto:
 
     @property
     def tarifa_base(self) -> float:
-        return self._tarifa_base
+        return para_reais(self.tarifa_centavos)
 
     @tarifa_base.setter
     def tarifa_base(self, valor: float):
         if valor <= 0:
             raise ValueError("A tarifa base deve ser maior que zero.")
-        self._tarifa_base = valor
+        # Guardada em centavos; 'tarifa_base' continua em reais para a interface e o JSON
+        self.tarifa_centavos = para_centavos(valor)
 
     def __str__(self) -> str:
         return f"Quarto {self.numero} ({self.tipo}) - Cap: {self.capacidade} - R$ {self.tarifa_base:.2f}"
@@ -84,7 +107,13 @@ class Quarto:
         }
 
     @classmethod
-    def from_dict(cls, dados):
+    def from_dict(cls, dados, confiavel: bool = False):
+        """
+        Recria o quarto a partir do dicionário gravado. Com confiavel=True (dados que o
+        próprio sistema gravou, já validados na criação) os setters são pulados.
+        """
+        if confiavel:
+            return cls._from_record(dados)
         quarto = cls(
             numero=dados["numero"],
             tipo=dados["tipo"],
@@ -94,13 +123,36 @@ class Quarto:
         quarto.status = dados["status"]
         return quarto
 
+    @classmethod
+    def _from_record(cls, dados) -> 'Quarto':
+        quarto = cls.__new__(cls)
+        quarto.numero = dados["numero"]
+        quarto.tipo = dados["tipo"]
+        quarto._capacidade = dados["capacidade"]
+        quarto.tarifa_centavos = para_centavos(dados["tarifa_base"])
+        quarto.status = dados["status"]
+        quarto.reservas = []
+        return quarto
+
 class Reserva:
     """Representa uma reserva de um quarto feita por um hóspede para um período."""
+    __slots__ = ("hospede", "quarto", "origem", "_observadores", "_status", "_data_entrada",
+                 "_data_saida", "_num_hospedes", "pagamentos", "adicionais",
+                 "_cache_diarias", "_cache_adicionais", "_cache_pagamentos")
+
     def __init__(self, hospede: Hospede, quarto: Quarto, num_hospedes: int, 
                  origem: str, data_entrada: date, data_saida: date):
         self.hospede = hospede
         self.quarto = quarto
         self.origem = origem
+        # Funções chamadas a cada mudança de estado (índices, persistência, etc.).
+        # Tupla (e não lista): a tupla vazia é compartilhada e não custa memória por reserva.
+        self._observadores: Tuple[Callable, ...] = ()
+        # Subtotais memorizados (ver subtotal_diarias_centavos / subtotal_adicionais_centavos)
+        # e total corrente dos pagamentos (total_pago_centavos)
+        self._cache_diarias: Optional[tuple] = None
+        self._cache_adicionais: Optional[tuple] = None
+        self._cache_pagamentos: Optional[tuple] = None
         self.status: str = "PENDENTE"
         self._data_entrada = data_entrada
         self._data_saida = data_saida
@@ -113,16 +165,61 @@ class Reserva:
         self.adicionais: List['Adicional'] = []
     
     def adicionar_pagamento(self, valor: float, forma: str, data_pagamento: date):
-        novo_pagamento = Pagamento(data_pagamento, forma, valor)
-
-        self.pagamentos.append(novo_pagamento)
+        self.registrar_pagamento(Pagamento(data_pagamento, forma, valor))
         print(f"Pagamento de R$ {valor:.2f} ({forma}) registrado com sucesso.")
     
     def lancar_adicional(self, descricao: str, valor: float):
-        novo_adicional = Adicional(descricao, valor)
-        self.adicionais.append(novo_adicional)
+        self.registrar_adicional(Adicional(descricao, valor))
         print(f"Adicional '{descricao}' de R$ {valor:.2f} lançado com sucesso.")
 
+    def registrar_pagamento(self, pagamento: 'Pagamento'):
+        """Acrescenta um pagamento já montado (sem mensagem), avisando os observadores."""
+        total_pago = self.total_pago_centavos()
+        self.pagamentos.append(pagamento)
+        self._cache_pagamentos = (self.pagamentos, len(self.pagamentos), total_pago + pagamento.valor_centavos)
+        self._notificar("pagamento", pagamento=pagamento)
+
+    def registrar_adicional(self, adicional: 'Adicional'):
+        """Acrescenta um adicional já montado (sem mensagem), avisando os observadores."""
+        subtotal = self.subtotal_adicionais_centavos()
+        self.adicionais.append(adicional)
+        # Atualiza o subtotal memorizado com uma soma, em vez de invalidá-lo
+        self._cache_adicionais = (self.adicionais, len(self.adicionais), subtotal + adicional.valor_centavos)
+        self._notificar("adicional", adicional=adicional)
+
+    def registrar_observador(self, observador: Callable):
+        """
+        Registra uma função chamada como observador(reserva, evento, **detalhes)
+        sempre que a reserva mudar de status ou de datas, ou receber um pagamento/adicional.
+        Antes de mudar status ou datas vem o evento "validar", com o estado proposto
+        (status, data_entrada, data_saida): o observador pode recusá-lo com ValueError,
+        e nesse caso nada muda. Observadores que não validam devem ignorá-lo.
+        """
+        if observador not in self._observadores:
+            self._observadores = self._observadores + (observador,)
+
+    def remover_observador(self, observador: Callable):
+        if observador in self._observadores:
+            self._observadores = tuple(o for o in self._observadores if o is not observador)
+
+    def _notificar(self, evento: str, **detalhes):
+        for observador in self._observadores:
+            observador(self, evento, **detalhes)
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @status.setter
+    def status(self, novo_status: str):
+        anterior = getattr(self, '_status', None)
+        if anterior is not None and anterior != novo_status:
+            self._notificar("validar", status=novo_status, data_entrada=self._data_entrada,
+                            data_saida=self._data_saida)
+        self._status = novo_status
+        if anterior is not None and anterior != novo_status:
+            self._notificar("status", anterior=anterior)
+
     @property
     def num_hospedes(self) -> int:
         return self._num_hospedes
@@ -141,7 +238,13 @@ class Reserva:
     def data_entrada(self, nova_data: date):
         if hasattr(self, '_data_saida') and self._data_saida and nova_data >= self._data_saida:
              raise ValueError("A data de entrada deve ser anterior à data de saída.")
+        anterior = getattr(self, '_data_entrada', None)
+        if anterior is not None and anterior != nova_data:
+            self._notificar("validar", status=self._status, data_entrada=nova_data, data_saida=self._data_saida)
         self._data_entrada = nova_data
+        if anterior is not None and anterior != nova_data:
+            self._cache_diarias = None
+            self._notificar("datas", entrada_anterior=anterior, saida_anterior=self._data_saida)
 
     @property
     def data_saida(self) -> date:
@@ -151,7 +254,13 @@ class Reserva:
     def data_saida(self, nova_data: date):
         if nova_data <= self._data_entrada:
             raise ValueError("A data de saída deve ser posterior à data de entrada.")
+        anterior = self._data_saida
+        if anterior != nova_data:
+            self._notificar("validar", status=self._status, data_entrada=self._data_entrada, data_saida=nova_data)
         self._data_saida = nova_data
+        if anterior != nova_data:
+            self._cache_diarias = None
+            self._notificar("datas", entrada_anterior=self._data_entrada, saida_anterior=anterior)
 
     def __len__(self) -> int:
         delta = self.data_saida - self.data_entrada
@@ -167,6 +276,7 @@ class Reserva:
     def __str__(self) -> str:
         return f"Reserva no {self.quarto.numero} para {self.hospede.nome} ({self.__len__()} noites)"
     
+    @medir("Reserva.calcular_valor_total")
     def calcular_valor_total(self) -> float:
         """
         Calcula o valor total da reserva considerando:
@@ -175,48 +285,77 @@ class Reserva:
         - Multiplicador de temporada (settings.json)
         - Itens adicionais (frigobar/serviços)
         """
-        config = carregar_configuracoes()
-        total_diarias = 0.0
-        
-        # Percorre cada dia da reserva para calcular o preço individualmente
-        dias_totais = (self.data_saida - self.data_entrada).days
-        
-        for i in range(dias_totais):
-            dia_atual = self.data_entrada + timedelta(days=i)
-            fator_preco = 1.0
-            
-            # 1. Verifica Fim de Semana (Sexta=4, Sábado=5, Domingo=6)
-            # Vamos considerar Sexta e Sábado como noites de FDS, ou Sáb e Dom.
-            # O padrão hotelaria costuma ser Sex/Sab ou Sab/Dom. Vamos usar Sab(5) e Dom(6).
-            if dia_atual.weekday() >= 5: 
-                fator_preco *= config.get("multiplicador_fim_de_semana", 1.0)
-
-            # 2. Verifica Temporadas
-            dia_str = dia_atual.strftime("%m-%d") # Ex: "12-25"
-            # Precisamos inverter para comparar (Mês-Dia no JSON vs data)
-            # O JSON está "DD-MM", o python date usa YYYY-MM-DD.
-            # Vamos padronizar convertendo a data atual para "DD-MM"
-            dia_formatado = dia_atual.strftime("%d-%m")
-
-            for temporada in config.get("temporadas", []):
-                inicio = temporada["inicio"]
-                fim = temporada["fim"]
-                
-                # Lógica simplificada para intervalo de datas (assumindo mesmo ano)
-                # Se o dia atual está entre inicio e fim
-                if self._data_dentro_periodo(dia_formatado, inicio, fim):
-                    fator_preco *= temporada["multiplicador"]
-                    # Aplica apenas a primeira temporada que encontrar (não acumula temporadas)
-                    break 
-
-            # Soma o valor do dia
-            valor_dia = self.quarto.tarifa_base * fator_preco
-            total_diarias += valor_dia
+        return para_reais(self.calcular_valor_total_centavos())
 
+    def calcular_valor_total_centavos(self, versao: Optional[int] = None) -> int:
+        """
+        Mesmo valor de calcular_valor_total(), em centavos (int).
+        Os dois subtotais são memorizados: chamadas repetidas custam O(1).
+        """
+        # 1 e 2. Diárias: o motor de preços já tem o fator de cada noite
+        # (fim de semana x temporada) pré-calculado por ano.
         # 3. Soma Adicionais
-        total_adicionais = sum(a.valor for a in self.adicionais)
+        return self.subtotal_diarias_centavos(versao) + self.subtotal_adicionais_centavos()
+
+    def diarias_memorizadas(self, versao: int) -> Optional[int]:
+        """Subtotal das diárias guardado, se ainda for válido para esta versão do settings.json."""
+        cache = self._cache_diarias
+        if cache is not None and cache[0] == versao and cache[1] is self.quarto \
+                and cache[2] == self.quarto.tarifa_centavos:
+            return cache[3]
+        return None
+
+    def memorizar_diarias(self, versao: int, valor: int):
+        """Guarda o subtotal das diárias calculado por fora (ex: cotação em lote)."""
+        self._cache_diarias = (versao, self.quarto, self.quarto.tarifa_centavos, valor)
+
+    def subtotal_diarias_centavos(self, versao: Optional[int] = None) -> int:
+        """
+        Valor das diárias em centavos, memorizado.
+        Só é recalculado se mudarem as datas, o quarto, a tarifa ou a versão do settings.json.
+        Quem cota muitas reservas pode passar 'versao' (versao_configuracoes()) uma vez só.
+        """
+        if versao is None:
+            versao = versao_configuracoes()
+        valor = self.diarias_memorizadas(versao)
+        if valor is None:
+            valor = calcular_diarias_centavos(self.quarto.tarifa_centavos, self.data_entrada, self.data_saida)
+            self.memorizar_diarias(versao, valor)
+        return valor
+
+    def subtotal_adicionais_centavos(self) -> int:
+        """
+        Soma dos adicionais em centavos, memorizada.
+        Adicionais só são acrescentados, então a lista e seu tamanho bastam para saber
+        se o valor guardado ainda vale (inclusive para quem faz adicionais.append direto).
+        """
+        adicionais = self.adicionais
+        cache = self._cache_adicionais
+        if cache is not None and cache[0] is adicionais and cache[1] == len(adicionais):
+            return cache[2]
+        total = sum(a.valor_centavos for a in adicionais)
+        self._cache_adicionais = (adicionais, len(adicionais), total)
+        return total
+
+    def total_pago_centavos(self) -> int:
+        """Total corrente dos pagamentos (créditos), mantido como o dos adicionais."""
+        pagamentos = self.pagamentos
+        cache = self._cache_pagamentos
+        if cache is not None and cache[0] is pagamentos and cache[1] == len(pagamentos):
+            return cache[2]
+        total = sum(p.valor_centavos for p in pagamentos)
+        self._cache_pagamentos = (pagamentos, len(pagamentos), total)
+        return total
+
+    @property
+    def saldo_centavos(self) -> int:
+        """Quanto falta pagar (débitos - créditos), em centavos. Negativo se pago a mais."""
+        return self.calcular_valor_total_centavos() - self.total_pago_centavos()
+
+    @property
+    def saldo(self) -> float:
+        return para_reais(self.saldo_centavos)
 
-        return round(total_diarias + total_adicionais, 2)
     
     def realizar_checkin(self):
         """
@@ -237,16 +376,17 @@ class Reserva:
         if self.status != "ATIVA":
             raise ValueError(f"Apenas reservas ATIVAS podem fazer check-out. Status: {self.status}")
 
-        total_devido = self.calcular_valor_total()
-        total_pago = sum(p.valor for p in self.pagamentos)
+        # Em centavos a comparação é exata: não precisa de margem para ponto flutuante
+        total_devido = self.calcular_valor_total_centavos()
+        total_pago = self.total_pago_centavos()
 
-        # Pequena margem de erro para pontos flutuantes (centavos)
-        if total_pago < (total_devido - 0.01):
+        if total_pago < total_devido:
             falta = total_devido - total_pago
-            raise ValueError(f"Pagamento pendente! Total: R$ {total_devido:.2f}. Falta: R$ {falta:.2f}")
+            raise ValueError(f"Pagamento pendente! Total: R$ {para_reais(total_devido):.2f}. "
+                             f"Falta: R$ {para_reais(falta):.2f}")
 
         self.status = "FINALIZADA"
-        print(f"🏁 Check-out concluído! Total pago: R$ {total_pago:.2f}.")
+        print(f"🏁 Check-out concluído! Total pago: R$ {para_reais(total_pago):.2f}.")
 
     def cancelar_reserva(self):
         """
@@ -268,23 +408,6 @@ class Reserva:
 
         self.status = "CANCELADA"
 
-    def _data_dentro_periodo(self, data_atual: str, inicio: str, fim: str) -> bool:
-        """Helper para comparar datas no formato 'DD-MM'."""
-        # Truque: converter para números inteiros MM-DD para comparar (ex: 01-05 vira 105)
-        def converter(d):
-            dia, mes = map(int, d.split('-'))
-            return mes * 100 + dia
-        
-        d_atual = converter(data_atual)
-        d_inicio = converter(inicio)
-        d_fim = converter(fim)
-
-        if d_inicio <= d_fim:
-            return d_inicio <= d_atual <= d_fim
-        else:
-            # Caso especial: temporada vira o ano (ex: Dez a Jan)
-            return d_atual >= d_inicio or d_atual <= d_fim
-    
     def to_dict(self):
         return {
             "hospede": self.hospede.to_dict(), # Chama o to_dict do Hospede
@@ -299,24 +422,46 @@ class Reserva:
         }
 
     @classmethod
-    def from_dict(cls, dados, lista_quartos):
-        # Para recriar a reserva, precisamos achar o objeto Quarto real na lista de quartos do sistema
-        quarto_real = next((q for q in lista_quartos if q.numero == dados["quarto_numero"]), None)
+    def from_dict(cls, dados, lista_quartos, hospedes: Optional[Dict[str, Hospede]] = None,
+                  confiavel: bool = False):
+        """
+        Recria a reserva a partir do dicionário gravado (to_dict).
+        Com confiavel=True, para registros que o próprio sistema gravou (snapshot, diário,
+        banco), os atributos são preenchidos direto, sem passar pelos setters que validam
+        datas e capacidade; a entrada do usuário continua pelo construtor, com validação.
+        """
+        # Para recriar a reserva, precisamos achar o objeto Quarto real entre os quartos do sistema
+        # (aceita um dicionário número -> Quarto, que evita a busca linear)
+        if isinstance(lista_quartos, dict):
+            quarto_real = lista_quartos.get(dados["quarto_numero"])
+        else:
+            quarto_real = next((q for q in lista_quartos if q.numero == dados["quarto_numero"]), None)
         
         if not quarto_real:
             raise ValueError(f"Quarto {dados['quarto_numero']} não encontrado.")
 
-        hospede = Hospede.from_dict(dados["hospede"])
-        
+        # Com o dicionário 'hospedes', o mesmo documento vira uma única instância compartilhada
+        if hospedes is None:
+            hospede = Hospede.from_dict(dados["hospede"], confiavel)
+        else:
+            hospede = hospedes.get(dados["hospede"]["documento"])
+            if hospede is None:
+                hospede = Hospede.from_dict(dados["hospede"], confiavel)
+                hospedes[hospede.documento] = hospede
+
+        if confiavel:
+            return cls._from_record(dados, quarto_real, hospede)
+
         reserva = cls(
             hospede=hospede,
             quarto=quarto_real,
             num_hospedes=dados["num_hospedes"],
-            origem=dados["origem"],
+            # Textos que se repetem em todo o histórico são internados (uma cópia só na memória)
+            origem=sys.intern(dados["origem"]),
             data_entrada=date.fromisoformat(dados["data_entrada"]),
             data_saida=date.fromisoformat(dados["data_saida"])
         )
-        reserva.status = dados["status"]
+        reserva.status = sys.intern(dados["status"])
         
         # Recria as listas de pagamentos e adicionais
         reserva.pagamentos = [Pagamento.from_dict(p) for p in dados["pagamentos"]]
@@ -324,13 +469,42 @@ class Reserva:
         
         return reserva
 
+    @classmethod
+    def _from_record(cls, dados, quarto: Quarto, hospede: Hospede) -> 'Reserva':
+        # Mesmo estado que __init__ + from_dict deixam, atribuído slot a slot
+        reserva = cls.__new__(cls)
+        reserva.hospede = hospede
+        reserva.quarto = quarto
+        reserva.origem = sys.intern(dados["origem"])
+        reserva._observadores = ()
+        reserva._cache_diarias = None
+        reserva._cache_adicionais = None
+        reserva._cache_pagamentos = None
+        reserva._status = sys.intern(dados["status"])
+        reserva._data_entrada = date.fromisoformat(dados["data_entrada"])
+        reserva._data_saida = date.fromisoformat(dados["data_saida"])
+        reserva._num_hospedes = dados["num_hospedes"]
+        reserva.pagamentos = [Pagamento._from_record(p) for p in dados["pagamentos"]]
+        reserva.adicionais = [Adicional._from_record(a) for a in dados["adicionais"]]
+        return reserva
+
 class Pagamento:
     """Representa um registro financeiro de crédito (pagamento) na reserva."""
+    __slots__ = ("data", "forma", "valor_centavos")
+
     def __init__(self, data: date, forma: str, valor: float):
         self.data = data
         self.forma = forma
         self.valor = valor
 
+    @property
+    def valor(self) -> float:
+        return para_reais(self.valor_centavos)
+
+    @valor.setter
+    def valor(self, valor: float):
+        self.valor_centavos = para_centavos(valor)
+
     def to_dict(self) -> dict:
         return {
             "data": self.data.isoformat(),
@@ -339,18 +513,38 @@ class Pagamento:
         }
     
     @classmethod
-    def from_dict(cls, data: dict) -> 'Pagamento':
+    def from_dict(cls, data: dict, confiavel: bool = False) -> 'Pagamento':
+        if confiavel:
+            return cls._from_record(data)
         return cls(
             data=date.fromisoformat(data["data"]),
-            forma=data["forma"],
+            forma=sys.intern(data["forma"]),
             valor=data["valor"]
         )
 
+    @classmethod
+    def _from_record(cls, data: dict) -> 'Pagamento':
+        pagamento = cls.__new__(cls)
+        pagamento.data = date.fromisoformat(data["data"])
+        pagamento.forma = sys.intern(data["forma"])
+        pagamento.valor_centavos = para_centavos(data["valor"])
+        return pagamento
+
 class Adicional:
     """Representa um registro financeiro de débito (consumo/serviço extra) na reserva."""
+    __slots__ = ("descricao", "valor_centavos")
+
     def __init__(self, descricao: str, valor: float):
         self.descricao = descricao
         self.valor = valor
+
+    @property
+    def valor(self) -> float:
+        return para_reais(self.valor_centavos)
+
+    @valor.setter
+    def valor(self, valor: float):
+        self.valor_centavos = para_centavos(valor)
     
     def to_dict(self) -> dict:
         return {
@@ -359,8 +553,17 @@ class Adicional:
         }
     
     @classmethod
-    def from_dict(cls, data: dict) -> 'Adicional':
+    def from_dict(cls, data: dict, confiavel: bool = False) -> 'Adicional':
+        if confiavel:
+            return cls._from_record(data)
         return cls(
             descricao=data["descricao"],
             valor=data["valor"]
-        )
\ No newline at end of file
+        )
+
+    @classmethod
+    def _from_record(cls, data: dict) -> 'Adicional':
+        adicional = cls.__new__(cls)
+        adicional.descricao = data["descricao"]
+        adicional.valor_centavos = para_centavos(data["valor"])
+        return adicional
\ No newline at end of file
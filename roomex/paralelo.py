@@ -0,0 +1,126 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from roomex.models import Quarto, Reserva
+from roomex.precos import calcular_diarias_centavos
+from roomex.dinheiro import dividir_centavos, para_centavos
+from roomex.dados import dividir_em_blocos, iterar_intervalo
+from roomex.reports import _metricas_de_totais
+
+# Relatórios em paralelo: as reservas são divididas em partes, cada processo calcula
+# totais parciais (noites ocupadas, receita em centavos, cancelamentos) e os parciais
+# são somados no fim. Como tudo é inteiro, o resultado é idêntico ao cálculo serial.
+
+# Status sem receita/ocupação e status contados como perda (mesmas regras de roomex.reports)
+STATUS_SEM_RECEITA = ("CANCELADA", "NO_SHOW", "PENDENTE")
+STATUS_PERDA = ("CANCELADA", "NO_SHOW")
+
+# Registro enviado aos processos: (quarto, entrada, saida, status, tarifa_centavos, adicionais_centavos),
+# com as datas em ordinais. Tuplas simples são baratas de serializar entre processos.
+Registro = Tuple[int, int, int, str, int, int]
+
+def registro_de_reserva(reserva: Reserva) -> Registro:
+    return (reserva.quarto.numero, reserva.data_entrada.toordinal(), reserva.data_saida.toordinal(),
+            reserva.status, reserva.quarto.tarifa_centavos, reserva.subtotal_adicionais_centavos())
+
+def registro_de_dict(dados: dict, tarifas: Dict[int, int]) -> Registro:
+    numero = dados["quarto_numero"]
+    if numero not in tarifas:
+        raise ValueError(f"Quarto {numero} não encontrado.")
+    return (numero, date.fromisoformat(dados["data_entrada"]).toordinal(),
+            date.fromisoformat(dados["data_saida"]).toordinal(), dados["status"], tarifas[numero],
+            sum(para_centavos(a["valor"]) for a in dados["adicionais"]))
+
+def _parcial_vazio() -> Dict[str, int]:
+    return {"dias_ocupados": 0, "receita": 0, "CANCELADA": 0, "NO_SHOW": 0}
+
+def agregar_registros(registros: Iterable[Registro], inicio: int, fim: int) -> Dict[str, int]:
+    """
+    Totais parciais de um conjunto de registros para o período [inicio, fim] (ordinais).
+    Roda dentro de cada processo; as regras são as de calcular_metricas_financeiras
+    e relatorio_cancelamentos.
+    """
+    parcial = _parcial_vazio()
+    for _, entrada, saida, status, tarifa, adicionais in registros:
+        interseccao = min(saida, fim) - max(entrada, inicio)
+        if status in STATUS_PERDA:
+            if interseccao > 0 or inicio <= entrada <= fim:
+                parcial[status] += 1
+        elif interseccao > 0 and status not in STATUS_SEM_RECEITA:
+            total = calcular_diarias_centavos(tarifa, date.fromordinal(entrada), date.fromordinal(saida)) + adicionais
+            parcial["dias_ocupados"] += interseccao
+            parcial["receita"] += dividir_centavos(total, interseccao, saida - entrada)
+    return parcial
+
+def _agregar_bloco_arquivo(nome_arquivo: str, byte_inicio: int, byte_fim: int, tarifas: Dict[int, int],
+                           inicio: int, fim: int) -> Dict[str, int]:
+    # Cada processo lê e decodifica só o seu pedaço do .jsonl
+    registros = (registro_de_dict(dados, tarifas) for dados in iterar_intervalo(nome_arquivo, byte_inicio, byte_fim))
+    return agregar_registros(registros, inicio, fim)
+
+def particionar(registros: List[Registro], partes: int, por: str = "quarto") -> List[List[Registro]]:
+    """
+    Divide os registros em até 'partes' grupos: por número de quarto (um quarto fica
+    inteiro num grupo) ou por data (fatias contíguas em ordem de entrada).
+    """
+    partes = max(1, min(partes, len(registros)))
+    if por == "quarto":
+        grupos: List[List[Registro]] = [[] for _ in range(partes)]
+        for registro in registros:
+            grupos[registro[0] % partes].append(registro)
+        return [grupo for grupo in grupos if grupo]
+    if por == "data":
+        ordenados = sorted(registros, key=lambda registro: registro[1])
+        tamanho = -(-len(ordenados) // partes)
+        return [ordenados[i:i + tamanho] for i in range(0, len(ordenados), tamanho)]
+    raise ValueError(f"Partição desconhecida: {por}. Use 'quarto' ou 'data'.")
+
+def somar_parciais(parciais: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    total = _parcial_vazio()
+    for parcial in parciais:
+        for chave, valor in parcial.items():
+            total[chave] += valor
+    return total
+
+def relatorio_paralelo(fonte: Union[Iterable[Reserva], str], data_inicio: date, data_fim: date, total_quartos: int,
+                       trabalhadores: int, por: str = "quarto",
+                       quartos: Optional[Iterable[Quarto]] = None) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """
+    Calcula (métricas financeiras, cancelamentos) do período dividindo o trabalho entre
+    'trabalhadores' processos. O resultado é igual ao de calcular_metricas_financeiras e
+    relatorio_cancelamentos.
+
+    'fonte' pode ser uma coleção de reservas (divididas por quarto ou por data, conforme 'por')
+    ou o caminho de um .jsonl: nesse caso cada processo lê seu próprio intervalo de bytes
+    do arquivo, e 'quartos' informa as tarifas.
+    """
+    inicio = data_inicio.toordinal()
+    fim = data_fim.toordinal()
+
+    if isinstance(fonte, str):
+        if quartos is None:
+            raise ValueError("Informe os quartos para calcular a partir de um arquivo.")
+        tarifas = {quarto.numero: quarto.tarifa_centavos for quarto in quartos}
+        blocos = dividir_em_blocos(fonte, trabalhadores)
+        tarefas = [(_agregar_bloco_arquivo, (fonte, byte_inicio, byte_fim, tarifas, inicio, fim))
+                   for byte_inicio, byte_fim in blocos]
+    else:
+        grupos = particionar([registro_de_reserva(reserva) for reserva in fonte], trabalhadores, por)
+        tarefas = [(agregar_registros, (grupo, inicio, fim)) for grupo in grupos]
+
+    if trabalhadores <= 1 or len(tarefas) <= 1:
+        parciais = [funcao(*argumentos) for funcao, argumentos in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+            futuros = [executor.submit(funcao, *argumentos) for funcao, argumentos in tarefas]
+            parciais = [futuro.result() for futuro in futuros]
+    total = somar_parciais(parciais)
+
+    dias_no_periodo = (data_fim - data_inicio).days
+    if total_quartos <= 0 or dias_no_periodo <= 0:
+        metricas = {"ocupacao": 0.0, "adr": 0.0, "revpar": 0.0, "receita_total": 0.0}
+    else:
+        metricas = _metricas_de_totais(total["dias_ocupados"], total["receita"], total_quartos, dias_no_periodo)
+    cancelamentos = {"CANCELADA": total["CANCELADA"], "NO_SHOW": total["NO_SHOW"],
+                     "TOTAL": total["CANCELADA"] + total["NO_SHOW"]}
+    return metricas, cancelamentos
@@ -0,0 +1,198 @@
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+from roomex.dados import carregar_configuracoes, obter_temporadas, versao_configuracoes
+from roomex.dinheiro import para_centavos, para_reais
+from roomex.instrumentacao import contar
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele a cotação em lote usa o caminho escalar
+    np = None
+
+# Tabelas de fatores por ano, válidas para uma versão do settings.json.
+# "fatores" guarda o multiplicador de cada noite do ano e "acumulados" a soma de prefixos,
+# de forma que o fator somado de um intervalo é acumulado[fim] - acumulado[inicio].
+_cache_tabelas = {"versao": None, "fatores": {}, "acumulados": {}}
+
+def _dentro_periodo(dia_mmdd: int, inicio: int, fim: int) -> bool:
+    if inicio <= fim:
+        return inicio <= dia_mmdd <= fim
+    # Temporada que vira o ano (ex: Dez a Jan)
+    return dia_mmdd >= inicio or dia_mmdd <= fim
+
+def _validar_cache():
+    versao = versao_configuracoes()
+    if _cache_tabelas["versao"] != versao:
+        _cache_tabelas["versao"] = versao
+        _cache_tabelas["fatores"] = {}
+        _cache_tabelas["acumulados"] = {}
+
+def _montar_tabela(ano: int) -> List[float]:
+    """
+    Monta o multiplicador de cada noite do ano (fim de semana x temporada).
+    """
+    contar("precos.tabelas_montadas")
+    config = carregar_configuracoes()
+    temporadas = obter_temporadas()
+    multiplicador_fds = config.get("multiplicador_fim_de_semana", 1.0)
+
+    fatores = []
+    dia_atual = date(ano, 1, 1)
+    um_dia = timedelta(days=1)
+    while dia_atual.year == ano:
+        fator_preco = 1.0
+
+        # 1. Fim de semana: Sábado(5) e Domingo(6)
+        if dia_atual.weekday() >= 5:
+            fator_preco *= multiplicador_fds
+
+        # 2. Temporada: aplica apenas a primeira que encontrar
+        dia_mmdd = dia_atual.month * 100 + dia_atual.day
+        for inicio, fim, multiplicador in temporadas:
+            if _dentro_periodo(dia_mmdd, inicio, fim):
+                fator_preco *= multiplicador
+                break
+
+        fatores.append(fator_preco)
+        dia_atual += um_dia
+    return fatores
+
+def tabela_fatores(ano: int) -> List[float]:
+    """
+    Retorna a lista (365 ou 366 posições) com o multiplicador de preço de cada noite do ano.
+    O índice 0 corresponde à noite de 1º de janeiro.
+    """
+    _validar_cache()
+    fatores = _cache_tabelas["fatores"].get(ano)
+    if fatores is None:
+        fatores = _montar_tabela(ano)
+        _cache_tabelas["fatores"][ano] = fatores
+    return fatores
+
+def tabela_acumulada(ano: int) -> List[float]:
+    """
+    Soma acumulada da tabela de fatores do ano (tamanho = noites do ano + 1).
+    """
+    _validar_cache()
+    acumulado = _cache_tabelas["acumulados"].get(ano)
+    if acumulado is None:
+        acumulado = [0.0]
+        soma = 0.0
+        for fator in tabela_fatores(ano):
+            soma += fator
+            acumulado.append(soma)
+        _cache_tabelas["acumulados"][ano] = acumulado
+    return acumulado
+
+def soma_fatores(data_entrada: date, data_saida: date) -> float:
+    """
+    Soma dos multiplicadores de todas as noites entre a entrada (inclusive) e a saída (exclusive).
+    Cada ano atravessado pela estadia custa apenas uma subtração na tabela acumulada.
+    """
+    total = 0.0
+    ano = data_entrada.year
+    inicio = data_entrada
+    while inicio < data_saida:
+        primeiro_dia_ano = date(ano, 1, 1).toordinal()
+        fim = min(data_saida, date(ano + 1, 1, 1))
+        acumulado = tabela_acumulada(ano)
+        total += acumulado[fim.toordinal() - primeiro_dia_ano] - acumulado[inicio.toordinal() - primeiro_dia_ano]
+        inicio = fim
+        ano += 1
+    return total
+
+def calcular_diarias(tarifa_base: float, data_entrada: date, data_saida: date) -> float:
+    """
+    Valor das diárias (sem adicionais e sem arredondamento) de uma estadia.
+    """
+    return tarifa_base * soma_fatores(data_entrada, data_saida)
+
+def calcular_diarias_centavos(tarifa_centavos: int, data_entrada: date, data_saida: date) -> int:
+    """
+    Valor das diárias de uma estadia em centavos: o único arredondamento da conta.
+    """
+    return round(tarifa_centavos * soma_fatores(data_entrada, data_saida))
+
+def valor_total_centavos(tarifa_centavos: int, data_entrada: date, data_saida: date,
+                         total_adicionais_centavos: int = 0) -> int:
+    """
+    Valor total de uma estadia (diárias + adicionais) em centavos.
+    É a mesma conta de Reserva.calcular_valor_total_centavos, para quem só tem os dados crus.
+    """
+    return calcular_diarias_centavos(tarifa_centavos, data_entrada, data_saida) + total_adicionais_centavos
+
+def valor_total(tarifa_base: float, data_entrada: date, data_saida: date, total_adicionais: float = 0.0) -> float:
+    """Como valor_total_centavos, recebendo e devolvendo reais."""
+    return para_reais(valor_total_centavos(para_centavos(tarifa_base), data_entrada, data_saida,
+                                           para_centavos(total_adicionais)))
+
+def cotar_lote(reservas: Iterable, usar_numpy: Optional[bool] = None) -> List[float]:
+    """
+    Calcula o valor total (em reais) de várias reservas de uma vez.
+    O resultado é idêntico a chamar calcular_valor_total() em cada uma, na mesma ordem.
+    """
+    return [para_reais(centavos) for centavos in cotar_lote_centavos(reservas, usar_numpy)]
+
+def cotar_lote_centavos(reservas: Iterable, usar_numpy: Optional[bool] = None) -> List[int]:
+    """
+    Calcula o valor total, em centavos, de várias reservas de uma vez.
+    O resultado é idêntico a chamar calcular_valor_total_centavos() em cada uma, na mesma ordem.
+
+    Com NumPy disponível, as datas e tarifas são empacotadas em arrays e as diárias saem
+    de consultas vetorizadas às tabelas acumuladas de cada ano.
+    """
+    reservas = list(reservas)
+    versao = versao_configuracoes()
+    if usar_numpy is None:
+        usar_numpy = np is not None
+    if not usar_numpy or not reservas:
+        return [reserva.calcular_valor_total_centavos(versao) for reserva in reservas]
+
+    # Só as reservas sem subtotal memorizado passam pelo cálculo vetorizado
+    pendentes = [r for r in reservas if r.diarias_memorizadas(versao) is None]
+    if pendentes:
+        contar("precos.cotadas_em_lote", len(pendentes))
+        for reserva, valor in zip(pendentes, _cotar_diarias_numpy(pendentes)):
+            reserva.memorizar_diarias(versao, valor)
+    return [reserva.calcular_valor_total_centavos(versao) for reserva in reservas]
+
+def _cotar_diarias_numpy(reservas: List) -> List[int]:
+    """Diárias (em centavos) de várias reservas, com consultas vetorizadas às tabelas acumuladas."""
+    quantidade = len(reservas)
+    entradas = np.fromiter((r.data_entrada.toordinal() for r in reservas), dtype=np.int64, count=quantidade)
+    saidas = np.fromiter((r.data_saida.toordinal() for r in reservas), dtype=np.int64, count=quantidade)
+    anos = np.fromiter((r.data_entrada.year for r in reservas), dtype=np.int64, count=quantidade)
+    tarifas = np.fromiter((r.quarto.tarifa_centavos for r in reservas), dtype=np.int64, count=quantidade)
+
+    # 1. Uma linha por ano com a tabela acumulada (367 colunas cabem anos bissextos)
+    ano_min = int(anos.min())
+    ano_max = int(anos.max())
+    matriz = np.zeros((ano_max - ano_min + 1, 367), dtype=np.float64)
+    inicio_ano = np.empty(ano_max - ano_min + 1, dtype=np.int64)
+    noites_ano = np.empty(ano_max - ano_min + 1, dtype=np.int64)
+    for linha, ano in enumerate(range(ano_min, ano_max + 1)):
+        acumulado = tabela_acumulada(ano)
+        matriz[linha, :len(acumulado)] = acumulado
+        inicio_ano[linha] = date(ano, 1, 1).toordinal()
+        noites_ano[linha] = len(acumulado) - 1
+
+    # 2. Posição da entrada e da saída dentro do ano da entrada
+    linhas = anos - ano_min
+    pos_entrada = entradas - inicio_ano[linhas]
+    pos_saida = saidas - inicio_ano[linhas]
+    mesmo_ano = pos_saida <= noites_ano[linhas]
+    pos_saida = np.minimum(pos_saida, noites_ano[linhas])
+    soma = matriz[linhas, pos_saida] - matriz[linhas, pos_entrada]
+
+    # 3. Estadias que atravessam o ano (raras) usam o caminho escalar
+    for i in np.flatnonzero(~mesmo_ano):
+        soma[i] = soma_fatores(reservas[i].data_entrada, reservas[i].data_saida)
+
+    # np.rint arredonda meio para o par, como o round() do caminho escalar
+    return np.rint(tarifas * soma).astype(np.int64).tolist()
+
+def limpar_cache():
+    """Descarta as tabelas montadas (útil em testes)."""
+    _cache_tabelas["versao"] = None
+    _cache_tabelas["fatores"] = {}
+    _cache_tabelas["acumulados"] = {}
@@ -1,6 +1,15 @@
+from abc import ABC, abstractmethod
 from datetime import date
-from typing import List, Dict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 from roomex.models import Reserva
+from roomex.precos import cotar_lote_centavos
+from roomex.dinheiro import dividir_centavos, para_reais
+from roomex.colunar import ReservaStore
+from roomex.instrumentacao import medir
+
+# Quantas reservas candidatas um acumulador guarda antes de cotá-las (cotar_lote_centavos)
+# e somá-las: a memória do relatório fica limitada ao bloco, não ao período inteiro.
+TAMANHO_BLOCO_COTACAO = 4096
 
 def _interseccao_dias(reserva: Reserva, data_inicio: date, data_fim: date) -> int:
     """
@@ -13,73 +22,166 @@ def _interseccao_dias(reserva: Reserva, data_inicio: date, data_fim: date) -> in
         return (fim_efetivo - inicio_efetivo).days
     return 0
 
-def calcular_metricas_financeiras(reservas: List[Reserva], data_inicio: date, data_fim: date, total_quartos: int) -> Dict[str, float]:
+def _metricas_de_totais(dias_ocupados_total: int, receita_periodo: int, total_quartos: int,
+                        dias_no_periodo: int) -> Dict[str, float]:
+    """Monta o dicionário de métricas a partir das noites vendidas e da receita (em centavos)."""
+    total_dias_disponiveis_hotel = total_quartos * dias_no_periodo
+
+    # 1. Taxa de Ocupação (%)
+    taxa_ocupacao = (dias_ocupados_total / total_dias_disponiveis_hotel) * 100
+
+    # 2. ADR (Average Daily Rate) = Receita Total / Diárias Vendidas
+    adr = dividir_centavos(receita_periodo, 1, dias_ocupados_total) if dias_ocupados_total > 0 else 0
+
+    # 3. RevPAR (Revenue per Available Room) = Receita Total / Total de Quartos Disponíveis (Inventário)
+    revpar = dividir_centavos(receita_periodo, 1, total_dias_disponiveis_hotel)
+
+    return {
+        "ocupacao": round(taxa_ocupacao, 2),
+        "adr": para_reais(adr),
+        "revpar": para_reais(revpar),
+        "receita_total": para_reais(receita_periodo)
+    }
+
+class ContextoRelatorio:
+    """Parâmetros do relatório, entregues a todos os acumuladores."""
+    def __init__(self, data_inicio: date, data_fim: date, total_quartos: int):
+        self.data_inicio = data_inicio
+        self.data_fim = data_fim
+        self.total_quartos = total_quartos
+        # Dias totais do período do relatório
+        self.dias_no_periodo = (data_fim - data_inicio).days
+
+
+class Acumulador(ABC):
     """
-    Gera um dicionário com Taxa de Ocupação, ADR e RevPAR.
-    Fórmulas baseadas no documento de requisitos.
+    Um indicador do relatório unificado (gerar_relatorio).
+    Recebe cada reserva uma única vez, já com as noites dela dentro do período,
+    e entrega seu resultado no fim. Novos KPIs são novas subclasses: nenhuma varredura extra.
     """
-    if total_quartos <= 0:
-        return {"ocupacao": 0.0, "adr": 0.0, "revpar": 0.0, "receita_total": 0.0}
+    nome = ""
 
-    # Dias totais do período do relatório
-    dias_no_periodo = (data_fim - data_inicio).days
-    if dias_no_periodo <= 0:
-        # Evita divisão por zero ou data inválida
-        return {"ocupacao": 0.0, "adr": 0.0, "revpar": 0.0, "receita_total": 0.0}
+    @abstractmethod
+    def adicionar(self, reserva: Reserva, dias_interseccao: int, contexto: ContextoRelatorio):
+        ...
 
-    total_dias_disponiveis_hotel = total_quartos * dias_no_periodo
-    dias_ocupados_total = 0
-    receita_periodo = 0.0
+    @abstractmethod
+    def resultado(self, contexto: ContextoRelatorio) -> Any:
+        ...
 
-    for reserva in reservas:
+
+class AcumuladorFinanceiro(Acumulador):
+    """Taxa de Ocupação, ADR, RevPAR e receita do período."""
+    nome = "financeiro"
+
+    def __init__(self):
+        self.dias_ocupados_total = 0
+        # Receita acumulada em centavos: soma inteira, exata e independente da ordem
+        self.receita_periodo = 0
+        self.candidatas: List[Reserva] = []
+        self.dias_por_candidata: List[int] = []
+
+    def adicionar(self, reserva: Reserva, dias_interseccao: int, contexto: ContextoRelatorio):
         # Ignora canceladas e no-show para cálculo de receita e ocupação efetiva
-        if reserva.status in ["CANCELADA", "NO_SHOW", "PENDENTE"]:
-            continue
+        if dias_interseccao > 0 and reserva.status not in ("CANCELADA", "NO_SHOW", "PENDENTE"):
+            self.dias_ocupados_total += dias_interseccao
+            self.candidatas.append(reserva)
+            self.dias_por_candidata.append(dias_interseccao)
+            if len(self.candidatas) >= TAMANHO_BLOCO_COTACAO:
+                self._somar_bloco()
 
-        dias_interseccao = _interseccao_dias(reserva, data_inicio, data_fim)
-        
-        if dias_interseccao > 0:
-            dias_ocupados_total += dias_interseccao
-            
+    def _somar_bloco(self):
+        # Os valores totais do bloco são cotados de uma vez (vetorizado quando há NumPy)
+        valores_totais = cotar_lote_centavos(self.candidatas)
+        for reserva, dias_interseccao, valor_total in zip(self.candidatas, self.dias_por_candidata, valores_totais):
             # Cálculo de Receita Proporcional:
             # Se a reserva custa R$ 1000 por 5 dias, mas só 2 dias caem neste relatório,
             # somamos apenas R$ 400 (2 * média diária) ao relatório.
-            valor_total = reserva.calcular_valor_total()
             dias_totais_reserva = len(reserva)
-            
             if dias_totais_reserva > 0:
-                receita_diaria_media = valor_total / dias_totais_reserva
-                receita_periodo += (receita_diaria_media * dias_interseccao)
+                self.receita_periodo += dividir_centavos(valor_total, dias_interseccao, dias_totais_reserva)
+        self.candidatas.clear()
+        self.dias_por_candidata.clear()
 
-    # 1. Taxa de Ocupação (%)
-    taxa_ocupacao = (dias_ocupados_total / total_dias_disponiveis_hotel) * 100
+    def resultado(self, contexto: ContextoRelatorio) -> Dict[str, float]:
+        if contexto.total_quartos <= 0 or contexto.dias_no_periodo <= 0:
+            # Evita divisão por zero ou data inválida
+            return {"ocupacao": 0.0, "adr": 0.0, "revpar": 0.0, "receita_total": 0.0}
 
-    # 2. ADR (Average Daily Rate) = Receita Total / Diárias Vendidas
-    adr = receita_periodo / dias_ocupados_total if dias_ocupados_total > 0 else 0.0
+        self._somar_bloco()
+        return _metricas_de_totais(self.dias_ocupados_total, self.receita_periodo,
+                                   contexto.total_quartos, contexto.dias_no_periodo)
 
-    # 3. RevPAR (Revenue per Available Room) = Receita Total / Total de Quartos Disponíveis (Inventário)
-    revpar = receita_periodo / total_dias_disponiveis_hotel
 
-    return {
-        "ocupacao": round(taxa_ocupacao, 2),
-        "adr": round(adr, 2),
-        "revpar": round(revpar, 2),
-        "receita_total": round(receita_periodo, 2)
-    }
+class AcumuladorCancelamentos(Acumulador):
+    """Cancelamentos e No-Shows que ocorreriam dentro do período."""
+    nome = "cancelamentos"
+
+    def __init__(self):
+        self.stats = {"CANCELADA": 0, "NO_SHOW": 0, "TOTAL": 0}
 
-def relatorio_cancelamentos(reservas: List[Reserva], data_inicio: date, data_fim: date) -> Dict[str, int]:
+    def adicionar(self, reserva: Reserva, dias_interseccao: int, contexto: ContextoRelatorio):
+        status = reserva.status
+        if status != "CANCELADA" and status != "NO_SHOW":
+            return
+        # Verifica se a reserva tem interseção com o período
+        if dias_interseccao > 0 or (contexto.data_inicio <= reserva.data_entrada <= contexto.data_fim):
+            self.stats[status] += 1
+
+    def resultado(self, contexto: ContextoRelatorio) -> Dict[str, int]:
+        self.stats["TOTAL"] = self.stats["CANCELADA"] + self.stats["NO_SHOW"]
+        return self.stats
+
+
+@medir("reports.gerar_relatorio")
+def gerar_relatorio(reservas: Iterable[Reserva], data_inicio: date, data_fim: date, total_quartos: int,
+                    acumuladores: Optional[Sequence[Acumulador]] = None) -> Dict[str, Any]:
     """
-    Conta cancelamentos e No-Shows que ocorreriam dentro do período.
+    Relatório unificado: percorre as reservas uma única vez, calcula as noites de cada uma
+    dentro do período e entrega a reserva a todos os acumuladores.
+    Retorna {acumulador.nome: resultado}. Sem 'acumuladores', calcula o financeiro e os cancelamentos.
     """
-    stats = {"CANCELADA": 0, "NO_SHOW": 0, "TOTAL": 0}
-    
+    if acumuladores is None:
+        acumuladores = [AcumuladorFinanceiro(), AcumuladorCancelamentos()]
+    contexto = ContextoRelatorio(data_inicio, data_fim, total_quartos)
+    adicionar = [acumulador.adicionar for acumulador in acumuladores]
+
     for reserva in reservas:
-        # Verifica se a reserva tem interseção com o período
-        if _interseccao_dias(reserva, data_inicio, data_fim) > 0 or (data_inicio <= reserva.data_entrada <= data_fim):
-            if reserva.status == "CANCELADA":
-                stats["CANCELADA"] += 1
-            elif reserva.status == "NO_SHOW":
-                stats["NO_SHOW"] += 1
-    
-    stats["TOTAL"] = stats["CANCELADA"] + stats["NO_SHOW"]
-    return stats
\ No newline at end of file
+        dias_interseccao = _interseccao_dias(reserva, data_inicio, data_fim)
+        for funcao in adicionar:
+            funcao(reserva, dias_interseccao, contexto)
+
+    return {acumulador.nome: acumulador.resultado(contexto) for acumulador in acumuladores}
+
+@medir("reports.calcular_metricas_financeiras")
+def calcular_metricas_financeiras(reservas: Union[Iterable[Reserva], ReservaStore], data_inicio: date, data_fim: date,
+                                  total_quartos: int, trabalhadores: Optional[int] = None) -> Dict[str, float]:
+    """
+    Gera um dicionário com Taxa de Ocupação, ADR e RevPAR.
+    Fórmulas baseadas no documento de requisitos.
+    'reservas' pode ser qualquer iterável (ex: iterar_dados), percorrido uma única vez,
+    ou um ReservaStore (cálculo vetorizado sobre as colunas).
+    Com 'trabalhadores' > 1, o cálculo é dividido entre processos (ver roomex.paralelo).
+    Para mais de um indicador sobre as mesmas reservas, prefira gerar_relatorio.
+    """
+    if isinstance(reservas, ReservaStore):
+        return reservas.metricas_financeiras(data_inicio, data_fim, total_quartos)
+    if trabalhadores is not None and trabalhadores > 1:
+        from roomex.paralelo import relatorio_paralelo
+        return relatorio_paralelo(reservas, data_inicio, data_fim, total_quartos, trabalhadores)[0]
+    return gerar_relatorio(reservas, data_inicio, data_fim, total_quartos, [AcumuladorFinanceiro()])["financeiro"]
+
+@medir("reports.relatorio_cancelamentos")
+def relatorio_cancelamentos(reservas: Union[Iterable[Reserva], ReservaStore], data_inicio: date, data_fim: date,
+                            trabalhadores: Optional[int] = None) -> Dict[str, int]:
+    """
+    Conta cancelamentos e No-Shows que ocorreriam dentro do período.
+    'reservas' pode ser qualquer iterável, percorrido uma única vez, ou um ReservaStore.
+    Com 'trabalhadores' > 1, a contagem é dividida entre processos (ver roomex.paralelo).
+    """
+    if isinstance(reservas, ReservaStore):
+        return reservas.cancelamentos(data_inicio, data_fim)
+    if trabalhadores is not None and trabalhadores > 1:
+        from roomex.paralelo import relatorio_paralelo
+        return relatorio_paralelo(reservas, data_inicio, data_fim, 1, trabalhadores)[1]
+    return gerar_relatorio(reservas, data_inicio, data_fim, 0, [AcumuladorCancelamentos()])["cancelamentos"]
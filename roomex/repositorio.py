@@ -0,0 +1,423 @@
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from roomex.models import Quarto, Reserva, Pagamento, Adicional
+from roomex.disponibilidade import IndiceDisponibilidade, STATUS_OCUPANTES
+from roomex.agregados import AgregadosDiarios
+from roomex.instrumentacao import medir
+from roomex.armazenamento import Armazenamento, ArmazenamentoJSON
+from roomex.dados import versao_configuracoes
+from roomex.dinheiro import para_reais
+
+# Status cujo saldo entra no total em aberto do hotel (hóspedes na casa)
+STATUS_EM_ABERTO = ("ATIVA",)
+
+class Repositorio:
+    """
+    Estado do sistema em memória: quartos e reservas com índices de busca.
+
+    Além da lista de reservas (na ordem de criação), mantém dicionários por número
+    de quarto, por documento do hóspede e por status. Os índices são atualizados
+    incrementalmente observando as mudanças de cada reserva.
+
+    Quando ligado a um Armazenamento, cada mudança também vira um evento entregue
+    ao backend (diário JSON, transação SQLite...), sem regravar o histórico inteiro.
+
+    Aberto a partir de um backend, só as reservas vivas (PENDENTE/CONFIRMADA/ATIVA) são
+    carregadas na hora; o histórico vem na primeira consulta que precisar dele.
+    """
+    def __init__(self, quartos: Iterable[Quarto] = (), reservas: Iterable[Reserva] = ()):
+        self._quartos: Dict[int, Quarto] = {}
+        # Reservas na ordem de criação; None marca as do histórico ainda não carregadas
+        self._reservas: List[Optional[Reserva]] = []
+        self._carregar_historico: Optional[Callable[[], List[Tuple[int, Reserva]]]] = None
+        self._por_documento: Dict[str, List[Reserva]] = {}
+        # Cada status aponta para um dicionário id(reserva) -> reserva (mantém a ordem de inserção)
+        self._por_status: Dict[str, Dict[int, Reserva]] = {}
+        self.indice = IndiceDisponibilidade()
+        # Posição de cada reserva na lista (id(reserva) -> posição), usada nos eventos do diário
+        self._posicoes: Dict[int, int] = {}
+        # Saldo de cada reserva ATIVA (id(reserva) -> centavos) e a soma de todos eles,
+        # atualizados a cada evento: a auditoria noturna não precisa percorrer as contas
+        self._saldos: Dict[int, int] = {}
+        self._devedores: Dict[int, Reserva] = {}
+        self._saldo_em_aberto = 0
+        self._versao_saldos = versao_configuracoes()
+        # KPIs por dia, mantidos pelos eventos das reservas (relatórios sem varrer o histórico)
+        self.agregados = AgregadosDiarios()
+        # True quando os agregados vieram do disco e já contam as reservas do snapshot
+        self._agregados_do_snapshot = False
+
+        self.armazenamento: Optional[Armazenamento] = None
+        self._observador = self._ao_mudar_reserva
+        self._reproduzindo = False
+        # Eventos retidos por agrupar_eventos() (None: cada evento vai direto ao backend)
+        self._eventos_retidos: Optional[List[dict]] = None
+        # Thread dona do grupo aberto e persistência pedida por ela dentro dele
+        self._thread_do_grupo: Optional[int] = None
+        self._persistir_ao_entregar = False
+
+        for quarto in quartos:
+            self.adicionar_quarto(quarto)
+        for reserva in reservas:
+            self.adicionar_reserva(reserva, verificar=False)
+
+    @classmethod
+    def abrir(cls, armazenamento: Armazenamento) -> 'Repositorio':
+        """
+        Carrega quartos e reservas do backend, reaplica os eventos pendentes
+        e passa a enviar para ele cada mudança.
+        """
+        repo = cls(armazenamento.carregar_quartos())
+        dados_agregados = armazenamento.carregar_agregados()
+        agregados = AgregadosDiarios.from_dict(dados_agregados) if dados_agregados is not None else None
+        if agregados is not None:
+            # Agregados gravados com este snapshot: as reservas dele já estão contabilizadas
+            repo.agregados = agregados
+            repo._agregados_do_snapshot = True
+
+        total, imediatas, carregar_historico = armazenamento.carregar_reservas_adiado(repo._quartos, STATUS_OCUPANTES)
+        repo._reservas = [None] * total
+        for posicao, reserva in imediatas:
+            repo._incluir(reserva, posicao, verificar=False, contabilizar=not repo._agregados_do_snapshot)
+        repo._carregar_historico = carregar_historico
+
+        # Eventos já aceitos antes: reaplicados sem nova verificação de overbooking
+        repo._reproduzindo = True
+        repo.indice.verificar_mudancas = False
+        try:
+            for evento in armazenamento.eventos_pendentes():
+                repo.aplicar_evento(evento)
+        finally:
+            repo._reproduzindo = False
+            repo.indice.verificar_mudancas = True
+        repo.armazenamento = armazenamento
+        return repo
+
+    @classmethod
+    def carregar(cls, arquivo_quartos: str, arquivo_reservas: str,
+                 arquivo_diario: Optional[str] = None) -> 'Repositorio':
+        """
+        Carrega quartos e reservas dos arquivos JSON e monta os índices.
+        Com 'arquivo_diario', reaplica sobre o snapshot os eventos gravados depois dele.
+        """
+        return cls.abrir(ArmazenamentoJSON(arquivo_quartos, arquivo_reservas, arquivo_diario))
+
+    # --- Quartos ---
+
+    @property
+    def quartos(self) -> List[Quarto]:
+        return list(self._quartos.values())
+
+    @property
+    def quartos_por_numero(self) -> Dict[int, Quarto]:
+        return self._quartos
+
+    def adicionar_quarto(self, quarto: Quarto):
+        if quarto.numero in self._quartos:
+            raise ValueError(f"Quarto {quarto.numero} já cadastrado.")
+        self._quartos[quarto.numero] = quarto
+        self.indice.registrar_quarto(quarto)
+
+    def buscar_quarto(self, numero: int) -> Optional[Quarto]:
+        return self._quartos.get(numero)
+
+    # --- Reservas ---
+
+    @property
+    def reservas(self) -> List[Reserva]:
+        """Todas as reservas, na ordem de criação (carrega o histórico, se ainda faltar)."""
+        self._garantir_historico()
+        return self._reservas
+
+    @property
+    def quantidade_reservas(self) -> int:
+        """Total de reservas, sem precisar carregar o histórico."""
+        return len(self._reservas)
+
+    @property
+    def historico_carregado(self) -> bool:
+        return self._carregar_historico is None
+
+    def _garantir_historico(self):
+        if self._carregar_historico is None:
+            return
+        carregar, self._carregar_historico = self._carregar_historico, None
+        for posicao, reserva in carregar():
+            if self._reservas[posicao] is not None:
+                continue  # já carregada (no SQLite, uma reserva viva que virou histórico)
+            self._incluir(reserva, posicao, verificar=False, contabilizar=not self._agregados_do_snapshot)
+        # Refaz a ordem dos índices por documento e por status (ordem de criação, como sem carga adiada)
+        self._por_documento = {}
+        self._por_status = {}
+        for reserva in self._reservas:
+            self._por_documento.setdefault(reserva.hospede.documento, []).append(reserva)
+            self._por_status.setdefault(reserva.status, {})[id(reserva)] = reserva
+
+    def adicionar_reserva(self, reserva: Reserva, verificar: bool = True):
+        """
+        Inclui a reserva no sistema. Com verificar=True, recusa overbooking (ValueError).
+        """
+        posicao = len(self._reservas)
+        self._reservas.append(None)
+        try:
+            self._incluir(reserva, posicao, verificar, contabilizar=True)
+        except ValueError:
+            self._reservas.pop()
+            raise
+        self._registrar({"evento": "reserva", "posicao": posicao, "dados": reserva.to_dict()})
+
+    def _incluir(self, reserva: Reserva, posicao: int, verificar: bool, contabilizar: bool):
+        self.indice.adicionar(reserva, verificar=verificar)
+        self._posicoes[id(reserva)] = posicao
+        self._reservas[posicao] = reserva
+        self._por_documento.setdefault(reserva.hospede.documento, []).append(reserva)
+        self._por_status.setdefault(reserva.status, {})[id(reserva)] = reserva
+        reserva.registrar_observador(self._observador)
+        self.agregados.acompanhar(reserva, contabilizar=contabilizar)
+        self._atualizar_saldo(reserva)
+
+    def _ao_mudar_reserva(self, reserva: Reserva, evento: str, **detalhes):
+        if evento == "validar":
+            return  # quem valida overbooking é o índice
+        posicao = self._posicoes[id(reserva)]
+        self._atualizar_saldo(reserva)
+        if evento == "status":
+            anteriores = self._por_status.get(detalhes["anterior"])
+            if anteriores is not None:
+                anteriores.pop(id(reserva), None)
+            self._por_status.setdefault(reserva.status, {})[id(reserva)] = reserva
+            self._registrar({"evento": "status", "posicao": posicao, "status": reserva.status})
+        elif evento == "datas":
+            self._registrar({"evento": "datas", "posicao": posicao,
+                             "data_entrada": reserva.data_entrada.isoformat(),
+                             "data_saida": reserva.data_saida.isoformat()})
+        elif evento == "pagamento":
+            # "item" é a posição do lançamento na lista: torna a reaplicação idempotente
+            self._registrar({"evento": "pagamento", "posicao": posicao, "item": len(reserva.pagamentos) - 1,
+                             "dados": detalhes["pagamento"].to_dict()})
+        elif evento == "adicional":
+            self._registrar({"evento": "adicional", "posicao": posicao, "item": len(reserva.adicionais) - 1,
+                             "dados": detalhes["adicional"].to_dict()})
+
+    # --- Persistência ---
+
+    def _registrar(self, evento: dict):
+        if self.armazenamento is None or self._reproduzindo:
+            return
+        if self._eventos_retidos is not None:
+            self._eventos_retidos.append(evento)
+            return
+        self.armazenamento.registrar(evento)
+
+    @contextmanager
+    def agrupar_eventos(self, trava=None):
+        """
+        Retém os eventos gerados dentro do bloco e os entrega ao backend de uma vez no fim
+        (uma gravação no diário, uma transação no SQLite), em vez de um por mudança.
+        A 'trava' (ex: a do gravador em segundo plano) é segurada só durante a entrega.
+        Um persistir() pedido dentro do grupo (na mesma thread) é feito logo após a entrega.
+        """
+        if self._eventos_retidos is not None:
+            # Já dentro de um grupo: os eventos seguem para o grupo externo
+            yield
+            return
+        self._eventos_retidos = []
+        self._thread_do_grupo = threading.get_ident()
+        try:
+            yield
+        finally:
+            eventos, self._eventos_retidos = self._eventos_retidos, None
+            persistir, self._persistir_ao_entregar = self._persistir_ao_entregar, False
+            self._thread_do_grupo = None
+            with trava if trava is not None else nullcontext():
+                if eventos and self.armazenamento is not None:
+                    self.armazenamento.registrar_varios(eventos)
+                if persistir:
+                    self.persistir()
+
+    def aplicar_evento(self, evento: dict):
+        """
+        Reaplica um evento do diário sobre o estado em memória.
+        Eventos já refletidos no snapshot são ignorados, então reaplicar é seguro
+        mesmo se a queda ocorreu entre a gravação do snapshot e a limpeza do diário.
+        """
+        tipo = evento["evento"]
+        posicao = evento["posicao"]
+        if tipo == "reserva":
+            if posicao >= len(self._reservas):
+                reserva = Reserva.from_dict(evento["dados"], self._quartos, confiavel=True)
+                self.adicionar_reserva(reserva, verificar=False)
+            return
+
+        reserva = self._reservas[posicao]
+        if reserva is None:
+            # Evento sobre uma reserva do histórico ainda não carregado
+            self._garantir_historico()
+            reserva = self._reservas[posicao]
+        if tipo == "status":
+            reserva.status = evento["status"]
+        elif tipo == "datas":
+            nova_entrada = date.fromisoformat(evento["data_entrada"])
+            nova_saida = date.fromisoformat(evento["data_saida"])
+            # A ordem das atribuições evita recusar estados intermediários
+            if nova_entrada < reserva.data_saida:
+                reserva.data_entrada = nova_entrada
+                reserva.data_saida = nova_saida
+            else:
+                reserva.data_saida = nova_saida
+                reserva.data_entrada = nova_entrada
+        elif tipo == "pagamento":
+            if evento["item"] >= len(reserva.pagamentos):
+                reserva.registrar_pagamento(Pagamento.from_dict(evento["dados"], confiavel=True))
+        elif tipo == "adicional":
+            if evento["item"] >= len(reserva.adicionais):
+                reserva.registrar_adicional(Adicional.from_dict(evento["dados"], confiavel=True))
+
+    def _exigir_armazenamento(self) -> Armazenamento:
+        if self.armazenamento is None:
+            raise ValueError("Repositório sem armazenamento configurado.")
+        return self.armazenamento
+
+    def compactar(self):
+        """
+        Consolida o estado no backend (no JSON: grava o snapshot e esvazia o diário),
+        junto com os KPIs materializados.
+        """
+        armazenamento = self._exigir_armazenamento()
+        # O histórico não carregado segue como None: o backend o regrava como estava
+        armazenamento.compactar(self._reservas)
+        armazenamento.salvar_agregados(self._validar_agregados().to_dict())
+
+    def persistir(self):
+        """
+        Garante que o estado atual está em disco.
+        Os eventos já foram entregues ao backend; ele decide se precisa compactar.
+        Dentro de agrupar_eventos os eventos ainda não chegaram a ele: a persistência
+        fica para o fim do grupo, para os agregados gravados corresponderem ao backend.
+        """
+        armazenamento = self._exigir_armazenamento()
+        if self._eventos_retidos is not None and self._thread_do_grupo == threading.get_ident():
+            self._persistir_ao_entregar = True
+            return
+        if armazenamento.persistir(self._reservas):
+            armazenamento.salvar_agregados(self._validar_agregados().to_dict())
+
+    def fechar(self):
+        if self.armazenamento is not None:
+            self.armazenamento.fechar()
+
+    # --- KPIs materializados ---
+
+    def _validar_agregados(self) -> AgregadosDiarios:
+        if not self._agregados_do_snapshot:
+            # Sem agregados gravados, o histórico precisa ser contabilizado agora
+            self._garantir_historico()
+        # Com o settings.json recarregado os preços mudam: remonta os agregados uma vez
+        if self.agregados.versao != versao_configuracoes():
+            for reserva in self.reservas:
+                reserva.remover_observador(self.agregados._observador)
+            self.agregados = AgregadosDiarios()
+            for reserva in self.reservas:
+                self.agregados.acompanhar(reserva)
+        return self.agregados
+
+    @medir("Repositorio.metricas_do_periodo")
+    def metricas_do_periodo(self, data_inicio: date, data_fim: date) -> Dict[str, dict]:
+        """
+        Financeiro, cancelamentos e série mensal do período, somando os baldes diários
+        materializados (tempo quase constante, qualquer que seja o tamanho do histórico).
+        """
+        agregados = self._validar_agregados()
+        total_quartos = len(self._quartos)
+        return {
+            "financeiro": agregados.metricas_financeiras(data_inicio, data_fim, total_quartos),
+            "cancelamentos": agregados.cancelamentos(data_inicio, data_fim),
+            "serie_mensal": agregados.serie_mensal(data_inicio, data_fim, total_quartos),
+        }
+
+    # --- Saldos ---
+
+    def _atualizar_saldo(self, reserva: Reserva):
+        """Troca a contribuição da reserva no total em aberto pela atual."""
+        chave = id(reserva)
+        anterior = self._saldos.pop(chave, 0)
+        self._devedores.pop(chave, None)
+        self._saldo_em_aberto -= anterior
+        if reserva.status in STATUS_EM_ABERTO:
+            saldo = reserva.saldo_centavos
+            self._saldos[chave] = saldo
+            self._saldo_em_aberto += saldo
+            if saldo > 0:
+                self._devedores[chave] = reserva
+
+    def _validar_saldos(self):
+        # Tarifas sazonais mudaram (settings.json recarregado): os saldos guardados
+        # podem não valer mais, então são recalculados uma vez
+        versao = versao_configuracoes()
+        if versao != self._versao_saldos:
+            self._versao_saldos = versao
+            for reserva in list(self.reservas_por_status(*STATUS_EM_ABERTO)):
+                self._atualizar_saldo(reserva)
+
+    def saldo_em_aberto_centavos(self) -> int:
+        """
+        Soma dos saldos de todas as reservas ATIVAS, em centavos.
+        Acompanha pagamentos, adicionais, datas, status e o settings.json; se a tarifa
+        de um quarto mudar com hóspede na casa, o saldo dele é refeito no próximo evento da reserva.
+        """
+        self._validar_saldos()
+        return self._saldo_em_aberto
+
+    def saldo_em_aberto(self) -> float:
+        return para_reais(self.saldo_em_aberto_centavos())
+
+    def devedores(self) -> List[Reserva]:
+        """Reservas ATIVAS com saldo a pagar (auditoria noturna)."""
+        self._validar_saldos()
+        return list(self._devedores.values())
+
+    def reservas_por_documento(self, documento: str) -> List[Reserva]:
+        self._garantir_historico()
+        return list(self._por_documento.get(documento, []))
+
+    def reservas_por_status(self, *status: str) -> List[Reserva]:
+        if any(s not in STATUS_OCUPANTES for s in status):
+            self._garantir_historico()
+        resultado = []
+        for s in status:
+            resultado.extend(self._por_status.get(s, {}).values())
+        return resultado
+
+    def contar_por_status(self, status: str) -> int:
+        if status not in STATUS_OCUPANTES:
+            self._garantir_historico()
+        return len(self._por_status.get(status, {}))
+
+    def reservas_no_periodo(self, data_inicio: date, data_fim: date) -> List[Reserva]:
+        """
+        Reservas com noites em [data_inicio, data_fim) ou com entrada dentro do período.
+        Se o backend souber filtrar por data (SQLite), ele devolve as posições e o resultado
+        são os objetos vivos do repositório, como no JSON. Com eventos ainda retidos
+        (agrupar_eventos) o banco está atrás da memória, e o filtro é feito aqui.
+        """
+        consulta = getattr(self.armazenamento, "posicoes_no_periodo", None)
+        if consulta is not None and not self._eventos_retidos:
+            posicoes = consulta(data_inicio, data_fim)
+            if any(self._reservas[posicao] is None for posicao in posicoes):
+                self._garantir_historico()
+            return [self._reservas[posicao] for posicao in posicoes]
+        return [r for r in self.reservas if r.data_entrada <= data_fim and r.data_saida > data_inicio]
+
+    def buscar_reserva_por_quarto(self, numero_quarto: int,
+                                  status: Iterable[str] = ("PENDENTE", "ATIVA")) -> Optional[Reserva]:
+        """
+        Busca a reserva (por ordem de entrada) do quarto com um dos status informados.
+        Só olha as reservas vivas (PENDENTE/CONFIRMADA/ATIVA) daquele quarto,
+        guardadas no índice de disponibilidade.
+        """
+        for reserva in self.indice.reservas_do_quarto(numero_quarto):
+            if reserva.status in status:
+                return reserva
+        return None
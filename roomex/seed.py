@@ -1,6 +1,9 @@
-from roomex.models import Quarto
+from roomex.models import Quarto, Hospede, Reserva, Pagamento, Adicional
 from roomex.dados import salvar_dados
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
 import os
+import random
 
 def criar_dados_iniciais():
     """
@@ -34,5 +37,74 @@ def criar_dados_iniciais():
     
     print(f"✅ Sucesso! {len(quartos)} quartos foram salvos em '{arquivo_quartos}'.")
 
+def gerar_quartos(quantidade: int) -> List[Quarto]:
+    """
+    Gera 'quantidade' quartos repetindo o perfil do seed (andares de 100 quartos).
+    """
+    perfis = [("SIMPLES", 1, 100.00), ("SIMPLES", 2, 120.00), ("DUPLO", 2, 180.00),
+              ("DUPLO", 3, 200.00), ("LUXO", 4, 450.00)]
+    quartos = []
+    for i in range(quantidade):
+        tipo, capacidade, tarifa = perfis[i % len(perfis)]
+        numero = (i // 100 + 1) * 1000 + i % 100
+        quartos.append(Quarto(numero=numero, tipo=tipo, capacidade=capacidade, tarifa_base=tarifa))
+    return quartos
+
+def gerar_reservas(quartos: List[Quarto], quantidade: int, semente: int = 42,
+                   inicio: date = date(2023, 1, 1), hoje: Optional[date] = None) -> List[Reserva]:
+    """
+    Gera 'quantidade' reservas sintéticas (para testes de carga), sem overbooking:
+    cada quarto recebe estadias em sequência, com intervalos livres entre elas.
+    Hóspedes se repetem (clientes recorrentes) e os status seguem o tempo: reservas
+    passadas estão FINALIZADA/CANCELADA/NO_SHOW, as futuras PENDENTE/CONFIRMADA.
+    Informe 'hoje' para obter sempre os mesmos status (ex: benchmarks comparados entre dias).
+    """
+    aleatorio = random.Random(semente)
+    hoje = hoje or date.today()
+    hospedes = [Hospede(f"Hóspede {i}", f"{i:011d}", f"hospede{i}@email.com", f"(88) 9{i:08d}")
+                for i in range(max(1, quantidade // 4))]
+    origens = ["Balcão", "Site", "Telefone", "Booking", "Expedia"]
+    proxima_data = {q.numero: inicio + timedelta(days=aleatorio.randint(0, 6)) for q in quartos}
+
+    reservas = []
+    for i in range(quantidade):
+        quarto = quartos[i % len(quartos)]
+        # Estadias curtas são as mais comuns (1 a 14 noites, média perto de 3)
+        noites = min(14, 1 + int(aleatorio.expovariate(1 / 2.5)))
+        entrada = proxima_data[quarto.numero]
+        saida = entrada + timedelta(days=noites)
+        proxima_data[quarto.numero] = saida + timedelta(days=aleatorio.randint(0, 3))
+
+        reserva = Reserva(aleatorio.choice(hospedes), quarto, aleatorio.randint(1, quarto.capacidade),
+                          aleatorio.choice(origens), entrada, saida)
+        sorteio = aleatorio.random()
+        if saida <= hoje:
+            reserva.status = "CANCELADA" if sorteio < 0.08 else "NO_SHOW" if sorteio < 0.11 else "FINALIZADA"
+        elif entrada <= hoje:
+            reserva.status = "ATIVA"
+        else:
+            reserva.status = "CANCELADA" if sorteio < 0.08 else "CONFIRMADA" if sorteio < 0.6 else "PENDENTE"
+
+        if reserva.status in ("ATIVA", "FINALIZADA") and aleatorio.random() < 0.4:
+            reserva.adicionais.append(Adicional("Frigobar", round(aleatorio.uniform(5, 80), 2)))
+        if reserva.status == "FINALIZADA":
+            reserva.pagamentos.append(Pagamento(saida, "Cartão", reserva.calcular_valor_total()))
+        reservas.append(reserva)
+    return reservas
+
+def gerar_hotel(num_quartos: int, num_reservas: int, semente: int = 42,
+                hoje: Optional[date] = None) -> Tuple[List[Quarto], List[Reserva]]:
+    """
+    Hotel sintético completo: 'num_quartos' quartos e 'num_reservas' reservas distribuídas entre eles.
+    Sem 'hoje', a data de referência é fixada no meio do histórico gerado, para que metade
+    das estadias seja passada e a outra metade futura em qualquer dia em que rodar.
+    """
+    quartos = gerar_quartos(num_quartos)
+    if hoje is None:
+        # Cada quarto recebe ~num_reservas/num_quartos estadias de ~3,5 noites + ~1,5 de intervalo
+        dias_de_historico = num_reservas * 5 // max(1, num_quartos)
+        hoje = date(2023, 1, 1) + timedelta(days=dias_de_historico // 2)
+    return quartos, gerar_reservas(quartos, num_reservas, semente, hoje=hoje)
+
 if __name__ == "__main__":
     criar_dados_iniciais()
\ No newline at end of file
@@ -0,0 +1,176 @@
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Union
+from roomex.models import Quarto, Reserva
+from roomex.precos import cotar_lote_centavos
+from roomex.dinheiro import dividir_centavos, para_reais
+from roomex.reports import TAMANHO_BLOCO_COTACAO, Acumulador, ContextoRelatorio, gerar_relatorio
+
+# Séries temporais (por noite ou por mês) de ocupação, receita, ADR e RevPAR.
+# Cada reserva marca só o início e o fim do seu intervalo num "array de diferenças";
+# uma soma de prefixos no fim reconstrói o valor de cada noite. Custo: O(reservas + dias).
+
+STATUS_SEM_RECEITA = ("CANCELADA", "NO_SHOW", "PENDENTE")
+AGRUPAMENTOS = ("tipo", "origem")
+
+class _Diferencas:
+    """Arrays de diferenças de um grupo: quartos ocupados e receita (centavos) por noite."""
+    __slots__ = ("ocupacao", "receita")
+
+    def __init__(self, dias: int):
+        self.ocupacao = [0] * (dias + 1)
+        self.receita = [0] * (dias + 1)
+
+    def somar(self, array: List[int], inicio: int, fim: int, valor: int):
+        # Soma 'valor' em todas as noites de [inicio, fim) com dois acessos
+        array[inicio] += valor
+        array[fim] -= valor
+
+
+class AcumuladorSerie(Acumulador):
+    """
+    Série temporal do período para o relatório unificado (gerar_relatorio).
+
+    A receita de cada reserva é distribuída pelas suas noites em centavos inteiros
+    (total // noites em cada uma, e o resto, um centavo por noite, nas primeiras),
+    então a soma das noites de uma estadia completa é exatamente o seu valor total.
+    'agrupar_por' pode ser None, "tipo" (Quarto.tipo) ou "origem" (Reserva.origem);
+    'periodo' é "dia" ou "mes".
+    """
+    def __init__(self, quartos: Iterable[Quarto], agrupar_por: Optional[str] = None, periodo: str = "dia"):
+        if agrupar_por is not None and agrupar_por not in AGRUPAMENTOS:
+            raise ValueError(f"Agrupamento desconhecido: {agrupar_por}. Use 'tipo' ou 'origem'.")
+        if periodo not in ("dia", "mes"):
+            raise ValueError(f"Período desconhecido: {periodo}. Use 'dia' ou 'mes'.")
+        self.nome = "serie_diaria" if periodo == "dia" else "serie_mensal"
+        self.quartos = list(quartos)
+        self.agrupar_por = agrupar_por
+        self.periodo = periodo
+        self.candidatas: List[Reserva] = []
+        # grupo -> arrays de diferenças (criados no primeiro bloco, quando o período é conhecido)
+        self._grupos: Optional[Dict[str, _Diferencas]] = None
+
+    def adicionar(self, reserva: Reserva, dias_interseccao: int, contexto: ContextoRelatorio):
+        if dias_interseccao > 0 and reserva.status not in STATUS_SEM_RECEITA:
+            self.candidatas.append(reserva)
+            if len(self.candidatas) >= TAMANHO_BLOCO_COTACAO:
+                self._somar_bloco(contexto)
+
+    def _grupo(self, reserva: Reserva) -> str:
+        if self.agrupar_por == "tipo":
+            return reserva.quarto.tipo
+        if self.agrupar_por == "origem":
+            return reserva.origem
+        return "total"
+
+    def _quartos_disponiveis(self) -> Dict[str, int]:
+        if self.agrupar_por == "tipo":
+            disponiveis: Dict[str, int] = {}
+            for quarto in self.quartos:
+                disponiveis[quarto.tipo] = disponiveis.get(quarto.tipo, 0) + 1
+            return disponiveis
+        # Por origem (ou sem grupo) o inventário é o hotel inteiro
+        return {}
+
+    def _somar_bloco(self, contexto: ContextoRelatorio):
+        dias = max(contexto.dias_no_periodo, 0)
+        inicio = contexto.data_inicio.toordinal()
+        if self._grupos is None:
+            self._grupos = {grupo: _Diferencas(dias) for grupo in self._quartos_disponiveis()}
+        grupos = self._grupos
+
+        # Os valores totais do bloco são cotados de uma vez (vetorizado quando há NumPy)
+        for reserva, total in zip(self.candidatas, cotar_lote_centavos(self.candidatas)):
+            grupo = self._grupo(reserva)
+            diferencas = grupos.get(grupo)
+            if diferencas is None:
+                diferencas = grupos[grupo] = _Diferencas(dias)
+
+            entrada = reserva.data_entrada.toordinal() - inicio
+            saida = reserva.data_saida.toordinal() - inicio
+            a = max(entrada, 0)
+            b = min(saida, dias)
+            diferencas.somar(diferencas.ocupacao, a, b, 1)
+
+            base, resto = divmod(total, saida - entrada)
+            diferencas.somar(diferencas.receita, a, b, base)
+            fim_resto = min(entrada + resto, dias)
+            if fim_resto > a:
+                diferencas.somar(diferencas.receita, a, fim_resto, 1)
+        self.candidatas.clear()
+
+    def resultado(self, contexto: ContextoRelatorio) -> Union[Dict[str, list], Dict[str, Dict[str, list]]]:
+        dias = max(contexto.dias_no_periodo, 0)
+        disponiveis = self._quartos_disponiveis()
+        self._somar_bloco(contexto)
+        grupos = self._grupos
+
+        total_quartos = len(self.quartos)
+        series = {}
+        for grupo, diferencas in grupos.items():
+            # Soma de prefixos: valor de cada noite (a última posição é só o "fechamento")
+            ocupados = list(accumulate(diferencas.ocupacao))[:dias]
+            receitas = list(accumulate(diferencas.receita))[:dias]
+            series[grupo] = self._montar(contexto.data_inicio, ocupados, receitas,
+                                         disponiveis.get(grupo, total_quartos))
+
+        if self.agrupar_por is None:
+            return series.get("total") or self._montar(contexto.data_inicio, [0] * dias, [0] * dias, total_quartos)
+        return series
+
+    def _montar(self, data_inicio: date, ocupados: List[int], receitas: List[int],
+                quartos_disponiveis: int) -> Dict[str, list]:
+        datas = [data_inicio + timedelta(days=i) for i in range(len(ocupados))]
+        if self.periodo == "mes":
+            datas, ocupados, receitas, noites = _somar_por_mes(datas, ocupados, receitas)
+        else:
+            noites = [1] * len(datas)
+        return _metricas_da_serie(datas, ocupados, receitas, [quartos_disponiveis * n for n in noites])
+
+
+def _somar_por_mes(datas: List[date], ocupados: List[int], receitas: List[int]):
+    meses: List[date] = []
+    ocupados_mes: List[int] = []
+    receitas_mes: List[int] = []
+    noites_mes: List[int] = []
+    for dia, ocupado, receita in zip(datas, ocupados, receitas):
+        mes = dia.replace(day=1)
+        if not meses or meses[-1] != mes:
+            meses.append(mes)
+            ocupados_mes.append(0)
+            receitas_mes.append(0)
+            noites_mes.append(0)
+        ocupados_mes[-1] += ocupado
+        receitas_mes[-1] += receita
+        noites_mes[-1] += 1
+    return meses, ocupados_mes, receitas_mes, noites_mes
+
+def _metricas_da_serie(datas: List[date], ocupados: List[int], receitas: List[int],
+                       disponiveis: List[int]) -> Dict[str, list]:
+    """Colunas da série: uma lista por métrica, todas alinhadas com 'datas'."""
+    return {
+        "datas": datas,
+        "quartos_ocupados": ocupados,
+        "ocupacao": [round(o / d * 100, 2) if d else 0.0 for o, d in zip(ocupados, disponiveis)],
+        "receita": [para_reais(r) for r in receitas],
+        "adr": [para_reais(dividir_centavos(r, 1, o)) if o else 0.0 for o, r in zip(ocupados, receitas)],
+        "revpar": [para_reais(dividir_centavos(r, 1, d)) if d else 0.0 for r, d in zip(receitas, disponiveis)],
+    }
+
+def serie_diaria(reservas: Iterable[Reserva], data_inicio: date, data_fim: date, quartos: Iterable[Quarto],
+                 agrupar_por: Optional[str] = None):
+    """
+    Ocupação, receita, ADR e RevPAR de cada noite de [data_inicio, data_fim).
+    Sem 'agrupar_por' retorna um dicionário de colunas ({"datas": [...], "ocupacao": [...], ...});
+    com "tipo" ou "origem", um dicionário grupo -> colunas.
+    """
+    quartos = list(quartos)
+    acumulador = AcumuladorSerie(quartos, agrupar_por, "dia")
+    return gerar_relatorio(reservas, data_inicio, data_fim, len(quartos), [acumulador])[acumulador.nome]
+
+def serie_mensal(reservas: Iterable[Reserva], data_inicio: date, data_fim: date, quartos: Iterable[Quarto],
+                 agrupar_por: Optional[str] = None):
+    """Como serie_diaria, somando as noites de cada mês ("datas" traz o dia 1º de cada mês)."""
+    quartos = list(quartos)
+    acumulador = AcumuladorSerie(quartos, agrupar_por, "mes")
+    return gerar_relatorio(reservas, data_inicio, data_fim, len(quartos), [acumulador])[acumulador.nome]
@@ -0,0 +1,132 @@
+import pytest
+from datetime import date, timedelta
+from roomex import seed
+from roomex.models import Quarto, Hospede, Reserva
+from roomex.dados import salvar_dados
+from roomex.agregados import AgregadosDiarios
+from roomex.armazenamento import ArmazenamentoSQLite
+from roomex.repositorio import Repositorio
+from roomex.reports import calcular_metricas_financeiras, relatorio_cancelamentos
+from roomex.series import serie_mensal
+
+# Período que cobre todas as estadias geradas: o rateio por noite coincide com o dos relatórios
+INICIO, FIM = date(2022, 12, 1), date(2026, 1, 1)
+
+@pytest.fixture
+def cenario():
+    quartos = seed.gerar_quartos(12)
+    return quartos, seed.gerar_reservas(quartos, 300, semente=5)
+
+def test_agregados_iguais_aos_relatorios(cenario):
+    quartos, reservas = cenario
+    agregados = AgregadosDiarios()
+    for reserva in reservas:
+        agregados.acompanhar(reserva)
+
+    assert agregados.metricas_financeiras(INICIO, FIM, len(quartos)) == \
+        calcular_metricas_financeiras(reservas, INICIO, FIM, len(quartos))
+    assert agregados.cancelamentos(INICIO, FIM) == relatorio_cancelamentos(reservas, INICIO, FIM)
+    assert agregados.serie_mensal(INICIO, FIM, len(quartos)) == serie_mensal(reservas, INICIO, FIM, quartos)
+
+@pytest.mark.parametrize("inicio, fim", [
+    (date(2023, 3, 10), date(2023, 4, 17)),
+    (date(2023, 1, 5), date(2023, 2, 1)),
+    (date(2023, 6, 1), date(2023, 6, 2)),
+    (date(2024, 2, 14), date(2024, 11, 3)),
+])
+def test_periodos_parciais_iguais_aos_relatorios(cenario, inicio, fim):
+    quartos, reservas = cenario
+    agregados = AgregadosDiarios()
+    for reserva in reservas:
+        agregados.acompanhar(reserva)
+    recarregados = AgregadosDiarios.from_dict(agregados.to_dict())
+
+    esperado = calcular_metricas_financeiras(reservas, inicio, fim, len(quartos))
+    assert agregados.metricas_financeiras(inicio, fim, len(quartos)) == esperado
+    assert recarregados.metricas_financeiras(inicio, fim, len(quartos)) == esperado
+    esperado = relatorio_cancelamentos(reservas, inicio, fim)
+    assert agregados.cancelamentos(inicio, fim) == esperado
+    assert recarregados.cancelamentos(inicio, fim) == esperado
+
+def test_periodos_vazios_iguais_aos_relatorios(cenario):
+    _, reservas = cenario
+    agregados = AgregadosDiarios()
+    for reserva in reservas:
+        agregados.acompanhar(reserva)
+    vazio = {"CANCELADA": 0, "NO_SHOW": 0, "TOTAL": 0}
+
+    # Período invertido: nada conta
+    assert agregados.cancelamentos(date(2023, 4, 17), date(2023, 3, 10)) == vazio
+    assert relatorio_cancelamentos(reservas, date(2023, 4, 17), date(2023, 3, 10)) == vazio
+    # Período de tamanho zero: só as entradas no próprio dia, como no relatório
+    com_entrada = 0
+    for dia in (date(2023, 1, 1) + timedelta(days=i) for i in range(365)):
+        esperado = relatorio_cancelamentos(reservas, dia, dia)
+        assert agregados.cancelamentos(dia, dia) == esperado
+        com_entrada += esperado["TOTAL"]
+    assert com_entrada > 0
+
+def test_eventos_atualizam_os_baldes():
+    quarto = Quarto(101, "Simples", 1, 100.0)
+    reserva = Reserva(Hospede("Ana", "111", "a@a.com", "00"), quarto, 1, "Site", date(2025, 4, 1), date(2025, 4, 4))
+    agregados = AgregadosDiarios()
+    agregados.acompanhar(reserva)
+    mes = (date(2025, 4, 1), date(2025, 5, 1))
+    assert agregados.somar_periodo(*mes)["noites"] == 0  # PENDENTE não vende noites
+
+    reserva.realizar_checkin()
+    reserva.lancar_adicional("Frigobar", 12.5)
+    reserva.adicionar_pagamento(50.0, "Pix", date(2025, 4, 2))
+    reserva.data_saida = date(2025, 4, 6)
+    totais = agregados.somar_periodo(*mes)
+    assert totais["noites"] == 5
+    assert totais["receita"] == reserva.calcular_valor_total_centavos()
+    assert totais["recebido"] == 5000
+
+    reserva.status = "CANCELADA"
+    totais = agregados.somar_periodo(*mes)
+    assert (totais["noites"], totais["receita"], totais["canceladas"]) == (0, 0, 1)
+    assert agregados.somar_periodo(*mes, tipos=["Duplo"])["canceladas"] == 0
+
+def test_agregados_persistidos_com_o_snapshot(tmp_path, cenario):
+    quartos, reservas = cenario
+    arquivo_quartos = str(tmp_path / "quartos.json")
+    arquivo_reservas = str(tmp_path / "reservas.json")
+    salvar_dados(quartos, arquivo_quartos)
+    repo = Repositorio.carregar(arquivo_quartos, arquivo_reservas, str(tmp_path / "reservas.diario.jsonl"))
+    for reserva in reservas:
+        repo.adicionar_reserva(reserva, verificar=False)
+    repo.compactar()
+    esperado = repo.metricas_do_periodo(INICIO, FIM)
+
+    reaberto = Repositorio.carregar(arquivo_quartos, arquivo_reservas, str(tmp_path / "reservas.diario.jsonl"))
+    assert reaberto.agregados.dias == repo.agregados.dias
+    assert reaberto.metricas_do_periodo(INICIO, FIM) == esperado
+
+    # Eventos do diário, depois do snapshot, entram nos agregados carregados
+    reaberto.reservas_por_status("FINALIZADA")[0].status = "CANCELADA"
+    terceiro = Repositorio.carregar(arquivo_quartos, arquivo_reservas, str(tmp_path / "reservas.diario.jsonl"))
+    assert terceiro.metricas_do_periodo(INICIO, FIM) == reaberto.metricas_do_periodo(INICIO, FIM)
+    assert terceiro.metricas_do_periodo(INICIO, FIM)["cancelamentos"]["CANCELADA"] == \
+        esperado["cancelamentos"]["CANCELADA"] + 1
+
+def test_agregados_descartados_quando_o_banco_muda(tmp_path):
+    banco = ArmazenamentoSQLite(str(tmp_path / "hotel.db"))
+    banco.salvar_quartos([Quarto(101, "Simples", 1, 100.0)])
+    repo = Repositorio.abrir(banco)
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    reserva = Reserva(hospede, repo.buscar_quarto(101), 1, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    repo.adicionar_reserva(reserva)
+    reserva.realizar_checkin()
+    repo.compactar()
+    assert banco.carregar_agregados() is not None
+
+    # Uma alteração depois da gravação invalida os agregados: na reabertura eles são recalculados
+    reserva.lancar_adicional("Frigobar", 10.0)
+    assert banco.carregar_agregados() is None
+    repo.fechar()
+
+    reaberto = Repositorio.abrir(ArmazenamentoSQLite(str(tmp_path / "hotel.db")))
+    financeiro = reaberto.metricas_do_periodo(date(2025, 4, 1), date(2025, 5, 1))["financeiro"]
+    assert financeiro["receita_total"] == reserva.calcular_valor_total()
+    reaberto.fechar()
@@ -0,0 +1,114 @@
+# tests/test_armazenamento.py
+import pytest
+from datetime import date
+from roomex.models import Quarto, Hospede, Reserva
+from roomex.dados import salvar_dados, carregar_dados
+from roomex.armazenamento import Armazenamento, ArmazenamentoJSON, ArmazenamentoSQLite, abrir_armazenamento
+from roomex.repositorio import Repositorio
+
+def _banco_com_quartos(tmp_path):
+    banco = ArmazenamentoSQLite(str(tmp_path / "hotel.db"))
+    banco.salvar_quartos([Quarto(101, "Simples", 1, 100.0), Quarto(201, "Duplo", 2, 180.0)])
+    return banco
+
+def test_acoes_gravadas_no_sqlite(tmp_path):
+    repo = Repositorio.abrir(_banco_com_quartos(tmp_path))
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    reserva = Reserva(hospede, repo.buscar_quarto(201), 2, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    repo.adicionar_reserva(reserva)
+    reserva.realizar_checkin()
+    reserva.lancar_adicional("Frigobar", 12.5)
+    reserva.adicionar_pagamento(100.0, "Pix", date(2025, 4, 2))
+    repo.fechar()
+
+    reaberto = Repositorio.abrir(ArmazenamentoSQLite(str(tmp_path / "hotel.db")))
+    copia = reaberto.buscar_reserva_por_quarto(201)
+    assert copia.status == "ATIVA"
+    assert copia.hospede.nome == "Ana"
+    assert [a.valor for a in copia.adicionais] == [12.5]
+    assert copia.pagamentos[0].data == date(2025, 4, 2)
+    reaberto.fechar()
+
+def test_filtro_por_periodo_no_sql(tmp_path):
+    banco = _banco_com_quartos(tmp_path)
+    repo = Repositorio.abrir(banco)
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    quarto = repo.buscar_quarto(101)
+    for inicio, fim in [(date(2025, 3, 1), date(2025, 3, 5)), (date(2025, 4, 2), date(2025, 4, 6)),
+                        (date(2025, 5, 1), date(2025, 5, 2))]:
+        repo.adicionar_reserva(Reserva(hospede, quarto, 1, "Site", inicio, fim))
+
+    no_periodo = repo.reservas_no_periodo(date(2025, 4, 1), date(2025, 4, 30))
+    assert [(r.data_entrada, r.data_saida) for r in no_periodo] == [(date(2025, 4, 2), date(2025, 4, 6))]
+    # Os objetos vivos do repositório, não cópias lidas do banco
+    assert any(no_periodo[0] is reserva for reserva in repo.reservas)
+
+    # Mudança ainda retida num grupo: o banco está atrás, a memória responde
+    with repo.agrupar_eventos():
+        no_periodo[0].data_entrada = date(2025, 3, 20)
+        no_periodo[0].data_saida = date(2025, 3, 25)
+        assert repo.reservas_no_periodo(date(2025, 4, 1), date(2025, 4, 30)) == []
+    assert repo.reservas_no_periodo(date(2025, 4, 1), date(2025, 4, 30)) == []
+    repo.fechar()
+
+def test_dados_delegam_para_sqlite(tmp_path):
+    caminho = str(tmp_path / "hotel.sqlite")
+    salvar_dados([Quarto(101, "Simples", 1, 100.0)], caminho)
+    quartos = carregar_dados(caminho, Quarto)
+    assert quartos[0].tarifa_base == 100.0
+
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    salvar_dados([Reserva(hospede, quartos[0], 1, "Site", date(2025, 4, 1), date(2025, 4, 3))], caminho)
+    reservas = carregar_dados(caminho, Reserva, quartos)
+    assert reservas[0].quarto is quartos[0]
+
+def test_abrir_armazenamento_pelo_settings(tmp_path, monkeypatch):
+    from roomex import armazenamento as modulo
+    arquivos = [str(tmp_path / nome) for nome in ("quartos.json", "reservas.jsonl", "reservas.diario.jsonl")]
+    salvar_dados([Quarto(101, "Simples", 1, 100.0)], arquivos[0])
+    monkeypatch.setattr(modulo, "carregar_configuracoes", lambda: {})
+    assert isinstance(abrir_armazenamento(*arquivos), ArmazenamentoJSON)
+
+    # Com 'banco_dados', os arquivos JSON existentes são migrados para o banco na primeira abertura
+    monkeypatch.setattr(modulo, "carregar_configuracoes", lambda: {"banco_dados": str(tmp_path / "hotel.db")})
+    banco = abrir_armazenamento(*arquivos)
+    assert isinstance(banco, ArmazenamentoSQLite)
+    assert [q.numero for q in banco.carregar_quartos()] == [101]
+    banco.fechar()
+
+def test_agregados_do_sqlite_reaproveitados_na_reabertura(tmp_path):
+    caminho = str(tmp_path / "hotel.db")
+    repo = Repositorio.abrir(_banco_com_quartos(tmp_path))
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    reserva = Reserva(hospede, repo.buscar_quarto(201), 2, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    repo.adicionar_reserva(reserva)
+    # Como no menu: a ação inteira num grupo, com persistir() pedido dentro dele
+    with repo.agrupar_eventos():
+        reserva.realizar_checkin()
+        reserva.lancar_adicional("Frigobar", 12.5)
+        repo.persistir()
+    esperado = repo.metricas_do_periodo(date(2025, 4, 1), date(2025, 5, 1))
+    repo.fechar()
+
+    reaberto = Repositorio.abrir(ArmazenamentoSQLite(caminho))
+    assert reaberto._agregados_do_snapshot
+    assert reaberto.metricas_do_periodo(date(2025, 4, 1), date(2025, 5, 1)) == esperado
+    reaberto.buscar_reserva_por_quarto(201).adicionar_pagamento(10.0, "Pix", date(2025, 4, 2))
+    reaberto.fechar()
+
+    # Alterado depois da última gravação dos agregados: eles são remontados
+    remontado = Repositorio.abrir(ArmazenamentoSQLite(caminho))
+    assert not remontado._agregados_do_snapshot
+    remontado.fechar()
+
+def test_backend_incompleto_falha_ao_criar():
+    class SemCompactar(Armazenamento):
+        def carregar_quartos(self):
+            return []
+        def carregar_reservas(self, quartos_por_numero):
+            return []
+        def registrar(self, evento):
+            pass
+
+    with pytest.raises(TypeError):
+        SemCompactar()
@@ -0,0 +1,111 @@
+# tests/test_carga_adiada.py
+import json
+import os
+from datetime import date
+from roomex.models import Quarto, Hospede, Reserva
+from roomex.dados import salvar_dados, ler_registros
+from roomex.armazenamento import ArmazenamentoJSON, ArmazenamentoSQLite
+from roomex.cache_snapshot import CacheSnapshot
+from roomex.repositorio import Repositorio
+
+def _preparar(tmp_path):
+    """Hotel com uma reserva viva e duas no histórico (uma finalizada, uma cancelada)."""
+    arquivos = {
+        "quartos": str(tmp_path / "quartos.json"),
+        "reservas": str(tmp_path / "reservas.jsonl"),
+        "diario": str(tmp_path / "reservas.diario.jsonl"),
+    }
+    quartos = [Quarto(101, "Simples", 1, 100.0), Quarto(201, "Duplo", 2, 180.0)]
+    salvar_dados(quartos, arquivos["quartos"])
+    ana = Hospede("Ana", "111", "a@a.com", "00")
+    finalizada = Reserva(ana, quartos[0], 1, "Site", date(2025, 3, 1), date(2025, 3, 4))
+    finalizada.status = "FINALIZADA"
+    cancelada = Reserva(Hospede("Bia", "222", "b@b.com", "00"), quartos[1], 2, "Site", date(2025, 3, 10), date(2025, 3, 12))
+    cancelada.status = "CANCELADA"
+    viva = Reserva(ana, quartos[1], 2, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    salvar_dados([finalizada, cancelada, viva], arquivos["reservas"])
+    return arquivos
+
+def _abrir(arquivos):
+    return Repositorio.abrir(ArmazenamentoJSON(arquivos["quartos"], arquivos["reservas"], arquivos["diario"]))
+
+def test_historico_so_carrega_quando_preciso(tmp_path):
+    arquivos = _preparar(tmp_path)
+    repo = _abrir(arquivos)
+    assert not repo.historico_carregado
+    assert repo.quantidade_reservas == 3
+    assert repo.buscar_reserva_por_quarto(201).data_entrada == date(2025, 4, 1)
+    assert repo.contar_por_status("PENDENTE") == 1
+    assert not repo.historico_carregado
+
+    assert repo.contar_por_status("CANCELADA") == 1
+    assert repo.historico_carregado
+    assert [r.status for r in repo.reservas] == ["FINALIZADA", "CANCELADA", "PENDENTE"]
+    # Ordem de criação preservada também no índice por documento
+    assert [r.status for r in repo.reservas_por_documento("111")] == ["FINALIZADA", "PENDENTE"]
+    assert repo.reservas[0].hospede is repo.reservas[2].hospede
+
+def test_partida_a_quente_usa_o_cache(tmp_path):
+    arquivos = _preparar(tmp_path)
+    _abrir(arquivos).fechar()
+    cache = CacheSnapshot(arquivos["reservas"])
+    assert os.path.exists(cache.caminho)
+    total, imediatos, _ = cache.ler(("PENDENTE", "CONFIRMADA", "ATIVA"))
+    assert total == 3 and [posicao for posicao, _ in imediatos] == [2]
+
+    # Arquivo de origem alterado por fora: o cache deixa de valer
+    registros = ler_registros(arquivos["reservas"])
+    registros[2]["status"] = "CONFIRMADA"
+    with open(arquivos["reservas"], "w", encoding="utf-8") as arquivo:
+        arquivo.write("".join(json.dumps(registro) + "\n" for registro in registros))
+    estado = os.stat(arquivos["reservas"])
+    os.utime(arquivos["reservas"], ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000))
+    assert cache.ler(("PENDENTE", "CONFIRMADA", "ATIVA")) is None
+    assert _abrir(arquivos).buscar_reserva_por_quarto(201, ("CONFIRMADA",)) is not None
+
+def test_compactar_sem_carregar_historico(tmp_path):
+    arquivos = _preparar(tmp_path)
+    # A primeira compactação contabiliza o histórico para gravar os agregados
+    _abrir(arquivos).compactar()
+    repo = _abrir(arquivos)
+    repo.buscar_reserva_por_quarto(201).realizar_checkin()
+    repo.compactar()
+    assert not repo.historico_carregado
+
+    registros = ler_registros(arquivos["reservas"])
+    assert [registro["status"] for registro in registros] == ["FINALIZADA", "CANCELADA", "ATIVA"]
+    reaberto = _abrir(arquivos)
+    assert [r.hospede.nome for r in reaberto.reservas] == ["Ana", "Bia", "Ana"]
+
+def test_evento_do_diario_sobre_o_historico(tmp_path):
+    arquivos = _preparar(tmp_path)
+    repo = _abrir(arquivos)
+    finalizada = repo.reservas_por_status("FINALIZADA")[0]
+    finalizada.lancar_adicional("Lavanderia", 30.0)
+    repo.fechar()
+
+    reaberto = _abrir(arquivos)
+    assert reaberto.historico_carregado  # o diário tocou uma reserva antiga
+    assert [a.descricao for a in reaberto.reservas[0].adicionais] == ["Lavanderia"]
+
+def test_relatorio_com_historico_adiado(tmp_path):
+    arquivos = _preparar(tmp_path)
+    metricas = _abrir(arquivos).metricas_do_periodo(date(2025, 3, 1), date(2025, 3, 31))
+    assert metricas["cancelamentos"]["CANCELADA"] == 1
+
+def test_sqlite_carrega_so_as_vivas(tmp_path):
+    arquivos = _preparar(tmp_path)
+    banco = ArmazenamentoSQLite(str(tmp_path / "hotel.db"))
+    banco.salvar_quartos(_abrir(arquivos).quartos)
+    banco.importar(_abrir(arquivos).reservas)
+    repo = Repositorio.abrir(banco)
+    assert not repo.historico_carregado
+    viva = repo.buscar_reserva_por_quarto(201)
+    viva.realizar_checkin()
+    viva.adicionar_pagamento(viva.saldo, "Pix", date(2025, 4, 3))
+    viva.realizar_checkout()
+
+    # A reserva que virou histórico depois da abertura não é duplicada
+    assert [r.status for r in repo.reservas] == ["FINALIZADA", "CANCELADA", "FINALIZADA"]
+    assert repo.contar_por_status("FINALIZADA") == 2
+    repo.fechar()
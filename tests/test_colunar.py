@@ -0,0 +1,48 @@
+import pytest
+from datetime import date
+from roomex import seed
+from roomex.dados import salvar_dados, iterar_registros
+from roomex.reports import calcular_metricas_financeiras, relatorio_cancelamentos
+
+np = pytest.importorskip("numpy")
+from roomex.colunar import ReservaStore
+
+@pytest.fixture
+def cenario():
+    quartos = seed.gerar_quartos(20)
+    reservas = seed.gerar_reservas(quartos, 600, semente=7)
+    return quartos, reservas
+
+def test_store_reproduz_relatorios(cenario):
+    quartos, reservas = cenario
+    store = ReservaStore.de_reservas(reservas)
+    assert len(store) == len(reservas)
+
+    for inicio, fim in [(date(2023, 1, 1), date(2023, 12, 31)), (date(2023, 3, 10), date(2023, 4, 2))]:
+        esperado = calcular_metricas_financeiras(reservas, inicio, fim, len(quartos))
+        assert calcular_metricas_financeiras(store, inicio, fim, len(quartos)) == esperado
+        assert relatorio_cancelamentos(store, inicio, fim) == relatorio_cancelamentos(reservas, inicio, fim)
+
+def test_store_de_registros_sem_objetos(cenario, tmp_path):
+    quartos, reservas = cenario
+    arquivo = str(tmp_path / "reservas.json")
+    salvar_dados(reservas, arquivo)
+
+    store = ReservaStore.de_registros(iterar_registros(arquivo), {q.numero: q for q in quartos})
+    referencia = ReservaStore.de_reservas(reservas)
+    assert np.array_equal(store.entrada, referencia.entrada)
+    assert np.array_equal(store.total, referencia.total)
+    assert np.array_equal(store.pago, referencia.pago)
+
+def test_views_nao_copiam_colunas(cenario):
+    _, reservas = cenario
+    store = ReservaStore.de_reservas(reservas)
+
+    janela = store.janela(date(2023, 2, 1), date(2023, 2, 28))
+    assert np.shares_memory(janela.entrada, store.entrada)
+    assert all(e <= date(2023, 2, 28).toordinal() for e in janela.entrada)
+
+    canceladas = store.com_status("CANCELADA")
+    assert canceladas.entrada is store.entrada
+    assert len(canceladas) == sum(1 for r in reservas if r.status == "CANCELADA")
+    assert len(canceladas.copiar()) == len(canceladas)
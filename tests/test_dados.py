@@ -36,4 +36,147 @@ def test_salvar_e_carregar_quartos(tmp_path):
 
 def test_carregar_arquivo_inexistente():
     resultado = carregar_dados("arquivo_fantasma.json", Quarto)
-    assert resultado == []
\ No newline at end of file
+    assert resultado == []
+
+def test_cache_configuracoes_recarrega_por_mtime(tmp_path, monkeypatch):
+    import json
+    from roomex import dados
+
+    arquivo_config = tmp_path / "settings.json"
+    arquivo_config.write_text(json.dumps({
+        "multiplicador_fim_de_semana": 1.2,
+        "temporadas": [{"nome": "Natal", "inicio": "20-12", "fim": "05-01", "multiplicador": 2.0}]
+    }), encoding="utf-8")
+    monkeypatch.setattr(dados, "CAMINHO_CONFIG", str(arquivo_config))
+    dados.recarregar_configuracoes()
+
+    # Temporadas já vêm compiladas em MMDD
+    assert dados.obter_temporadas() == [(1220, 105, 2.0)]
+
+    # Sem mudança no arquivo, o mesmo objeto é devolvido (nada é relido)
+    assert dados.carregar_configuracoes() is dados.carregar_configuracoes()
+
+    # Alterando o arquivo (novo mtime), o cache é invalidado
+    versao_antiga = dados.versao_configuracoes()
+    arquivo_config.write_text(json.dumps({"multiplicador_fim_de_semana": 1.5, "temporadas": []}), encoding="utf-8")
+    os.utime(arquivo_config, ns=(0, 10**9))
+    assert dados.carregar_configuracoes()["multiplicador_fim_de_semana"] == 1.5
+    assert dados.obter_temporadas() == []
+    assert dados.versao_configuracoes() > versao_antiga
+
+    monkeypatch.undo()
+    dados.recarregar_configuracoes()
+
+
+def test_config_editada_durante_a_releitura_e_relida(tmp_path, monkeypatch):
+    import json
+    from roomex import dados
+
+    arquivo_config = tmp_path / "settings.json"
+    arquivo_config.write_text(json.dumps({"multiplicador_fim_de_semana": 1.2}), encoding="utf-8")
+    monkeypatch.setattr(dados, "CAMINHO_CONFIG", str(arquivo_config))
+    ler = dados._ler_arquivo_config
+
+    def ler_e_editar():
+        # O arquivo é lido e, logo em seguida, alterado por fora (nova data de modificação)
+        config = ler()
+        arquivo_config.write_text(json.dumps({"multiplicador_fim_de_semana": 1.5}), encoding="utf-8")
+        os.utime(arquivo_config, ns=(0, 10**9))
+        return config
+    monkeypatch.setattr(dados, "_ler_arquivo_config", ler_e_editar)
+    assert dados.recarregar_configuracoes()["multiplicador_fim_de_semana"] == 1.2
+    monkeypatch.setattr(dados, "_ler_arquivo_config", ler)
+    assert dados.carregar_configuracoes()["multiplicador_fim_de_semana"] == 1.5
+
+    monkeypatch.undo()
+    dados.recarregar_configuracoes()
+
+def test_iterar_dados_em_blocos_pequenos(tmp_path):
+    import json
+    from roomex.models import Reserva
+    from roomex.dados import iterar_dados, iterar_registros
+
+    quartos = [Quarto(101, "Simples", 1, 100.0)]
+    hospede = Hospede("Zoë \"Aspas\" [teste]", "000", "z@z.com", "00")
+    reservas = [Reserva(hospede, quartos[0], 1, "Site", date(2025, 4, d), date(2025, 4, d + 1)) for d in range(1, 21)]
+    arquivo = str(tmp_path / "reservas.json")
+    salvar_dados(reservas, arquivo)
+
+    # Blocos de 7 caracteres forçam elementos quebrados entre leituras
+    with open(arquivo, encoding="utf-8") as f:
+        assert list(iterar_registros(arquivo, tamanho_bloco=7)) == json.load(f)
+
+    gerador = iterar_dados(arquivo, Reserva, quartos)
+    assert not isinstance(gerador, list)
+    carregadas = list(gerador)
+    assert [r.data_entrada for r in carregadas] == [r.data_entrada for r in reservas]
+    assert carregadas[0].hospede.nome == hospede.nome
+
+def test_iterar_dados_json_lines(tmp_path):
+    import json
+    from roomex.dados import iterar_dados
+
+    arquivo = tmp_path / "quartos.jsonl"
+    arquivo.write_text("\n".join(json.dumps(q.to_dict()) for q in [Quarto(101, "S", 1, 100.0), Quarto(102, "S", 1, 90.0)]) + "\n",
+                       encoding="utf-8")
+    assert [q.numero for q in iterar_dados(str(arquivo), Quarto)] == [101, 102]
+
+
+def test_jsonl_indice_acesso_direto_e_anexar(tmp_path):
+    from roomex.dados import ler_registro, anexar_dados, contar_registros, dividir_em_blocos, iterar_intervalo
+
+    arquivo = str(tmp_path / "quartos.jsonl")
+    quartos = [Quarto(100 + i, "Simples", 1, 100.0 + i) for i in range(10)]
+    salvar_dados(quartos, arquivo, indice=True)
+
+    # Sem indentação: uma linha por registro
+    with open(arquivo, encoding="utf-8") as f:
+        assert len(f.readlines()) == 10
+    assert ler_registro(arquivo, 7)["numero"] == 107
+
+    anexar_dados([Quarto(200, "Luxo", 2, 300.0)], arquivo)
+    assert contar_registros(arquivo) == 11
+    assert ler_registro(arquivo, 10)["tipo"] == "Luxo"
+
+    # Os blocos cobrem todos os registros, sem repetir nenhum
+    blocos = dividir_em_blocos(arquivo, 3)
+    assert len(blocos) == 3
+    numeros = [r["numero"] for inicio, fim in blocos for r in iterar_intervalo(arquivo, inicio, fim)]
+    assert numeros == [q.numero for q in quartos] + [200]
+
+def test_json_antigo_convertido_para_jsonl(tmp_path):
+    antigo = str(tmp_path / "quartos.json")
+    salvar_dados([Quarto(101, "Simples", 1, 100.0)], antigo)
+
+    carregados = carregar_dados(str(tmp_path / "quartos.jsonl"), Quarto)
+    assert [q.numero for q in carregados] == [101]
+    assert os.path.exists(tmp_path / "quartos.jsonl")
+
+class _QuebraNaGravacao:
+    """Objeto cujo to_dict falha: simula uma queda no meio da serialização."""
+    def to_dict(self):
+        raise RuntimeError("queda simulada")
+
+@pytest.mark.parametrize("nome", ["quartos.json", "quartos.jsonl"])
+def test_gravacao_atomica_preserva_o_arquivo_anterior(tmp_path, nome):
+    arquivo = str(tmp_path / nome)
+    salvar_dados([Quarto(101, "Simples", 1, 100.0)], arquivo)
+    with pytest.raises(RuntimeError):
+        salvar_dados([Quarto(102, "Luxo", 2, 500.0), _QuebraNaGravacao()], arquivo)
+
+    assert [q.numero for q in carregar_dados(arquivo, Quarto)] == [101]
+    assert os.listdir(tmp_path) == [nome]  # nenhum temporário esquecido
+
+@pytest.mark.skipif(os.name != "posix", reason="fsync de pastas só no POSIX")
+def test_gravacao_atomica_sincroniza_a_pasta(tmp_path, monkeypatch):
+    import stat
+    from roomex import dados
+    sincronizadas = []
+    fsync = os.fsync
+    def registrar(descritor):
+        sincronizadas.append(stat.S_ISDIR(os.fstat(descritor).st_mode))
+        fsync(descritor)
+    monkeypatch.setattr(dados.os, "fsync", registrar)
+    with dados.gravacao_atomica(str(tmp_path / "quartos.json")) as arquivo:
+        arquivo.write("[]")
+    assert sincronizadas == [False, True]  # o temporário e depois a pasta
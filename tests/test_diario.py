@@ -0,0 +1,92 @@
+# tests/test_diario.py
+import json
+from datetime import date
+from roomex.models import Quarto, Hospede, Reserva
+from roomex.dados import salvar_dados
+from roomex.repositorio import Repositorio
+
+def _preparar(tmp_path):
+    arquivos = {
+        "quartos": str(tmp_path / "quartos.json"),
+        "reservas": str(tmp_path / "reservas.json"),
+        "diario": str(tmp_path / "reservas.diario.jsonl"),
+    }
+    salvar_dados([Quarto(101, "Simples", 1, 100.0), Quarto(201, "Duplo", 2, 180.0)], arquivos["quartos"])
+    return arquivos
+
+def _abrir(arquivos):
+    return Repositorio.carregar(arquivos["quartos"], arquivos["reservas"], arquivos["diario"])
+
+def test_acoes_vao_para_o_diario_e_sao_reaplicadas(tmp_path):
+    arquivos = _preparar(tmp_path)
+    repo = _abrir(arquivos)
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    reserva = Reserva(hospede, repo.buscar_quarto(201), 2, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    repo.adicionar_reserva(reserva)
+    reserva.realizar_checkin()
+    reserva.lancar_adicional("Frigobar", 12.5)
+    reserva.adicionar_pagamento(100.0, "Pix", date(2025, 4, 2))
+    repo.persistir()
+
+    # Nenhum snapshot foi reescrito: tudo está só no diário
+    with open(arquivos["diario"], encoding="utf-8") as arquivo:
+        eventos = [json.loads(linha)["evento"] for linha in arquivo]
+    assert eventos == ["reserva", "status", "adicional", "pagamento"]
+
+    recarregado = _abrir(arquivos)
+    copia = recarregado.buscar_reserva_por_quarto(201)
+    assert copia.status == "ATIVA"
+    assert [a.descricao for a in copia.adicionais] == ["Frigobar"]
+    assert copia.pagamentos[0].valor == 100.0
+
+def test_compactacao_e_reaplicacao_idempotente(tmp_path):
+    arquivos = _preparar(tmp_path)
+    repo = _abrir(arquivos)
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    reserva = Reserva(hospede, repo.buscar_quarto(101), 1, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    repo.adicionar_reserva(reserva)
+    reserva.lancar_adicional("Lavanderia", 30.0)
+
+    # Simula queda entre a gravação do snapshot e a limpeza do diário
+    with open(arquivos["diario"], encoding="utf-8") as arquivo:
+        conteudo_diario = arquivo.read()
+    repo.compactar()
+    with open(arquivos["diario"], "w", encoding="utf-8") as arquivo:
+        arquivo.write(conteudo_diario + '{"evento": "status", "pos')  # última linha cortada
+
+    recarregado = _abrir(arquivos)
+    assert len(recarregado.reservas) == 1
+    assert len(recarregado.reservas[0].adicionais) == 1
+    assert recarregado.reservas[0].status == "PENDENTE"
+
+def test_grupo_de_eventos_entrega_sob_a_trava(tmp_path):
+    import threading
+    arquivos = _preparar(tmp_path)
+    repo = _abrir(arquivos)
+    trava = threading.RLock()
+    entregas = []
+    registrar_varios = repo.armazenamento.registrar_varios
+    def registrar(eventos):
+        # A trava é da thread que entrega: outra thread não consegue pegá-la agora
+        resultado = []
+        outra = threading.Thread(target=lambda: resultado.append(trava.acquire(blocking=False)))
+        outra.start()
+        outra.join()
+        entregas.append((len(eventos), resultado[0]))
+        registrar_varios(eventos)
+    repo.armazenamento.registrar_varios = registrar
+
+    with repo.agrupar_eventos(trava):
+        reserva = Reserva(Hospede("Ana", "111", "a@a.com", "00"), repo.buscar_quarto(201), 2, "Site",
+                          date(2025, 4, 1), date(2025, 4, 3))
+        repo.adicionar_reserva(reserva)
+        reserva.realizar_checkin()
+    assert entregas == [(2, False)]
+
+def test_compactacao_silenciosa(tmp_path, capsys):
+    # Pode rodar na thread do gravador em segundo plano: nada vai para o terminal
+    arquivos = _preparar(tmp_path)
+    repo = _abrir(arquivos)
+    capsys.readouterr()
+    repo.compactar()
+    assert capsys.readouterr().out == ""
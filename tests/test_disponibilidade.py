@@ -0,0 +1,156 @@
+# tests/test_disponibilidade.py
+import pytest
+from datetime import date
+from roomex.models import Quarto, Hospede, Reserva
+from roomex.disponibilidade import IndiceDisponibilidade
+
+@pytest.fixture
+def cenario():
+    quarto = Quarto(101, "Simples", 2, 100.00)
+    hospede = Hospede("Tester", "000", "t@t.com", "00")
+    return quarto, hospede
+
+def test_detecta_overbooking(cenario):
+    quarto, hospede = cenario
+    indice = IndiceDisponibilidade()
+    indice.adicionar(Reserva(hospede, quarto, 1, "Site", date(2025, 4, 10), date(2025, 4, 15)))
+
+    # Saída no dia da entrada de outra reserva não é conflito
+    assert indice.esta_livre(101, date(2025, 4, 5), date(2025, 4, 10))
+    assert indice.esta_livre(101, date(2025, 4, 15), date(2025, 4, 20))
+    assert not indice.esta_livre(101, date(2025, 4, 14), date(2025, 4, 16))
+    assert not indice.esta_livre(101, date(2025, 4, 1), date(2025, 4, 30))
+
+    with pytest.raises(ValueError, match="já está reservado"):
+        indice.adicionar(Reserva(hospede, quarto, 1, "Site", date(2025, 4, 12), date(2025, 4, 13)))
+
+def test_cancelamento_libera_o_quarto(cenario):
+    quarto, hospede = cenario
+    indice = IndiceDisponibilidade()
+    reserva = Reserva(hospede, quarto, 1, "Site", date(2025, 4, 10), date(2025, 4, 15))
+    indice.adicionar(reserva)
+
+    reserva.cancelar_reserva()
+    assert indice.esta_livre(101, date(2025, 4, 10), date(2025, 4, 15))
+
+def test_mudanca_de_datas_atualiza_indice(cenario):
+    quarto, hospede = cenario
+    indice = IndiceDisponibilidade()
+    reserva = Reserva(hospede, quarto, 1, "Site", date(2025, 4, 10), date(2025, 4, 15))
+    indice.adicionar(reserva)
+
+    reserva.data_saida = date(2025, 4, 20)
+    assert not indice.esta_livre(101, date(2025, 4, 18), date(2025, 4, 19))
+    assert indice.esta_livre(101, date(2025, 4, 10), date(2025, 4, 20), ignorar=reserva)
+
+def test_busca_por_periodo_capacidade_e_tipo(cenario):
+    from roomex.disponibilidade import buscar_quartos_disponiveis
+
+    quarto_simples, hospede = cenario
+    quarto_luxo = Quarto(301, "Luxo", 4, 450.00)
+    quarto_luxo_2 = Quarto(302, "Luxo", 4, 450.00)
+    quartos = [quarto_simples, quarto_luxo, quarto_luxo_2]
+
+    indice = IndiceDisponibilidade()
+    indice.adicionar(Reserva(hospede, quarto_luxo, 2, "Site", date(2025, 4, 10), date(2025, 4, 15)))
+
+    # 3 pessoas: só os Luxo comportam, e o 301 está ocupado
+    livres = buscar_quartos_disponiveis(quartos, indice, date(2025, 4, 12), date(2025, 4, 14), 3)
+    assert [q.numero for q, _ in livres] == [302]
+    # 14/04/2025 (segunda) e 12-13/04 (sáb/dom): o preço cotado bate com a reserva
+    valor = livres[0][1]
+    assert valor == Reserva(hospede, quarto_luxo_2, 3, "Site", date(2025, 4, 12), date(2025, 4, 14)).calcular_valor_total()
+
+    livres = buscar_quartos_disponiveis(quartos, indice, date(2025, 4, 1), date(2025, 4, 3), 1, tipo="simples")
+    assert [q.numero for q, _ in livres] == [101]
+
+def test_sobreposicao_ja_gravada_nao_esconde_conflito(cenario):
+    quarto, hospede = cenario
+    indice = IndiceDisponibilidade()
+    # Dados antigos carregados sem verificação: a estadia longa cobre a curta
+    indice.adicionar(Reserva(hospede, quarto, 1, "Site", date(2025, 4, 1), date(2025, 4, 20)), verificar=False)
+    curta = Reserva(hospede, quarto, 1, "Site", date(2025, 4, 2), date(2025, 4, 3))
+    indice.adicionar(curta, verificar=False)
+
+    assert not indice.esta_livre(101, date(2025, 4, 10), date(2025, 4, 12))
+    assert indice.esta_livre(101, date(2025, 4, 20), date(2025, 4, 22))
+    curta.cancelar_reserva()
+    assert not indice.esta_livre(101, date(2025, 4, 10), date(2025, 4, 12))
+
+def test_mudancas_que_criam_overbooking_sao_recusadas(cenario):
+    quarto, hospede = cenario
+    indice = IndiceDisponibilidade()
+    primeira = Reserva(hospede, quarto, 1, "Site", date(2025, 4, 10), date(2025, 4, 15))
+    segunda = Reserva(hospede, quarto, 1, "Site", date(2025, 4, 15), date(2025, 4, 18))
+    indice.adicionar(primeira)
+    indice.adicionar(segunda)
+
+    with pytest.raises(ValueError, match="já está reservado"):
+        segunda.data_entrada = date(2025, 4, 14)
+    assert segunda.data_entrada == date(2025, 4, 15)
+    with pytest.raises(ValueError, match="já está reservado"):
+        primeira.data_saida = date(2025, 4, 16)
+    assert primeira.data_saida == date(2025, 4, 15)
+
+    # Cancelada, a primeira só volta se o período continuar livre
+    primeira.status = "CANCELADA"
+    segunda.data_entrada = date(2025, 4, 12)
+    with pytest.raises(ValueError, match="já está reservado"):
+        primeira.status = "PENDENTE"
+    assert primeira.status == "CANCELADA"
+    assert indice.reservas_do_quarto(101) == [segunda]
+
+def test_quartos_livres_pelo_catalogo(cenario):
+    from roomex.disponibilidade import buscar_quartos_disponiveis
+    from roomex.repositorio import Repositorio
+
+    quarto_simples, hospede = cenario
+    repo = Repositorio([quarto_simples, Quarto(302, "Luxo", 4, 450.00), Quarto(301, "Luxo", 4, 450.00),
+                        Quarto(303, "Luxo", 2, 300.00)])
+    repo.adicionar_reserva(Reserva(hospede, repo.buscar_quarto(301), 2, "Site", date(2025, 4, 10), date(2025, 4, 15)))
+
+    livres = repo.indice.quartos_livres(date(2025, 4, 12), date(2025, 4, 14), 2, tipo="luxo")
+    assert [q.numero for q in livres] == [302, 303]
+    assert [q.numero for q in repo.indice.quartos_livres(date(2025, 4, 12), date(2025, 4, 14), 3)] == [302]
+    assert repo.indice.quartos_livres(date(2025, 4, 12), date(2025, 4, 14), 1, tipo="Suíte") == []
+
+    # Sem lista de quartos, a busca usa o catálogo; com a lista, o resultado é o mesmo
+    pelo_catalogo = buscar_quartos_disponiveis(None, repo.indice, date(2025, 4, 1), date(2025, 4, 3), 2)
+    pela_lista = buscar_quartos_disponiveis(repo.quartos, repo.indice, date(2025, 4, 1), date(2025, 4, 3), 2)
+    assert sorted((q.numero, v) for q, v in pelo_catalogo) == sorted((q.numero, v) for q, v in pela_lista)
+    assert len(pelo_catalogo) == 4
+
+    repo.indice.remover_quarto(302)
+    assert [q.numero for q in repo.indice.quartos_livres(date(2025, 4, 12), date(2025, 4, 14), 3)] == []
+
+def test_agenda_igual_a_busca_linear(cenario):
+    import random
+    from roomex.disponibilidade import _AgendaQuarto
+    quarto, hospede = cenario
+    sorteio = random.Random(7)
+    agenda = _AgendaQuarto()
+    vivas = []  # (reserva, entrada, saida)
+    for passo in range(3000):
+        if vivas and sorteio.random() < 0.45:
+            reserva, entrada, _ = vivas.pop(sorteio.randrange(len(vivas)))
+            assert agenda.remover(entrada, reserva)
+        else:
+            # Sobreposições de propósito: a árvore não pode depender de intervalos disjuntos
+            entrada = sorteio.randrange(0, 400)
+            reserva = Reserva(hospede, quarto, 1, "Site", date(2025, 1, 1), date(2025, 1, 2))
+            vivas.append((reserva, entrada, entrada + sorteio.randrange(1, 30)))
+            agenda.inserir(entrada, vivas[-1][2], reserva)
+
+        entrada = sorteio.randrange(0, 430)
+        saida = entrada + sorteio.randrange(1, 20)
+        ignorar = sorteio.choice(vivas)[0] if vivas and passo % 3 == 0 else None
+        conflitantes = [(e, r) for r, e, s in vivas if e < saida and s > entrada and r is not ignorar]
+        achada = agenda.conflito(entrada, saida, ignorar)
+        if not conflitantes:
+            assert achada is None
+        else:
+            # A de entrada mais tardia, como informado na mensagem de overbooking
+            assert any(r is achada for _, r in conflitantes)
+            assert next(e for r, e, _ in vivas if r is achada) == max(e for e, _ in conflitantes)
+        assert agenda.ocupado(entrada, saida) == any(e < saida and s > entrada for _, e, s in vivas)
+    assert [id(r) for r in agenda.reservas()] == [id(r) for r, _, _ in sorted(vivas, key=lambda v: v[1])]
@@ -0,0 +1,94 @@
+# tests/test_gravacao.py
+import threading
+import time
+import pytest
+from roomex.gravacao import GravadorEmSegundoPlano
+
+def _esperar(condicao, limite=2.0):
+    fim = time.monotonic() + limite
+    while not condicao() and time.monotonic() < fim:
+        time.sleep(0.005)
+    return condicao()
+
+def test_avisos_seguidos_viram_uma_gravacao():
+    gravacoes = []
+    gravador = GravadorEmSegundoPlano(lambda: gravacoes.append(time.monotonic()), atraso=0.05)
+    try:
+        for _ in range(5):
+            gravador.marcar()
+        assert _esperar(lambda: gravacoes)
+        time.sleep(0.1)
+        assert len(gravacoes) == 1
+        assert not gravador.pendente
+    finally:
+        gravador.parar()
+
+def test_espera_limitada_com_avisos_continuos():
+    gravacoes = []
+    gravador = GravadorEmSegundoPlano(lambda: gravacoes.append(1), atraso=0.05, atraso_maximo=0.1)
+    try:
+        # Avisos a cada 20 ms nunca deixam passar 50 ms de silêncio; o limite de 100 ms garante as gravações
+        fim = time.monotonic() + 0.5
+        while time.monotonic() < fim:
+            gravador.marcar()
+            time.sleep(0.02)
+        assert len(gravacoes) >= 2
+    finally:
+        gravador.parar()
+
+def test_parar_grava_o_pendente():
+    gravacoes = []
+    gravador = GravadorEmSegundoPlano(lambda: gravacoes.append(1), atraso=60)
+    gravador.marcar()
+    gravador.parar()
+    assert gravacoes == [1]
+    gravador.parar()  # segunda chamada não grava de novo
+    assert gravacoes == [1]
+    with pytest.raises(ValueError):
+        gravador.marcar()
+
+def test_gravacao_espera_a_trava_e_tenta_de_novo_apos_erro():
+    tentativas = []
+    def gravar():
+        tentativas.append(threading.current_thread().name)
+        if len(tentativas) == 1:
+            raise OSError("disco cheio")
+    gravador = GravadorEmSegundoPlano(gravar, atraso=0.01)
+    try:
+        with gravador.trava:
+            gravador.marcar()
+            time.sleep(0.05)
+            assert tentativas == []  # a ação em andamento segura a gravação
+        assert _esperar(lambda: gravador.gravacoes == 1)
+        assert len(tentativas) == 2 and gravador.ultimo_erro is None
+    finally:
+        gravador.parar()
+
+def test_descarregar_grava_na_hora_e_propaga_erro():
+    def gravar():
+        raise OSError("sem permissão")
+    gravador = GravadorEmSegundoPlano(gravar, atraso=60)
+    try:
+        gravador.marcar()
+        with pytest.raises(OSError):
+            gravador.descarregar()
+        assert gravador.pendente
+    finally:
+        gravador._gravar = lambda: None
+        gravador.parar()
+
+def test_falhas_ficam_guardadas_ate_serem_retiradas(capsys):
+    def gravar():
+        raise OSError("disco cheio")
+    gravador = GravadorEmSegundoPlano(gravar, atraso=0.01)
+    try:
+        gravador.marcar()
+        assert _esperar(lambda: gravador.ultimo_erro is not None)
+        assert capsys.readouterr().err == ""  # nada impresso no meio de um prompt
+        erros = gravador.retirar_erros()
+        assert erros and all(isinstance(erro, OSError) for erro in erros)
+    finally:
+        gravador.parar()
+    # As falhas que sobram ao parar vão para o stderr
+    assert "disco cheio" in capsys.readouterr().err
+    assert gravador.retirar_erros() == []
@@ -0,0 +1,75 @@
+import io
+import json
+import pytest
+from datetime import date
+from roomex import instrumentacao
+from roomex.models import Quarto, Hospede, Reserva
+from roomex.dados import salvar_dados, carregar_dados
+from roomex.reports import calcular_metricas_financeiras, relatorio_cancelamentos
+
+@pytest.fixture
+def medindo():
+    instrumentacao.zerar()
+    instrumentacao.ativar(despejar_ao_sair=False)
+    yield
+    instrumentacao.desativar()
+    instrumentacao.zerar()
+
+def _reserva():
+    quarto = Quarto(101, "Simples", 1, 100.0)
+    return quarto, Reserva(Hospede("Ana", "111", "a@a.com", "00"), quarto, 1, "Site", date(2025, 4, 1), date(2025, 4, 3))
+
+def test_desligada_nao_registra_nada():
+    instrumentacao.zerar()
+    _, reserva = _reserva()
+    reserva.calcular_valor_total()
+    assert instrumentacao.resumo() == {"operacoes": {}, "contadores": {}}
+
+def test_operacoes_medidas(medindo, tmp_path):
+    quarto, reserva = _reserva()
+    reserva.status = "FINALIZADA"
+    reserva.calcular_valor_total()
+    reserva.calcular_valor_total()
+    arquivo = str(tmp_path / "reservas.json")
+    salvar_dados([reserva], arquivo)
+    carregar_dados(arquivo, Reserva, [quarto])
+    calcular_metricas_financeiras([reserva], date(2025, 4, 1), date(2025, 5, 1), 1)
+    relatorio_cancelamentos([reserva], date(2025, 4, 1), date(2025, 5, 1))
+
+    operacoes = instrumentacao.resumo()["operacoes"]
+    assert operacoes["Reserva.calcular_valor_total"]["chamadas"] == 2
+    for nome in ("dados.salvar_dados", "dados.carregar_dados", "dados.carregar_configuracoes",
+                 "reports.calcular_metricas_financeiras", "reports.relatorio_cancelamentos"):
+        assert operacoes[nome]["chamadas"] >= 1
+    assert "Reserva.calcular_valor_total" in instrumentacao.formatar_tabela()
+
+def test_despejo_em_json_e_perfil(medindo, tmp_path):
+    with instrumentacao.cronometro("menu.relatorios"):
+        instrumentacao.contar("precos.tabelas_montadas", 3)
+    arquivo = str(tmp_path / "medicoes.json")
+    instrumentacao.despejar("json", arquivo)
+    with open(arquivo, encoding="utf-8") as entrada:
+        dados = json.load(entrada)
+    assert dados["operacoes"]["menu.relatorios"]["chamadas"] == 1
+    assert dados["contadores"] == {"precos.tabelas_montadas": 3}
+
+    saida = io.StringIO()
+    with instrumentacao.perfilar("teste", saida=saida):
+        _reserva()[1].calcular_valor_total()
+    assert "calcular_valor_total" in saida.getvalue()
+
+def test_configuracao_pelo_ambiente_tem_prioridade(monkeypatch):
+    monkeypatch.setenv(instrumentacao.VARIAVEL_AMBIENTE, "0")
+    instrumentacao.configurar({"instrumentacao": True, "perfilar_acao": "6"})
+    assert not instrumentacao.ativo()
+    assert instrumentacao.perfilar_acao("6")
+
+    monkeypatch.delenv(instrumentacao.VARIAVEL_AMBIENTE)
+    monkeypatch.delenv(instrumentacao.VARIAVEL_PERFIL, raising=False)
+    instrumentacao.configurar({"instrumentacao": "json"})
+    try:
+        assert instrumentacao.ativo()
+        assert not instrumentacao.perfilar_acao("6")
+    finally:
+        instrumentacao.desativar()
+        instrumentacao.zerar()
@@ -0,0 +1,105 @@
+import json
+import subprocess
+import sys
+import pytest
+from datetime import date
+from roomex.models import Quarto
+from roomex.dados import salvar_dados
+from roomex.repositorio import Repositorio
+from roomex.lote import executar_lote, ler_operacoes, main
+
+def _abrir(tmp_path):
+    arquivo_quartos = str(tmp_path / "quartos.json")
+    if not (tmp_path / "quartos.json").exists():
+        salvar_dados([Quarto(101, "Simples", 1, 100.0), Quarto(201, "Duplo", 2, 180.0)], arquivo_quartos)
+    return Repositorio.carregar(arquivo_quartos, str(tmp_path / "reservas.json"),
+                                str(tmp_path / "reservas.diario.jsonl"))
+
+def test_operacoes_do_csv_com_erros_por_linha(tmp_path):
+    arquivo = tmp_path / "operacoes.csv"
+    arquivo.write_text(
+        "operacao,quarto,data_entrada,data_saida,num_hospedes,nome,documento,valor,descricao,quitar\n"
+        "criar,201,2025-04-01,2025-04-03,2,Ana,111,,,\n"
+        "criar,201,2025-04-02,2025-04-05,1,Bia,222,,,\n"        # overbooking
+        "check-in,201,,,,,,,,\n"
+        "extra,201,,,,,,\"12,50\",Frigobar,\n"
+        "pagamento,201,,,,,,-5,,\n"                             # valor inválido
+        "checkout,201,,,,,,,,S\n"
+        "criar,101,05/04/2025,07/04/2025,1,Caio,333,,,\n"
+        "cancelar,101,,,,,,,,\n"
+        "checkin,999,,,,,,,,\n", encoding="utf-8")              # quarto inexistente
+
+    repo = _abrir(tmp_path)
+    resultado = executar_lote(repo, ler_operacoes(str(arquivo)))
+    assert (resultado.aplicadas, resultado.total) == (6, 9)
+    assert [erro.linha for erro in resultado.erros] == [3, 6, 10]
+    assert "já está reservado" in resultado.erros[0].mensagem
+
+    ana, caio = repo.reservas
+    assert ana.status == "FINALIZADA" and ana.saldo_centavos == 0
+    assert [a.valor for a in ana.adicionais] == [12.5]
+    assert caio.data_entrada == date(2025, 4, 5) and caio.status == "CANCELADA"
+
+    # Todos os eventos foram gravados no diário (de uma vez) e são reaplicados na reabertura
+    repo.fechar()
+    reaberto = _abrir(tmp_path)
+    assert [(r.hospede.nome, r.status) for r in reaberto.reservas] == [("Ana", "FINALIZADA"), ("Caio", "CANCELADA")]
+    reaberto.fechar()
+
+def test_persistencia_por_lote(tmp_path):
+    arquivo = tmp_path / "operacoes.jsonl"
+    linhas = [{"operacao": "criar", "quarto": 101, "data_entrada": f"2025-05-{dia:02d}",
+               "data_saida": f"2025-05-{dia + 1:02d}", "nome": "Ana", "documento": "111"} for dia in range(1, 6)]
+    arquivo.write_text("\n".join(json.dumps(linha) for linha in linhas) + "\n{quebrado\n", encoding="utf-8")
+
+    repo = _abrir(tmp_path)
+    gravacoes = []
+    repo.armazenamento.registrar_varios = lambda eventos: gravacoes.append(len(eventos))
+    resultado = executar_lote(repo, ler_operacoes(str(arquivo)), tamanho_lote=2)
+    assert resultado.aplicadas == 5
+    assert resultado.erros[0].linha == 6 and "JSON inválido" in resultado.erros[0].mensagem
+    # Um grupo de eventos por lote de 2 linhas, nenhum evento gravado individualmente
+    assert gravacoes == [2, 2, 1]
+    repo.fechar()
+
+def test_linhas_malformadas_nao_interrompem_o_lote(tmp_path):
+    arquivo = tmp_path / "operacoes.jsonl"
+    arquivo.write_text(
+        '{"operacao": "criar", "quarto": 201, "data_entrada": "2025-04-01", "data_saida": "2025-04-03",'
+        ' "num_hospedes": 2, "nome": "Ana", "documento": "111"}\n'
+        '[1, 2]\n'                                                       # não é objeto
+        '"texto"\n'
+        '{"operacao": "pagamento", "quarto": 201, "valor": "inf"}\n'     # valor não finito
+        '{"operacao": "pagamento", "quarto": 201, "valor": "nan"}\n'
+        '{"operacao": "pagamento", "quarto": 201, "valor": 1e400}\n'
+        '{"operacao": "adicional", "quarto": 201, "descricao": "Café", "valor": 10}\n',
+        encoding="utf-8")
+
+    repo = _abrir(tmp_path)
+    resultado = executar_lote(repo, ler_operacoes(str(arquivo)))
+    assert (resultado.aplicadas, resultado.total) == (2, 7)
+    assert [erro.linha for erro in resultado.erros] == [2, 3, 4, 5, 6]
+    assert "objeto" in resultado.erros[0].mensagem
+    assert repo.reservas[0].pagamentos == []
+
+def test_excecao_inesperada_fica_na_linha(tmp_path, monkeypatch):
+    from roomex import lote
+
+    def quebrar(repo, operacao):
+        raise KeyError("campo")
+    monkeypatch.setitem(lote.OPERACOES, "cancelar", quebrar)
+    resultado = executar_lote(_abrir(tmp_path), [(2, {"operacao": "cancelar", "quarto": 101}),
+                                                 (3, {"operacao": "desconhecida"})])
+    assert [erro.linha for erro in resultado.erros] == [2, 3]
+    assert resultado.erros[0].mensagem.startswith("KeyError")
+
+def test_modo_lote_nao_importa_o_menu():
+    codigo = "import sys, roomex.lote; print('roomex.main' in sys.modules)"
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True).stdout
+    assert saida.strip() == "False"
+
+def test_lote_negativo_recusado_na_linha_de_comando(tmp_path, capsys):
+    with pytest.raises(SystemExit) as saida:
+        main([str(tmp_path / "operacoes.csv"), "--lote", "-1"])
+    assert saida.value.code == 2
+    assert "negativo" in capsys.readouterr().err
@@ -42,4 +42,73 @@ def test_validar_datas_reserva():
     quarto = Quarto(101, "S", 2, 100)
     with pytest.raises(ValueError, match="anterior"):
         # Saída antes da entrada
-        Reserva(hospede, quarto, 1, "site", date(2025, 1, 10), date(2025, 1, 5))
\ No newline at end of file
+        Reserva(hospede, quarto, 1, "site", date(2025, 1, 10), date(2025, 1, 5))
+
+def test_modelos_sem_dict_por_instancia():
+    """Os modelos usam __slots__: nada de __dict__ por objeto."""
+    hospede = Hospede("Teste", "000", "e", "t")
+    quarto = Quarto(101, "S", 2, 100)
+    reserva = Reserva(hospede, quarto, 1, "site", date(2025, 1, 1), date(2025, 1, 5))
+    for obj in (hospede, quarto, reserva, Pagamento(date(2025, 1, 1), "Pix", 10.0), Adicional("Água", 5.0)):
+        assert not hasattr(obj, "__dict__")
+
+def test_from_dict_compartilha_hospede_pelo_documento():
+    quarto = Quarto(101, "S", 2, 100)
+    dados = Reserva(Hospede("Ana", "111", "e", "t"), quarto, 1, "site", date(2025, 1, 1), date(2025, 1, 5)).to_dict()
+    hospedes = {}
+    r1 = Reserva.from_dict(dados, {101: quarto}, hospedes)
+    r2 = Reserva.from_dict(dados, {101: quarto}, hospedes)
+    assert r1.hospede is r2.hospede
+    assert Reserva.from_dict(dados, [quarto]).hospede is not r1.hospede
+
+def test_valores_em_centavos_e_checkout_exato():
+    """Dinheiro é guardado em centavos: parcelas quebradas quitam a conta sem margem de erro."""
+    hospede = Hospede("Ana", "111", "e", "t")
+    quarto = Quarto(101, "S", 2, 0.1 + 0.2)
+    assert quarto.tarifa_centavos == 30
+    assert quarto.tarifa_base == 0.3
+
+    reserva = Reserva(hospede, quarto, 1, "site", date(2025, 3, 10), date(2025, 3, 11))
+    reserva.lancar_adicional("Café", 99.70)
+    assert reserva.calcular_valor_total_centavos() == 10000
+    reserva.status = "ATIVA"
+    for _ in range(2):
+        reserva.adicionar_pagamento(33.33, "Pix", date(2025, 3, 10))
+    with pytest.raises(ValueError, match="Falta: R\\$ 33.34"):
+        reserva.realizar_checkout()
+    reserva.adicionar_pagamento(33.34, "Pix", date(2025, 3, 10))
+    reserva.realizar_checkout()
+    assert reserva.status == "FINALIZADA"
+
+    # O JSON continua em reais
+    dados = reserva.to_dict()
+    assert dados["pagamentos"][2]["valor"] == 33.34
+    assert Reserva.from_dict(dados, [quarto]).total_pago_centavos() == 10000
+
+def test_from_dict_confiavel_equivale_ao_validado():
+    """O caminho confiável (dados já gravados) monta o mesmo estado, sem os setters de validação."""
+    quarto = Quarto(101, "S", 2, 100)
+    reserva = Reserva(Hospede("Ana", "111", "e", "t"), quarto, 2, "site", date(2025, 1, 1), date(2025, 1, 5))
+    reserva.status = "ATIVA"
+    reserva.adicionar_pagamento(150.0, "Pix", date(2025, 1, 2))
+    reserva.lancar_adicional("Café", 12.5)
+    dados = reserva.to_dict()
+
+    validada = Reserva.from_dict(dados, [quarto])
+    confiavel = Reserva.from_dict(dados, {101: quarto}, confiavel=True)
+    assert confiavel.to_dict() == validada.to_dict() == dados
+    assert confiavel.calcular_valor_total_centavos() == validada.calcular_valor_total_centavos()
+    assert confiavel.total_pago_centavos() == 15000
+    assert Quarto.from_dict(quarto.to_dict(), confiavel=True).to_dict() == quarto.to_dict()
+
+    # Só o caminho confiável aceita um registro que não passaria pela validação
+    dados["num_hospedes"] = 3
+    assert Reserva.from_dict(dados, [quarto], confiavel=True).num_hospedes == 3
+    with pytest.raises(ValueError, match="suporta apenas"):
+        Reserva.from_dict(dados, [quarto])
+
+    # Observadores continuam funcionando em reservas montadas direto
+    eventos = []
+    confiavel.registrar_observador(lambda r, evento, **_: eventos.append(evento))
+    confiavel.status = "FINALIZADA"
+    assert eventos == ["validar", "status"]
@@ -0,0 +1,38 @@
+import pytest
+from datetime import date
+from roomex import seed
+from roomex.dados import salvar_dados
+from roomex.paralelo import relatorio_paralelo
+from roomex.reports import calcular_metricas_financeiras, relatorio_cancelamentos
+
+@pytest.fixture(scope="module")
+def cenario():
+    quartos = seed.gerar_quartos(30)
+    return quartos, seed.gerar_reservas(quartos, 900, semente=3)
+
+PERIODOS = [(date(2023, 1, 1), date(2024, 12, 31)), (date(2023, 6, 3), date(2023, 6, 20))]
+
+@pytest.mark.parametrize("por", ["quarto", "data"])
+def test_paralelo_igual_ao_serial(cenario, por):
+    quartos, reservas = cenario
+    for inicio, fim in PERIODOS:
+        metricas, cancelamentos = relatorio_paralelo(reservas, inicio, fim, len(quartos), trabalhadores=3, por=por)
+        assert metricas == calcular_metricas_financeiras(reservas, inicio, fim, len(quartos))
+        assert cancelamentos == relatorio_cancelamentos(reservas, inicio, fim)
+
+def test_paralelo_lendo_blocos_do_arquivo(cenario, tmp_path):
+    quartos, reservas = cenario
+    arquivo = str(tmp_path / "reservas.jsonl")
+    salvar_dados(reservas, arquivo, indice=True)
+
+    inicio, fim = PERIODOS[0]
+    metricas, cancelamentos = relatorio_paralelo(arquivo, inicio, fim, len(quartos), trabalhadores=2, quartos=quartos)
+    assert metricas == calcular_metricas_financeiras(reservas, inicio, fim, len(quartos))
+    assert cancelamentos == relatorio_cancelamentos(reservas, inicio, fim)
+
+def test_relatorios_aceitam_trabalhadores(cenario):
+    quartos, reservas = cenario
+    inicio, fim = PERIODOS[1]
+    assert calcular_metricas_financeiras(reservas, inicio, fim, len(quartos), trabalhadores=2) == \
+        calcular_metricas_financeiras(reservas, inicio, fim, len(quartos))
+    assert relatorio_cancelamentos(reservas, inicio, fim, trabalhadores=2) == relatorio_cancelamentos(reservas, inicio, fim)
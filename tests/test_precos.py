@@ -0,0 +1,94 @@
+# tests/test_precos.py
+from datetime import date, timedelta
+from roomex.precos import tabela_fatores, soma_fatores, calcular_diarias
+from roomex.dados import carregar_configuracoes
+
+def _fator_noite(dia: date) -> float:
+    """Cálculo de referência, noite a noite, direto do settings.json."""
+    config = carregar_configuracoes()
+    fator = 1.0
+    if dia.weekday() >= 5:
+        fator *= config.get("multiplicador_fim_de_semana", 1.0)
+    dia_mmdd = dia.month * 100 + dia.day
+    for temporada in config.get("temporadas", []):
+        d_ini, m_ini = map(int, temporada["inicio"].split('-'))
+        d_fim, m_fim = map(int, temporada["fim"].split('-'))
+        if m_ini * 100 + d_ini <= dia_mmdd <= m_fim * 100 + d_fim:
+            fator *= temporada["multiplicador"]
+            break
+    return fator
+
+def test_tabela_tem_um_fator_por_noite():
+    assert len(tabela_fatores(2024)) == 366
+    assert len(tabela_fatores(2025)) == 365
+
+def test_tabela_bate_com_calculo_noite_a_noite():
+    tabela = tabela_fatores(2025)
+    dia = date(2025, 1, 1)
+    for fator in tabela:
+        assert fator == _fator_noite(dia)
+        dia += timedelta(days=1)
+
+def test_soma_fatores_atravessando_o_ano():
+    entrada, saida = date(2024, 12, 28), date(2025, 1, 4)
+    esperado = sum(_fator_noite(entrada + timedelta(days=i)) for i in range((saida - entrada).days))
+    assert abs(soma_fatores(entrada, saida) - esperado) < 1e-9
+
+def test_calcular_diarias_dia_normal():
+    # 10/03/2025 é segunda-feira, fora de temporada
+    assert calcular_diarias(100.0, date(2025, 3, 10), date(2025, 3, 11)) == 100.0
+
+def test_cotar_lote_igual_ao_calculo_individual():
+    import pytest
+    pytest.importorskip("numpy")
+    from roomex.models import Quarto, Hospede, Reserva
+    from roomex.precos import cotar_lote
+
+    hospede = Hospede("Lote", "000", "l@l.com", "00")
+    quartos = [Quarto(101, "Simples", 2, 100.0), Quarto(301, "Luxo", 4, 437.35)]
+
+    def montar_reservas():
+        # Reservas novas a cada cotação: nenhum subtotal memorizado passa de um caminho para o outro
+        reservas = []
+        entrada = date(2024, 1, 3)
+        for i in range(300):
+            quarto = quartos[i % 2]
+            # Estadias de 1 a 17 noites, algumas atravessando o ano
+            inicio = entrada + timedelta(days=i * 3)
+            reserva = Reserva(hospede, quarto, 1, "Site", inicio, inicio + timedelta(days=1 + i % 17))
+            if i % 5 == 0:
+                reserva.lancar_adicional("Frigobar", 12.9)
+            reservas.append(reserva)
+        return reservas
+
+    esperado = [r.calcular_valor_total() for r in montar_reservas()]
+    assert cotar_lote(montar_reservas(), usar_numpy=True) == esperado
+    assert cotar_lote(montar_reservas(), usar_numpy=False) == esperado
+
+
+def test_valor_da_reserva_e_memorizado(monkeypatch):
+    from roomex import models
+    from roomex.models import Quarto, Hospede, Reserva, Adicional
+
+    chamadas = []
+    original = models.calcular_diarias_centavos
+    monkeypatch.setattr(models, "calcular_diarias_centavos", lambda *a: chamadas.append(a) or original(*a))
+
+    quarto = Quarto(101, "Simples", 2, 100.0)
+    reserva = Reserva(Hospede("Memo", "000", "m@m.com", "00"), quarto, 1, "Site", date(2025, 3, 10), date(2025, 3, 12))
+    assert reserva.calcular_valor_total() == 200.0
+    assert reserva.calcular_valor_total() == 200.0
+    assert len(chamadas) == 1
+
+    # Adicionais não invalidam as diárias, nem mesmo com append direto na lista
+    reserva.lancar_adicional("Água", 5.0)
+    reserva.adicionais.append(Adicional("Café", 2.5))
+    assert reserva.calcular_valor_total() == 207.5
+    assert len(chamadas) == 1
+
+    # Datas e tarifa invalidam
+    reserva.data_saida = date(2025, 3, 11)
+    assert reserva.calcular_valor_total() == 107.5
+    quarto.tarifa_base = 200.0
+    assert reserva.calcular_valor_total() == 207.5
+    assert len(chamadas) == 3
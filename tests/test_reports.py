@@ -65,4 +65,48 @@ def test_contagem_cancelamentos(dados_cenario):
     
     assert stats["CANCELADA"] == 1
     assert stats["NO_SHOW"] == 1
-    assert stats["TOTAL"] == 2
\ No newline at end of file
+    assert stats["TOTAL"] == 2
+
+def test_relatorios_aceitam_gerador(dados_cenario):
+    quartos, hospede = dados_cenario
+    r1 = Reserva(hospede, quartos[0], 1, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    r1.status = "CONFIRMADA"
+
+    metricas = calcular_metricas_financeiras((r for r in [r1]), date(2025, 4, 1), date(2025, 4, 3), total_quartos=2)
+    assert metricas["receita_total"] == 200.00
+
+def test_relatorio_unificado_em_uma_passada(dados_cenario):
+    from roomex.reports import gerar_relatorio, Acumulador
+
+    class NoitesPorOrigem(Acumulador):
+        nome = "origem"
+        def __init__(self):
+            self.noites = {}
+        def adicionar(self, reserva, dias_interseccao, contexto):
+            self.noites[reserva.origem] = self.noites.get(reserva.origem, 0) + dias_interseccao
+        def resultado(self, contexto):
+            return self.noites
+
+    quartos, hospede = dados_cenario
+    r1 = Reserva(hospede, quartos[0], 1, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    r1.status = "CONFIRMADA"
+    r2 = Reserva(hospede, quartos[1], 1, "Balcão", date(2025, 4, 1), date(2025, 4, 2))
+    r2.status = "CANCELADA"
+
+    from roomex.reports import AcumuladorFinanceiro, AcumuladorCancelamentos
+    relatorio = gerar_relatorio(iter([r1, r2]), date(2025, 4, 1), date(2025, 4, 3), 2,
+                                [AcumuladorFinanceiro(), AcumuladorCancelamentos(), NoitesPorOrigem()])
+    assert relatorio["financeiro"] == calcular_metricas_financeiras([r1, r2], date(2025, 4, 1), date(2025, 4, 3), 2)
+    assert relatorio["cancelamentos"] == {"CANCELADA": 1, "NO_SHOW": 0, "TOTAL": 1}
+    assert relatorio["origem"] == {"Site": 2, "Balcão": 1}
+
+def test_acumulador_incompleto_falha_ao_criar():
+    from roomex.reports import Acumulador
+
+    class SoAdiciona(Acumulador):
+        nome = "incompleto"
+        def adicionar(self, reserva, dias_interseccao, contexto):
+            pass
+
+    with pytest.raises(TypeError):
+        SoAdiciona()
@@ -0,0 +1,76 @@
+# tests/test_repositorio.py
+import pytest
+from datetime import date
+from roomex.models import Quarto, Hospede, Reserva
+from roomex.dados import salvar_dados
+from roomex.repositorio import Repositorio
+
+@pytest.fixture
+def repo():
+    return Repositorio([Quarto(101, "Simples", 1, 100.00), Quarto(201, "Duplo", 2, 180.00)])
+
+def test_indices_por_quarto_documento_e_status(repo):
+    ana = Hospede("Ana", "111", "a@a.com", "00")
+    bia = Hospede("Bia", "222", "b@b.com", "00")
+    r1 = Reserva(ana, repo.buscar_quarto(101), 1, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    r2 = Reserva(bia, repo.buscar_quarto(201), 2, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    r3 = Reserva(ana, repo.buscar_quarto(201), 1, "Site", date(2025, 5, 1), date(2025, 5, 3))
+    for r in (r1, r2, r3):
+        repo.adicionar_reserva(r)
+
+    assert repo.buscar_quarto(999) is None
+    assert repo.reservas_por_documento("111") == [r1, r3]
+    assert repo.contar_por_status("PENDENTE") == 3
+
+    # Transições de status atualizam o índice incrementalmente
+    r2.realizar_checkin()
+    assert repo.reservas_por_status("ATIVA") == [r2]
+    assert repo.contar_por_status("PENDENTE") == 2
+    assert repo.buscar_reserva_por_quarto(201) is r2
+
+    r2.status = "FINALIZADA"
+    assert repo.buscar_reserva_por_quarto(201) is r3
+
+def test_repositorio_recusa_overbooking(repo):
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    quarto = repo.buscar_quarto(101)
+    repo.adicionar_reserva(Reserva(hospede, quarto, 1, "Site", date(2025, 4, 1), date(2025, 4, 5)))
+    with pytest.raises(ValueError, match="já está reservado"):
+        repo.adicionar_reserva(Reserva(hospede, quarto, 1, "Site", date(2025, 4, 4), date(2025, 4, 6)))
+    assert len(repo.reservas) == 1
+
+def test_carregar_do_disco(tmp_path, repo):
+    hospede = Hospede("Ana", "111", "a@a.com", "00")
+    repo.adicionar_reserva(Reserva(hospede, repo.buscar_quarto(201), 2, "Site", date(2025, 4, 1), date(2025, 4, 5)))
+    salvar_dados(repo.quartos, str(tmp_path / "quartos.json"))
+    salvar_dados(repo.reservas, str(tmp_path / "reservas.json"))
+
+    carregado = Repositorio.carregar(str(tmp_path / "quartos.json"), str(tmp_path / "reservas.json"))
+    assert len(carregado.quartos) == 2
+    reserva = carregado.buscar_reserva_por_quarto(201)
+    assert reserva.quarto is carregado.buscar_quarto(201)
+    assert carregado.reservas_por_documento("111") == [reserva]
+
+def test_saldo_em_aberto_incremental(repo):
+    ana = Hospede("Ana", "111", "a@a.com", "00")
+    r1 = Reserva(ana, repo.buscar_quarto(101), 1, "Site", date(2025, 4, 1), date(2025, 4, 3))
+    r2 = Reserva(ana, repo.buscar_quarto(201), 1, "Site", date(2025, 4, 1), date(2025, 4, 2))
+    for r in (r1, r2):
+        repo.adicionar_reserva(r)
+    # Reservas pendentes não entram no total da casa
+    assert repo.saldo_em_aberto() == 0.0
+
+    r1.realizar_checkin()
+    r2.realizar_checkin()
+    assert r1.saldo == 200.0
+    assert repo.saldo_em_aberto() == 380.0
+
+    r1.lancar_adicional("Frigobar", 12.5)
+    r2.adicionar_pagamento(180.0, "Pix", date(2025, 4, 1))
+    assert repo.saldo_em_aberto() == 212.5
+    assert repo.devedores() == [r1]
+
+    r1.adicionar_pagamento(212.5, "Cartão", date(2025, 4, 3))
+    r1.realizar_checkout()
+    assert repo.saldo_em_aberto() == 0.0
+    assert repo.devedores() == []
@@ -0,0 +1,70 @@
+import pytest
+from datetime import date
+from roomex import seed
+from roomex.series import serie_diaria, serie_mensal
+from roomex.reports import calcular_metricas_financeiras
+
+@pytest.fixture(scope="module")
+def cenario():
+    quartos = seed.gerar_quartos(15)
+    return quartos, seed.gerar_reservas(quartos, 400, semente=11)
+
+INICIO, FIM = date(2023, 2, 10), date(2023, 5, 20)
+
+def test_serie_diaria_igual_a_contagem_noite_a_noite(cenario):
+    quartos, reservas = cenario
+    serie = serie_diaria(reservas, INICIO, FIM, quartos)
+    assert len(serie["datas"]) == (FIM - INICIO).days
+
+    vendidas = [r for r in reservas if r.status not in ("CANCELADA", "NO_SHOW", "PENDENTE")]
+    for i, dia in enumerate(serie["datas"]):
+        ocupados = sum(1 for r in vendidas if r.data_entrada <= dia < r.data_saida)
+        assert serie["quartos_ocupados"][i] == ocupados
+        assert serie["ocupacao"][i] == round(ocupados / len(quartos) * 100, 2)
+
+    # Estadias inteiras dentro do período entram com o valor exato; as que cruzam as bordas
+    # diferem do rateio do relatório financeiro por menos de um centavo por noite
+    metricas = calcular_metricas_financeiras(reservas, INICIO, FIM, len(quartos))
+    parciais = [r for r in vendidas if (r.data_entrada < INICIO < r.data_saida) or (r.data_entrada < FIM < r.data_saida)]
+    total_serie = sum(round(v * 100) for v in serie["receita"])
+    assert abs(total_serie - round(metricas["receita_total"] * 100)) <= sum(len(r) for r in parciais)
+    assert sum(serie["quartos_ocupados"]) * 100 / (len(quartos) * len(serie["datas"])) == pytest.approx(metricas["ocupacao"], abs=0.01)
+
+def test_serie_mensal_e_grupos(cenario):
+    quartos, reservas = cenario
+    diaria = serie_diaria(reservas, INICIO, FIM, quartos)
+    mensal = serie_mensal(reservas, INICIO, FIM, quartos)
+    assert mensal["datas"] == [date(2023, m, 1) for m in range(2, 6)]
+    assert sum(mensal["quartos_ocupados"]) == sum(diaria["quartos_ocupados"])
+    assert round(sum(mensal["receita"]), 2) == round(sum(diaria["receita"]), 2)
+
+    por_tipo = serie_diaria(reservas, INICIO, FIM, quartos, agrupar_por="tipo")
+    assert set(por_tipo) == {q.tipo for q in quartos}
+    for i in range(len(diaria["datas"])):
+        assert sum(s["quartos_ocupados"][i] for s in por_tipo.values()) == diaria["quartos_ocupados"][i]
+
+    por_origem = serie_mensal(reservas, INICIO, FIM, quartos, agrupar_por="origem")
+    assert sum(sum(s["quartos_ocupados"]) for s in por_origem.values()) == sum(mensal["quartos_ocupados"])
+
+    with pytest.raises(ValueError):
+        serie_diaria(reservas, INICIO, FIM, quartos, agrupar_por="hospede")
+
+def test_cotacao_em_blocos_nao_muda_o_resultado(cenario, monkeypatch):
+    from roomex import reports, series
+    quartos, reservas = cenario
+    esperado = (calcular_metricas_financeiras(reservas, INICIO, FIM, len(quartos)),
+                serie_diaria(reservas, INICIO, FIM, quartos, agrupar_por="tipo"))
+
+    monkeypatch.setattr(reports, "TAMANHO_BLOCO_COTACAO", 7)
+    monkeypatch.setattr(series, "TAMANHO_BLOCO_COTACAO", 7)
+    financeiro = reports.AcumuladorFinanceiro()
+    serie = series.AcumuladorSerie(quartos, "tipo")
+    maiores = []
+    adicionar = financeiro.adicionar
+    def observar(*args):
+        adicionar(*args)
+        maiores.append(max(len(financeiro.candidatas), len(serie.candidatas)))
+    financeiro.adicionar = observar
+    resultado = reports.gerar_relatorio(reservas, INICIO, FIM, len(quartos), [financeiro, serie])
+    assert (resultado["financeiro"], resultado[serie.nome]) == esperado
+    assert max(maiores) < 7